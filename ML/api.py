@@ -1,19 +1,25 @@
 # api.py
-from fastapi import FastAPI
-from pydantic import BaseModel
+import os
+from typing import List
+
 import joblib
-import pandas as pd
+import numpy as np
+from fastapi import FastAPI, HTTPException
+from pydantic import BaseModel
 
 app = FastAPI()
 
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
 # Load model and encoders
-model = joblib.load("model.pkl")
-encoders = joblib.load("label_encoders.pkl")
+model = joblib.load(os.path.join(BASE_DIR, "insurance_model.pkl"))
+encoders = joblib.load(os.path.join(BASE_DIR, "label_encoders.pkl"))
 
 class UserInput(BaseModel):
     age: int
     gender: str
     annual_income_inr: int
+    premium: float
     marital_status: str
     has_dependents: str
     occupation: str
@@ -27,20 +33,57 @@ class UserInput(BaseModel):
     policy_duration_preference: str
     investment_goal: str
 
-@app.post("/predict/")
-def predict(data: UserInput):
-    input_dict = data.dict()
 
-    # Encode inputs
-    for key in input_dict:
-        if key in encoders:
-            input_dict[key] = encoders[key].transform([input_dict[key]])[0]
+def _category_codes(encoder):
+    """Label -> code lookup equivalent to ``encoder.transform``"""
+    codes = {}
+    for code, label in enumerate(encoder.classes_):
+        # "None" was read as NaN when the encoders were fitted
+        codes["None" if isinstance(label, float) and np.isnan(label) else str(label)] = code
+    return codes
+
+
+# Feature columns in the order the model was trained on
+FEATURES = list(getattr(model, "feature_names_in_", UserInput.model_fields))
+# One code lookup per feature, None for numeric features
+CATEGORY_CODES = [
+    _category_codes(encoders[feature]) if feature in encoders else None
+    for feature in FEATURES
+]
+POLICY_LABELS = [str(label) for label in encoders["interested_policy"].classes_]
 
-    input_df = pd.DataFrame([input_dict])
-    prediction = model.predict(input_df)[0]
 
-    # Decode the prediction
-    policy_decoder = encoders["interested_policy"]
-    prediction_label = policy_decoder.inverse_transform([prediction])[0]
+def _encode(inputs: List[UserInput]) -> np.ndarray:
+    """Feature matrix of encoded inputs, one row per input"""
+    features = np.empty((len(inputs), len(FEATURES)), dtype=np.float32)
+    for i, data in enumerate(inputs):
+        row = features[i]
+        for j, (feature, codes) in enumerate(zip(FEATURES, CATEGORY_CODES)):
+            value = getattr(data, feature)
+            if codes is not None:
+                try:
+                    value = codes[value]
+                except KeyError:
+                    raise HTTPException(
+                        status_code=422,
+                        detail=f"Unknown {feature} {value!r}; expected one of {sorted(codes)}"
+                    )
+            row[j] = value
+    return features
+
+
+def _recommend(inputs: List[UserInput]) -> List[dict]:
+    predictions = model.predict(_encode(inputs))
+    return [{"recommended_policy": POLICY_LABELS[int(p)]} for p in predictions]
+
+
+@app.post("/predict/")
+def predict(data: UserInput):
+    return _recommend([data])[0]
+
 
-    return {"recommended_policy": prediction_label}
+@app.post("/predict/batch/")
+def predict_batch(data: List[UserInput]):
+    if not data:
+        return []
+    return _recommend(data)
@@ -1,55 +1,103 @@
-import random
-from faker import Faker
+import argparse
+import os
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
 import pandas as pd
 
-fake = Faker()
+COLUMNS = [
+    "user_id",
+    "age",
+    "gender",
+    "annual_income_inr",
+    "premium",
+    "marital_status",
+    "has_dependents",
+    "occupation",
+    "health_issues",
+    "vehicle_owner",
+    "existing_policies",
+    "city_type",
+    "education_level",
+    "digital_literacy_score",
+    "family_medical_history",
+    "policy_duration_preference",
+    "investment_goal",
+    "interested_policy"
+]
 
-def generate_user():
-    age = random.randint(18, 70)
-    income = random.choices(
-        population=[
-            random.randint(200000, 400000),
-            random.randint(400000, 1000000),
-            random.randint(1000000, 3000000)
-        ],
-        weights=[0.3, 0.5, 0.2],
-        k=1
-    )[0]
-
-    gender = random.choice(["Male", "Female"])
-    marital_status = random.choice(["Single", "Married", "Divorced"])
-    has_dependents = random.choice(["Yes", "No"])
-    occupation = random.choice(["Engineer", "Teacher", "Doctor", "Driver", "Freelancer", "Retired"])
-    health_issues = random.choices(["None", "Mild", "Chronic"], weights=[0.5, 0.3, 0.2])[0]
-    vehicle_owner = random.choice(["Yes", "No"])
-    existing_policies = random.randint(0, 3)
+# (low, high) inclusive income bands and their weights
+INCOME_BANDS = [(200000, 400000), (400000, 1000000), (1000000, 3000000)]
+INCOME_WEIGHTS = [0.3, 0.5, 0.2]
+
+
+def _uuid4s(rng, n):
+    """Random version 4 UUID strings drawn from ``rng``"""
+    raw = rng.integers(0, 256, size=(n, 16), dtype=np.uint8)
+    raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40
+    raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80
+    return [str(uuid.UUID(bytes=row.tobytes())) for row in raw]
+
+
+def generate_users(n, seed):
+    """
+    Generate ``n`` users with vectorized draws
+
+    Args:
+        n: Number of rows
+        seed: Seed or SeedSequence for this chunk's random stream
+
+    Returns:
+        pd.DataFrame with the dataset's columns
+    """
+    rng = np.random.default_rng(seed)
+
+    age = rng.integers(18, 71, n)
+    band = rng.choice(len(INCOME_BANDS), n, p=INCOME_WEIGHTS)
+    low = np.array([b[0] for b in INCOME_BANDS])[band]
+    high = np.array([b[1] for b in INCOME_BANDS])[band]
+    income = rng.integers(low, high + 1)
+
+    gender = rng.choice(["Male", "Female"], n)
+    marital_status = rng.choice(["Single", "Married", "Divorced"], n)
+    has_dependents = rng.choice(["Yes", "No"], n)
+    occupation = rng.choice(["Engineer", "Teacher", "Doctor", "Driver", "Freelancer", "Retired"], n)
+    health_issues = rng.choice(["None", "Mild", "Chronic"], n, p=[0.5, 0.3, 0.2])
+    vehicle_owner = rng.choice(["Yes", "No"], n)
+    existing_policies = rng.integers(0, 4, n)
 
     # New features
-    city_type = random.choice(["Urban", "Rural"])
-    education_level = random.choice(["High School", "Graduate", "Postgraduate", "PhD"])
-    digital_literacy_score = random.randint(1, 10)
-    family_medical_history = random.choices(
-        ["None", "Diabetes", "Heart Disease", "Cancer"],
-        weights=[0.4, 0.2, 0.25, 0.15]
-    )[0]
-    policy_duration_preference = random.choice(["Short-Term", "Long-Term", "Lifetime"])
-    investment_goal = random.choice(["None", "Child Education", "Retirement", "Wealth Creation"])
+    city_type = rng.choice(["Urban", "Rural"], n)
+    education_level = rng.choice(["High School", "Graduate", "Postgraduate", "PhD"], n)
+    digital_literacy_score = rng.integers(1, 11, n)
+    family_medical_history = rng.choice(
+        ["None", "Diabetes", "Heart Disease", "Cancer"], n, p=[0.4, 0.2, 0.25, 0.15]
+    )
+    policy_duration_preference = rng.choice(["Short-Term", "Long-Term", "Lifetime"], n)
+    investment_goal = rng.choice(["None", "Child Education", "Retirement", "Wealth Creation"], n)
 
     # Premium: calculated as 2% to 10% of annual income
-    premium = round(income * random.uniform(0.02, 0.1), 2)
+    premium = np.round(income * rng.uniform(0.02, 0.1, n), 2)
 
     # Target: Interested Policy Type
-    if age < 30 and vehicle_owner == "Yes":
-        interested_policy = "auto"
-    elif age > 50 and health_issues != "None":
-        interested_policy = "health"
-    elif has_dependents == "Yes":
-        interested_policy = random.choice(["term", "life"])
-    else:
-        interested_policy = random.choice(["life", "health", "auto", "term"])
-
-    return {
-        "user_id": fake.uuid4(),
+    interested_policy = np.select(
+        [
+            (age < 30) & (vehicle_owner == "Yes"),
+            (age > 50) & (health_issues != "None"),
+            has_dependents == "Yes"
+        ],
+        [
+            "auto",
+            "health",
+            rng.choice(["term", "life"], n)
+        ],
+        default=rng.choice(["life", "health", "auto", "term"], n)
+    )
+
+    return pd.DataFrame({
+        "user_id": _uuid4s(rng, n),
         "age": age,
         "gender": gender,
         "annual_income_inr": income,
@@ -67,10 +115,66 @@ def generate_user():
         "policy_duration_preference": policy_duration_preference,
         "investment_goal": investment_goal,
         "interested_policy": interested_policy
-    }
+    }, columns=COLUMNS)
+
+
+def _generated_chunks(rows, chunk_size, seed, workers):
+    """Yield chunks in order while at most ``2 * workers`` are in flight"""
+    sizes = [min(chunk_size, rows - start) for start in range(0, rows, chunk_size)]
+    streams = np.random.SeedSequence(seed).spawn(len(sizes))
+
+    if workers <= 1:
+        for size, stream in zip(sizes, streams):
+            yield generate_users(size, stream)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for size, stream in zip(sizes, streams):
+            pending.append(pool.submit(generate_users, size, stream))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def write_dataset(output, rows, chunk_size, seed, workers, fmt):
+    """Generate the dataset chunk by chunk and stream it to ``output``"""
+    written = 0
+    writer = None
+    try:
+        for i, chunk in enumerate(_generated_chunks(rows, chunk_size, seed, workers)):
+            if fmt == "csv":
+                chunk.to_csv(output, index=False, mode="w" if i == 0 else "a", header=i == 0)
+            else:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(output, table.schema)
+                writer.write_table(table)
+            written += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate the synthetic INR insurance recommendation dataset")
+    parser.add_argument("--rows", type=int, default=1000, help="number of users to generate")
+    parser.add_argument("--seed", type=int, default=None, help="seed for reproducible output")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="generator processes")
+    parser.add_argument("--chunk-size", type=int, default=100000, help="rows generated and written per chunk")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv", help="output file format")
+    parser.add_argument("--output", default=None, help="output path")
+    args = parser.parse_args()
+
+    output = args.output or f"insurance_recommendation_dataset_inr.{args.format}"
+    written = write_dataset(output, args.rows, args.chunk_size, args.seed, args.workers, args.format)
+    print(f"Dataset saved as {output} ({written} rows)")
+
 
-# Generate dataset
-data = [generate_user() for _ in range(1000)]
-df = pd.DataFrame(data)
-df.to_csv("insurance_recommendation_dataset_inr.csv", index=False)
-print("Dataset saved as insurance_recommendation_dataset_inr.csv")
+if __name__ == "__main__":
+    main()
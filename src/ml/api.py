@@ -1,10 +1,22 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel, ConfigDict
-from typing import List, Dict, Optional
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
+from pydantic import BaseModel, ConfigDict, ValidationError
+from typing import List, Dict, Literal, Optional, Union
+from concurrent.futures import ThreadPoolExecutor
 from integration import InsuranceMLIntegration
+from training_jobs import TrainingJobManager, TrainingJobConflictError
+from executors import BoundedExecutor, ExecutorBusyError
+from batching import RecommendationBatcher
+from streaming import NDJSONStreamingResponse, MalformedItem, iter_ndjson, iter_json_array, iter_batches
+from metrics import RequestMetricsMiddleware, counter, gauge
+from profiling import Profiler, ProfilerBusyError, collapsed
+import asyncio
+import hmac
+import json
 import logging
 import uvicorn
 import os
+import time
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -18,7 +30,111 @@ app = FastAPI(
 )
 
 # Initialize ML integration
-ml_integration = InsuranceMLIntegration(model_path='models/insurance_recommender.joblib')
+MODEL_DIR = os.getenv('ML_MODEL_DIR', 'models')
+ml_integration = InsuranceMLIntegration(
+    model_dir=MODEL_DIR,
+    cache_size=int(os.getenv('ML_CACHE_SIZE', '1024')),
+    cache_ttl=float(os.getenv('ML_CACHE_TTL_SECONDS', '300')),
+    profile_store_path=os.getenv('ML_PROFILE_STORE_PATH', 'profiles.db'),
+    engine=os.getenv('ML_MODEL_ENGINE', 'random_forest'),
+    # Workers map the saved model arrays read-only and share their pages
+    mmap_models=os.getenv('ML_MODEL_MMAP', '1') != '0',
+    keep_versions=int(os.getenv('ML_MODEL_KEEP_VERSIONS', '5'))
+)
+
+# Blocking sklearn/pandas work runs in bounded pools so it never stalls the
+# event loop. Requests beyond the queue limits are rejected with a 503.
+INFERENCE_WORKERS = int(os.getenv('ML_INFERENCE_WORKERS', '4'))
+INFERENCE_QUEUE_LIMIT = int(os.getenv('ML_INFERENCE_QUEUE_LIMIT', '64'))
+
+inference_executor = BoundedExecutor(
+    ThreadPoolExecutor(max_workers=INFERENCE_WORKERS, thread_name_prefix='inference'),
+    max_pending=INFERENCE_QUEUE_LIMIT,
+    name='inference pool'
+)
+
+def _activate_trained_model(version):
+    if not ml_integration.activate_version(version):
+        return False
+    ml_integration.registry.prune(ml_integration.keep_versions)
+    return True
+
+# Training runs as a background job in its own process, one job at a time
+# across all workers (a lock file in MODEL_DIR), at a lower scheduling
+# priority (ML_TRAINING_NICE) than the serving process
+training_jobs = TrainingJobManager(
+    model_dir=MODEL_DIR,
+    profile_store_path=ml_integration.profile_store_path,
+    engine=ml_integration.engine,
+    activate=_activate_trained_model,
+    niceness=int(os.getenv('ML_TRAINING_NICE', '10'))
+)
+
+# Concurrent /recommend calls are coalesced into one predict_proba call of
+# up to ML_BATCH_MAX_SIZE rows, waiting at most ML_BATCH_MAX_WAIT_MS.
+BATCH_MAX_SIZE = int(os.getenv('ML_BATCH_MAX_SIZE', '32'))
+BATCH_MAX_WAIT_MS = float(os.getenv('ML_BATCH_MAX_WAIT_MS', '5'))
+
+async def _score_batch(user_profiles):
+    return await inference_executor.run(ml_integration.get_batch_recommendations, user_profiles)
+
+recommendation_batcher = RecommendationBatcher(
+    _score_batch,
+    max_batch_size=BATCH_MAX_SIZE,
+    max_wait_ms=BATCH_MAX_WAIT_MS
+)
+
+# Bulk requests to /recommend/batch are scored ML_BULK_CHUNK_SIZE rows at a time
+BULK_CHUNK_SIZE = int(os.getenv('ML_BULK_CHUNK_SIZE', '500'))
+
+# Prometheus metrics served on /metrics. Inference stages are timed inside
+# InsuranceMLIntegration/InsuranceRecommender; HTTP requests by the middleware.
+metrics_registry = ml_integration.metrics
+app.add_middleware(RequestMetricsMiddleware, registry=metrics_registry)
+recommend_handler_seconds = metrics_registry.histogram(
+    'ml_recommend_handler_seconds',
+    'Time /recommend spends in its handler (batch wait plus scoring); the rest of '
+    'its ml_http_request_duration_seconds is request validation and response serialization'
+)
+
+def _collect_service_metrics():
+    """Scrape-time metrics of the worker pool, request batcher and training jobs"""
+    batching = recommendation_batcher.metrics()
+    families = [
+        gauge('ml_inference_pool_pending', 'Tasks running or queued in the inference pool', inference_executor.pending)
+    ]
+    for key, documentation in [
+        ('requests', 'Profiles submitted to the request batcher'),
+        ('batches', 'Batches flushed by the request batcher'),
+        ('rows', 'Profiles flushed by the request batcher'),
+        ('size_flushes', 'Batches flushed because they were full'),
+        ('timeout_flushes', 'Batches flushed because their wait time ran out'),
+        ('errors', 'Batches whose scoring failed')
+    ]:
+        families.append(counter(f'ml_batcher_{key}_total', documentation, batching[key]))
+    families.append(gauge('ml_batcher_queued', 'Profiles waiting for the next batch', batching['queued']))
+    active_jobs = sum(job['status'] == 'running' for job in training_jobs.list())
+    families.append(gauge('ml_training_jobs_running', 'Training jobs currently running', active_jobs))
+    return families
+
+metrics_registry.add_collector(_collect_service_metrics)
+
+# Admin endpoints (/admin/...) require an X-Admin-Token header matching
+# ML_ADMIN_TOKEN and are disabled while it is unset. Profiles are capped at
+# ML_PROFILE_MAX_SECONDS (allocation traces at ML_PROFILE_MAX_ALLOCATION_SECONDS)
+# and captured one at a time.
+ADMIN_TOKEN = os.getenv('ML_ADMIN_TOKEN', '')
+profiler = Profiler(
+    max_seconds=float(os.getenv('ML_PROFILE_MAX_SECONDS', '60')),
+    max_allocation_seconds=float(os.getenv('ML_PROFILE_MAX_ALLOCATION_SECONDS', '10'))
+)
+
+def _require_admin(request: Request):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Admin endpoints are disabled; set ML_ADMIN_TOKEN")
+    token = request.headers.get('x-admin-token', '')
+    if not hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
 
 # Pydantic models for request/response validation
 class UserProfile(BaseModel):
@@ -47,6 +163,10 @@ class UserProfile(BaseModel):
     property_ownership: str
     vehicle_ownership: str
 
+class LabelledUserProfile(UserProfile):
+    # Policy the user actually chose; labelled profiles are trained on
+    recommended_policy: Optional[str] = None
+
 class RecommendationResponse(BaseModel):
     model_config = ConfigDict(protected_namespaces=())
     
@@ -58,91 +178,291 @@ class RecommendationResponse(BaseModel):
 class ModelMetricsResponse(BaseModel):
     model_config = ConfigDict(protected_namespaces=())
     
-    feature_importance: List[Dict[str, float]]
+    feature_importance: List[Dict[str, Union[str, float]]]
     model_type: str
+    engine: Optional[str] = None
+    n_features: int
+    model_version: Optional[str] = None
+    cache: Dict[str, float] = {}
+
+class TrainingJobResponse(BaseModel):
+    model_config = ConfigDict(protected_namespaces=())
+    
+    job_id: str
+    status: str
+    mode: str
+    stage: Optional[str] = None
+    stages: Dict[str, float] = {}
+    progress: float
+    created_at: float
+    finished_at: Optional[float] = None
+    elapsed_seconds: float
+    model_version: Optional[str] = None
+    error: Optional[str] = None
+
+class ModelVersionResponse(BaseModel):
+    model_config = ConfigDict(protected_namespaces=())
+    
+    version: str
+    created_at: float
+    engine: str
     n_features: int
+    training_rows: Optional[int] = None
+    active: bool
 
-class TrainingResponse(BaseModel):
+class ModelActivationResponse(BaseModel):
     model_config = ConfigDict(protected_namespaces=())
     
     status: str
-    message: str
-    model_initialized: bool
+    model_version: Optional[str] = None
+
+class SelfTestResponse(BaseModel):
+    model_config = ConfigDict(protected_namespaces=())
+    
+    passed: bool
+    model_version: Optional[str] = None
+    checked_at: float
+    duration_ms: float
+    error: Optional[str] = None
+
+# Startup does not wait for the model: it is loaded in the background while
+# the server starts accepting connections. /health and /health/live answer
+# at once, /health/ready only once the model is serving. Requests arriving
+# earlier wait for the load instead of failing.
+startup_state = {
+    'started_at': time.time(),
+    'model_loading': False,
+    'model_error': None
+}
+
+def _load_model():
+    if ml_integration.initialize_model():
+        startup_state['model_error'] = None
+        logger.info(f"ML model initialized in {ml_integration.model_load_seconds:.2f}s")
+    else:
+        startup_state['model_error'] = "Failed to initialize ML model"
+        logger.error("Failed to initialize ML model")
+    startup_state['model_loading'] = False
+
+# Probes never score anything. The deep self-test (a full uncached
+# prediction) runs on demand via /health/deep?refresh=true (admin only) and, if
+# ML_SELF_TEST_INTERVAL_SECONDS is set, on that schedule; its last result is
+# cached and a failure makes /health/ready report the pod as not ready.
+SELF_TEST_INTERVAL = float(os.getenv('ML_SELF_TEST_INTERVAL_SECONDS', '0'))
+
+self_test_state = {'result': None, 'task': None}
+self_test_lock = asyncio.Lock()
+
+async def _run_self_test():
+    # A caller arriving during a run takes that run's result instead of
+    # queueing another one
+    in_progress = self_test_lock.locked()
+    async with self_test_lock:
+        if in_progress and self_test_state['result'] is not None:
+            return self_test_state['result']
+        result = await inference_executor.run(ml_integration.self_test)
+        self_test_state['result'] = result
+        return result
+
+async def _self_test_loop():
+    while True:
+        await asyncio.sleep(SELF_TEST_INTERVAL)
+        if ml_integration.recommender is None:
+            continue
+        try:
+            await _run_self_test()
+        except ExecutorBusyError:
+            logger.warning("Skipped scheduled self-test: inference pool is busy")
+
+# Every worker follows the registry's CURRENT file, so a version trained,
+# activated or rolled back through another worker is served here too
+MODEL_POLL_INTERVAL = float(os.getenv('ML_MODEL_POLL_INTERVAL_SECONDS', '5'))
+
+model_sync_state = {'task': None}
+
+async def _model_sync_loop():
+    while True:
+        await asyncio.sleep(MODEL_POLL_INTERVAL)
+        if startup_state['model_loading']:
+            continue
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, ml_integration.sync_with_registry)
+        except Exception as e:
+            logger.error(f"Error following the model registry: {str(e)}")
 
 @app.on_event("startup")
 async def startup_event():
-    """Initialize the ML model on startup"""
-    if not ml_integration.initialize_model():
-        logger.error("Failed to initialize ML model")
-        raise RuntimeError("Failed to initialize ML model")
-    logger.info("ML model initialized successfully")
+    """Start loading the ML model in the background"""
+    startup_state['model_loading'] = True
+    asyncio.get_running_loop().run_in_executor(None, _load_model)
+    recommendation_batcher.start()
+    if SELF_TEST_INTERVAL > 0:
+        self_test_state['task'] = asyncio.get_running_loop().create_task(_self_test_loop())
+    if MODEL_POLL_INTERVAL > 0:
+        model_sync_state['task'] = asyncio.get_running_loop().create_task(_model_sync_loop())
 
-@app.post("/train", response_model=TrainingResponse)
-async def train_model():
-    """Train the model with current data"""
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release the worker pools"""
+    if self_test_state['task'] is not None:
+        self_test_state['task'].cancel()
+    if model_sync_state['task'] is not None:
+        model_sync_state['task'].cancel()
+    await recommendation_batcher.stop()
+    inference_executor.shutdown(wait=False)
+    training_jobs.shutdown()
+
+@app.post("/train", response_model=TrainingJobResponse, status_code=202)
+async def train_model(mode: Literal['full', 'incremental'] = 'full'):
+    """
+    Start a background training job with current data
+    
+    ``mode=incremental`` only trains on profiles changed since the serving
+    model and falls back to a full retrain when the drift guard trips.
+    """
+    # Get the absolute path to the training data
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    data_path = os.path.join(current_dir, 'insurance_training_data.csv')
+    
+    logger.info(f"Looking for training data at: {data_path}")
+    
+    if not os.path.exists(data_path):
+        raise HTTPException(status_code=404, detail=f"Training data not found at {data_path}")
+    
+    # The previous model keeps serving until the new one is warmed up
     try:
-        # Get the absolute path to the training data
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        data_path = os.path.join(current_dir, 'insurance_training_data.csv')
-        
-        logger.info(f"Looking for training data at: {data_path}")
-        
-        if not os.path.exists(data_path):
-            return {
-                "status": "error",
-                "message": f"Training data not found at {data_path}",
-                "model_initialized": False
-            }
-        
-        success = ml_integration.train_model(data_path)
-        if not success:
-            return {
-                "status": "error",
-                "message": "Failed to train model. Please check the training data.",
-                "model_initialized": False
-            }
-        
-        # Initialize the model after training
-        if ml_integration.initialize_model():
-            return {
-                "status": "success",
-                "message": "Model trained and initialized successfully",
-                "model_initialized": True
-            }
-        else:
-            return {
-                "status": "error",
-                "message": "Model trained but failed to initialize",
-                "model_initialized": False
-            }
-    except Exception as e:
-        logger.error(f"Error training model: {str(e)}")
-        return {
-            "status": "error",
-            "message": str(e),
-            "model_initialized": False
-        }
+        return training_jobs.start(data_path, mode=mode)
+    except TrainingJobConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@app.get("/train/jobs", response_model=List[TrainingJobResponse])
+async def list_training_jobs():
+    """List recent training jobs, newest first"""
+    return training_jobs.list()
+
+@app.get("/train/jobs/{job_id}", response_model=TrainingJobResponse)
+async def get_training_job(job_id: str):
+    """Get the status, stage timings and progress of a training job"""
+    job = training_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown training job {job_id}")
+    return job
+
+@app.post("/train/jobs/{job_id}/cancel", response_model=TrainingJobResponse)
+async def cancel_training_job(job_id: str):
+    """Cancel a running training job; the served model is left unchanged"""
+    job = training_jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown training job {job_id}")
+    return job
 
 @app.post("/recommend", response_model=List[RecommendationResponse])
 async def get_recommendations(user_profile: UserProfile):
     """Get insurance policy recommendations for a user"""
     try:
-        recommendations = ml_integration.get_recommendations(user_profile.dict())
+        start = time.perf_counter()
+        recommendations = await recommendation_batcher.submit(user_profile.dict())
+        recommend_handler_seconds.observe(time.perf_counter() - start)
         if not recommendations:
             raise HTTPException(status_code=500, detail="Failed to generate recommendations")
         return recommendations
+    except ExecutorBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         logger.error(f"Error generating recommendations: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/recommend/batch")
+async def get_bulk_recommendations(request: Request):
+    """
+    Get recommendations for a JSON array or NDJSON stream of user profiles
+
+    Results are streamed back as NDJSON, one line per input profile, while
+    later chunks are still being read and scored. An NDJSON line that is not
+    valid JSON gets an error line of its own; a malformed array element ends
+    the stream with an error line after the results of the elements before it.
+    """
+    content_type = request.headers.get('content-type', '')
+    if 'ndjson' in content_type or 'jsonlines' in content_type:
+        profiles = iter_ndjson(request.stream())
+    else:
+        profiles = iter_json_array(request.stream())
+    return NDJSONStreamingResponse(_stream_bulk_recommendations(profiles))
+
+async def _score_chunk(user_profiles):
+    # Bulk callers would rather wait than be rejected mid-stream
+    while True:
+        try:
+            return await inference_executor.run(ml_integration.get_batch_recommendations, user_profiles)
+        except ExecutorBusyError:
+            await asyncio.sleep(0.05)
+
+async def _stream_bulk_recommendations(profiles):
+    pending = None
+    index = 0
+    try:
+        async for chunk in iter_batches(profiles, BULK_CHUNK_SIZE):
+            rows = []
+            valid_profiles = []
+            for item in chunk:
+                if isinstance(item, MalformedItem):
+                    rows.append((index, item.error))
+                    index += 1
+                    continue
+                try:
+                    valid_profiles.append(UserProfile(**item).dict())
+                    rows.append((index, None))
+                except (ValidationError, TypeError) as e:
+                    rows.append((index, str(e)))
+                index += 1
+
+            # Score this chunk while the previous one is written out
+            task = asyncio.create_task(_score_chunk(valid_profiles))
+            if pending is not None:
+                yield await _format_chunk(*pending)
+            pending = (task, rows)
+    except ValueError as e:
+        logger.error(f"Error reading bulk request: {str(e)}")
+        if pending is not None:
+            yield await _format_chunk(*pending)
+            pending = None
+        yield json.dumps({"error": str(e)}) + "\n"
+    if pending is not None:
+        yield await _format_chunk(*pending)
+
+async def _format_chunk(task, rows):
+    results = iter(await task)
+    lines = []
+    for index, error in rows:
+        if error is None:
+            recommendations = next(results)
+            if recommendations:
+                lines.append(json.dumps({"index": index, "recommendations": recommendations}))
+                continue
+            error = "Failed to generate recommendations"
+        lines.append(json.dumps({"index": index, "error": error}))
+    return "\n".join(lines) + "\n"
+
 @app.put("/profiles/{user_id}")
-async def update_user_profile(user_id: str, user_profile: UserProfile):
-    """Update a user's profile in the training data"""
+async def update_user_profile(user_id: str, user_profile: LabelledUserProfile):
+    """
+    Insert or update a user's profile in the profile store
+
+    A profile sent with a ``recommended_policy`` label is used as training
+    data by the next training job; the label must be one of the policy types
+    the serving model recommends.
+    """
     try:
-        success = ml_integration.update_user_profile(user_id, user_profile.dict())
+        success = await inference_executor.run(
+            ml_integration.update_user_profile, user_id, user_profile.dict()
+        )
         if not success:
             raise HTTPException(status_code=500, detail="Failed to update user profile")
         return {"status": "success", "message": f"Profile updated for user {user_id}"}
+    except ExecutorBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         logger.error(f"Error updating user profile: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -151,55 +471,171 @@ async def update_user_profile(user_id: str, user_profile: UserProfile):
 async def get_model_metrics():
     """Get model performance metrics"""
     try:
-        metrics = ml_integration.get_model_metrics()
+        metrics = await inference_executor.run(ml_integration.get_model_metrics)
         if not metrics:
             raise HTTPException(status_code=500, detail="Failed to get model metrics")
         return metrics
+    except ExecutorBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         logger.error(f"Error getting model metrics: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/models", response_model=List[ModelVersionResponse])
+async def list_model_versions():
+    """List published model versions, oldest first"""
+    try:
+        return await inference_executor.run(ml_integration.list_model_versions)
+    except ExecutorBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+@app.post("/models/rollback", response_model=ModelActivationResponse)
+async def rollback_model():
+    """Serve the model version published before the current one"""
+    try:
+        if not await inference_executor.run(ml_integration.rollback):
+            raise HTTPException(status_code=409, detail="No earlier model version could be activated")
+        return {"status": "success", "model_version": ml_integration.model_version}
+    except ExecutorBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+@app.post("/models/{version}/activate", response_model=ModelActivationResponse)
+async def activate_model(version: str):
+    """Serve a specific published model version"""
+    try:
+        if not await inference_executor.run(ml_integration.activate_version, version):
+            raise HTTPException(status_code=404, detail=f"Model version {version} could not be activated")
+        return {"status": "success", "model_version": ml_integration.model_version}
+    except ExecutorBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Service metrics in the Prometheus text exposition format"""
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/admin/profile", response_class=PlainTextResponse)
+async def capture_profile(
+    request: Request,
+    seconds: float = 10,
+    mode: Literal['cpu', 'allocations'] = 'cpu',
+    interval_ms: float = 10,
+    include_idle: bool = False,
+    focus: Optional[str] = None,
+    frames: int = 10
+):
+    """
+    Profile the running process for ``seconds`` and return collapsed stacks
+
+    ``mode=cpu`` samples the stacks of the event loop and all worker
+    threads every ``interval_ms``; weights are sample counts. Threads that
+    are only waiting are left out unless ``include_idle`` is set.
+    ``mode=allocations`` traces allocations with tracemalloc; weights are
+    bytes still held at the end of the window, optionally restricted to
+    tracebacks through the ``focus`` file (e.g. ``feature_pipeline.py``)
+    and keeping ``frames`` frames per traceback.
+
+    Cost: CPU sampling takes one stack walk per thread per interval (the
+    share is returned in X-Profile-Overhead-Ratio) and leaves throughput
+    unchanged. Allocation tracing traces every allocation in the process;
+    with the default 10 frames, /recommend throughput drops about 5x while
+    it runs, so it is capped at ML_PROFILE_MAX_ALLOCATION_SECONDS (default
+    10) rather than ML_PROFILE_MAX_SECONDS (default 60).
+
+    Only one profile runs at a time; a request made while one is being
+    captured gets a 409. A duration over the cap gets a 422.
+
+    The output can be fed to flamegraph.pl or opened in speedscope.
+    """
+    _require_admin(request)
+    loop = asyncio.get_running_loop()
+    try:
+        if mode == 'cpu':
+            profile = await loop.run_in_executor(
+                None, profiler.sample_stacks, seconds, interval_ms / 1000, include_idle
+            )
+            headers = {
+                'X-Profile-Samples': str(profile['samples']),
+                'X-Profile-Overhead-Ratio': f"{profile['overhead_ratio']:.4f}"
+            }
+        else:
+            profile = await loop.run_in_executor(None, profiler.trace_allocations, seconds, frames, focus)
+            headers = {
+                'X-Profile-Traced-Bytes': str(profile['traced_bytes']),
+                'X-Profile-Peak-Bytes': str(profile['peak_bytes'])
+            }
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    headers['X-Profile-Seconds'] = f"{profile['duration_seconds']:.3f}"
+    return PlainTextResponse(collapsed(profile['stacks']), headers=headers)
+
+@app.get("/batcher/metrics")
+async def get_batcher_metrics():
+    """Get request batching metrics"""
+    return recommendation_batcher.metrics()
+
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
-    try:
-        # Test model with sample data
-        sample_profile = {
-            "age": 35,
-            "income": 75000,
-            "occupation": "professional",
-            "family_size": 2,
-            "marital_status": "married",
-            "education_level": "bachelors",
-            "risk_tolerance": 0.7,
-            "health_status": "good",
-            "existing_conditions": 1,
-            "lifestyle": "active",
-            "family_medical_history": "none",
-            "smoking_status": "never",
-            "bmi": 24.5,
-            "savings_rate": 0.15,
-            "debt": 25000,
-            "investment_experience": 0.6,
-            "coverage_preference": "comprehensive",
-            "policy_duration_preference": "long_term",
-            "premium_budget": 5000,
-            "location_type": "urban",
-            "property_ownership": "owned",
-            "vehicle_ownership": "single"
-        }
-        recommendations = ml_integration.get_recommendations(sample_profile)
-        return {
-            "status": "healthy",
-            "model_loaded": bool(ml_integration.recommender),
-            "test_prediction_successful": bool(recommendations)
-        }
-    except Exception as e:
-        logger.error(f"Health check failed: {str(e)}")
-        return {
-            "status": "unhealthy",
-            "error": str(e)
-        }
+    """Cheap health check: the process is up; does not run the model"""
+    return {"status": "healthy", "model_loaded": ml_integration.recommender is not None}
+
+@app.get("/health/live")
+async def liveness():
+    """Liveness probe: the process is up and its event loop responds"""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def readiness():
+    """Readiness probe: a model is loaded and its last self-test, if any, passed"""
+    if ml_integration.recommender is None:
+        status = "loading" if startup_state['model_loading'] else "unavailable"
+        return JSONResponse(
+            status_code=503,
+            content={"status": status, "error": startup_state['model_error']}
+        )
+    now = time.time()
+    last_inference_at = ml_integration.last_inference_at
+    self_test = self_test_state['result']
+    # A failed self-test of an older version says nothing about this one
+    if self_test is not None and self_test['model_version'] != ml_integration.model_version:
+        self_test = None
+    content = {
+        "status": "ready" if self_test is None or self_test['passed'] else "failing",
+        "model_version": ml_integration.model_version,
+        "model_loaded_at": ml_integration.model_loaded_at,
+        "model_load_seconds": ml_integration.model_load_seconds,
+        "last_inference_at": last_inference_at,
+        "seconds_since_last_inference": None if last_inference_at is None else now - last_inference_at,
+        "self_test": self_test,
+        "uptime_seconds": now - startup_state['started_at']
+    }
+    if content["status"] != "ready":
+        return JSONResponse(status_code=503, content=content)
+    return content
+
+@app.get("/health/deep", response_model=SelfTestResponse)
+async def deep_health_check(request: Request, refresh: bool = False):
+    """
+    Result of the last model self-test
+
+    The self-test runs a full uncached prediction; it only runs here when
+    no result is cached yet, or on ``refresh``. Forcing a run takes an
+    inference slot, so ``refresh`` needs the X-Admin-Token header like the
+    other admin endpoints; reading the cached result does not.
+    """
+    if refresh:
+        _require_admin(request)
+    result = self_test_state['result']
+    if refresh or result is None:
+        try:
+            result = await _run_self_test()
+        except ExecutorBusyError as e:
+            raise HTTPException(status_code=503, detail=str(e))
+    if not result['passed']:
+        return JSONResponse(status_code=503, content=result)
+    return result
 
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
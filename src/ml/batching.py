@@ -0,0 +1,146 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+
+class RecommendationBatcher:
+    """
+    Coalesce concurrent single-profile requests into one scoring call
+
+    Requests are queued and flushed as a batch once ``max_batch_size``
+    profiles are waiting or ``max_wait_ms`` has passed since the first one
+    arrived. Each batch is scored with a single ``score_batch`` call and
+    every caller receives its own row of the result.
+    """
+
+    def __init__(
+        self,
+        score_batch: Callable[[List[Dict]], Awaitable[List[List[Dict]]]],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0
+    ):
+        """
+        Args:
+            score_batch: Coroutine function scoring a list of profiles and
+                returning one recommendation list per profile
+            max_batch_size: Maximum number of profiles per batch
+            max_wait_ms: Maximum time a request waits for others to join its batch
+        """
+        self.score_batch = score_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.logger = logging.getLogger(__name__)
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._dispatches = set()
+        self._stats = {
+            'requests': 0,
+            'batches': 0,
+            'rows': 0,
+            'max_batch_size_seen': 0,
+            'size_flushes': 0,
+            'timeout_flushes': 0,
+            'errors': 0,
+            'queue_wait_seconds': 0.0
+        }
+
+    def start(self):
+        """Start the background collector on the running event loop"""
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.get_running_loop().create_task(self._collect())
+
+    async def stop(self):
+        """Stop collecting and fail any requests still waiting"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        while self._queue is not None and not self._queue.empty():
+            _, future, _ = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Batcher stopped"))
+
+    async def submit(self, user_profile: Dict) -> List[Dict]:
+        """
+        Queue a profile for the next batch and wait for its recommendations
+
+        Args:
+            user_profile: Dictionary containing user profile data
+
+        Returns:
+            List of recommended policies for this profile
+        """
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        self._stats['requests'] += 1
+        self._queue.put_nowait((user_profile, future, time.perf_counter()))
+        return await future
+
+    def metrics(self) -> Dict:
+        """Batching counters and derived averages"""
+        stats = dict(self._stats)
+        batches = stats['batches']
+        stats['avg_batch_size'] = stats['rows'] / batches if batches else 0.0
+        stats['avg_queue_wait_ms'] = (
+            stats.pop('queue_wait_seconds') * 1000 / stats['rows'] if stats['rows'] else 0.0
+        )
+        stats['queued'] = self._queue.qsize() if self._queue is not None else 0
+        stats['batches_in_flight'] = len(self._dispatches)
+        stats['max_batch_size'] = self.max_batch_size
+        stats['max_wait_ms'] = self.max_wait * 1000
+        return stats
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+
+            while len(batch) < self.max_batch_size:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            if len(batch) >= self.max_batch_size:
+                self._stats['size_flushes'] += 1
+            else:
+                self._stats['timeout_flushes'] += 1
+
+            # Score batches concurrently; the pool bounds the real parallelism
+            dispatch = loop.create_task(self._dispatch(batch))
+            self._dispatches.add(dispatch)
+            dispatch.add_done_callback(self._dispatches.discard)
+
+    async def _dispatch(self, batch):
+        now = time.perf_counter()
+        self._stats['batches'] += 1
+        self._stats['rows'] += len(batch)
+        self._stats['max_batch_size_seen'] = max(self._stats['max_batch_size_seen'], len(batch))
+        self._stats['queue_wait_seconds'] += sum(now - queued_at for _, _, queued_at in batch)
+
+        try:
+            results = await self.score_batch([profile for profile, _, _ in batch])
+        except Exception as e:
+            self._stats['errors'] += 1
+            self.logger.error(f"Error scoring batch of {len(batch)}: {str(e)}")
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future, _), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
@@ -0,0 +1 @@
+"""Offline benchmarks for the recommendation service. Run from src/ml with ``python -m benchmarks.<name>``."""
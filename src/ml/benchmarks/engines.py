@@ -0,0 +1,90 @@
+"""
+Compare model engines on the training data
+
+Reports training time, single-row latency, batch throughput, serialized
+model size and hold-out accuracy for each engine.
+
+Usage (from src/ml):
+    python -m benchmarks.engines [--data insurance_training_data.csv] [--output engines.json]
+"""
+import argparse
+import io
+import json
+import time
+
+import joblib
+import numpy as np
+from sklearn.metrics import accuracy_score, f1_score
+from sklearn.model_selection import train_test_split
+
+from insurance_recommender import InsuranceRecommender, ENGINES
+from training_data import read_training_data, training_columns, LABEL_COLUMN
+
+
+def benchmark_engine(engine, X_train, X_test, y_train, y_test, latency_rows=200):
+    recommender = InsuranceRecommender(engine=engine)
+
+    start = time.perf_counter()
+    recommender.train(X_train, y_train)
+    train_seconds = time.perf_counter() - start
+
+    buffer = io.BytesIO()
+    joblib.dump(recommender.model, buffer)
+
+    # Single-row latency through the full predict path
+    latencies = []
+    for i in range(min(latency_rows, len(X_test))):
+        row = X_test.iloc[[i]]
+        start = time.perf_counter()
+        recommender.predict_batch(row)
+        latencies.append(time.perf_counter() - start)
+    latencies_ms = np.array(latencies) * 1000
+
+    start = time.perf_counter()
+    result = recommender.predict_batch(X_test)
+    batch_seconds = time.perf_counter() - start
+    y_pred = result['policy_type'][:, 0]
+
+    return {
+        'engine': engine,
+        'train_seconds': train_seconds,
+        'model_bytes': buffer.getbuffer().nbytes,
+        'latency_p50_ms': float(np.percentile(latencies_ms, 50)),
+        'latency_p99_ms': float(np.percentile(latencies_ms, 99)),
+        'throughput_rows_per_second': len(X_test) / batch_seconds,
+        'accuracy': accuracy_score(y_test, y_pred),
+        'f1_weighted': f1_score(y_test, y_pred, average='weighted'),
+        'n_features': len(recommender.features)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data', default='insurance_training_data.csv')
+    parser.add_argument('--engines', nargs='+', default=list(ENGINES), choices=list(ENGINES))
+    parser.add_argument('--output', help='write results as JSON to this path')
+    args = parser.parse_args()
+
+    columns = training_columns(InsuranceRecommender().features)
+    df = read_training_data(args.data, columns=columns)
+    X = df.drop(columns=[LABEL_COLUMN])
+    y = df[LABEL_COLUMN].astype(str)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+
+    results = [benchmark_engine(engine, X_train, X_test, y_train, y_test) for engine in args.engines]
+
+    print(f"\n{'engine':<24}{'train s':>9}{'size KB':>10}{'p50 ms':>9}{'p99 ms':>9}{'rows/s':>11}{'accuracy':>10}")
+    for r in results:
+        print(
+            f"{r['engine']:<24}{r['train_seconds']:>9.2f}{r['model_bytes'] / 1024:>10.0f}"
+            f"{r['latency_p50_ms']:>9.2f}{r['latency_p99_ms']:>9.2f}"
+            f"{r['throughput_rows_per_second']:>11.0f}{r['accuracy']:>10.4f}"
+        )
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
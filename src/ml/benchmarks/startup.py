@@ -0,0 +1,165 @@
+"""
+Measure cold-start time of the ML API
+
+Reports:
+- import time of the api module from ``python -X importtime``, with the
+  slowest top-level packages and whether training-only modules were loaded
+- time from launching uvicorn until /health/live and /health/ready answer
+
+Results can be written as JSON and compared with an earlier run to track
+startup time across releases.
+
+Usage (from src/ml after training):
+    python -m benchmarks.startup [--runs 3] [--output startup.json] [--compare previous.json]
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+ML_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Packages only training should need (the serving path unpickles models after
+# startup); importing any of them with the api module is a regression
+TRAINING_ONLY_MODULES = ['sklearn', 'scipy']
+
+# Metrics compared across runs; all are "lower is better"
+TRACKED_METRICS = ['import_seconds', 'live_seconds', 'ready_seconds']
+
+
+def _environment():
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [ML_DIR, env.get('PYTHONPATH')]))
+    return env
+
+
+def profile_imports(top=10):
+    """Import the api module in a fresh interpreter under -X importtime"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import api'],
+        capture_output=True, text=True, env=_environment(), check=True
+    )
+    self_us, cumulative_us = {}, {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_time, cumulative, name = line[len('import time:'):].split('|')
+        name = name.strip()
+        self_us[name] = int(self_time)
+        cumulative_us[name] = int(cumulative)
+
+    packages = {}
+    for name, us in self_us.items():
+        package = name.split('.')[0]
+        packages[package] = packages.get(package, 0) + us
+    slowest = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+    return {
+        'import_seconds': cumulative_us['api'] / 1e6,
+        'modules_imported': len(self_us),
+        'slowest_packages': {package: us / 1e6 for package, us in slowest},
+        'training_modules_imported': [m for m in TRAINING_ONLY_MODULES if m in self_us]
+    }
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for(url, deadline):
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return
+        except (urllib.error.URLError, ConnectionError, OSError):
+            pass
+        time.sleep(0.01)
+    raise TimeoutError(f"{url} did not become available")
+
+
+def measure_server_start(timeout=120.0):
+    """Seconds from launching uvicorn until liveness and readiness succeed"""
+    port = _free_port()
+    start = time.monotonic()
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'api:app', '--port', str(port), '--log-level', 'warning'],
+        env=_environment(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        base = f'http://127.0.0.1:{port}'
+        _wait_for(f'{base}/health/live', start + timeout)
+        live_seconds = time.monotonic() - start
+        _wait_for(f'{base}/health/ready', start + timeout)
+        ready_seconds = time.monotonic() - start
+    finally:
+        server.terminate()
+        server.wait()
+    return {'live_seconds': live_seconds, 'ready_seconds': ready_seconds}
+
+
+def compare(current, previous, tolerance):
+    """Print the change of each tracked metric; True if any regressed beyond ``tolerance``"""
+    regressed = False
+    print(f"\n{'metric':<16}{'previous':>10}{'current':>10}{'change':>9}")
+    for metric in TRACKED_METRICS:
+        before, after = previous.get(metric), current.get(metric)
+        if before is None or after is None:
+            continue
+        change = (after - before) / before if before else 0.0
+        flag = ''
+        if change > tolerance:
+            flag = '  REGRESSED'
+            regressed = True
+        print(f"{metric:<16}{before:>10.3f}{after:>10.3f}{change:>+9.1%}{flag}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=3, help='cold starts measured; medians are reported')
+    parser.add_argument('--output', help='write results as JSON to this path')
+    parser.add_argument('--compare', help='JSON results of an earlier run to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.1, help='relative slowdown treated as a regression')
+    args = parser.parse_args()
+
+    imports = [profile_imports() for _ in range(args.runs)]
+    starts = [measure_server_start() for _ in range(args.runs)]
+    results = {
+        'python': sys.version.split()[0],
+        'runs': args.runs,
+        'import_seconds': statistics.median(run['import_seconds'] for run in imports),
+        'live_seconds': statistics.median(run['live_seconds'] for run in starts),
+        'ready_seconds': statistics.median(run['ready_seconds'] for run in starts),
+        'modules_imported': imports[-1]['modules_imported'],
+        'slowest_packages': imports[-1]['slowest_packages'],
+        'training_modules_imported': imports[-1]['training_modules_imported']
+    }
+
+    print(f"import api:        {results['import_seconds']:.3f}s ({results['modules_imported']} modules)")
+    print(f"/health/live:      {results['live_seconds']:.3f}s after launch")
+    print(f"/health/ready:     {results['ready_seconds']:.3f}s after launch")
+    print("slowest packages:  " + ", ".join(f"{p} {s:.3f}s" for p, s in results['slowest_packages'].items()))
+    if results['training_modules_imported']:
+        print(f"training-only modules imported at startup: {', '.join(results['training_modules_imported'])}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+        if compare(results, previous, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,326 @@
+"""
+Benchmark suite for the recommendation service
+
+For every dataset size, in a fresh process, the suite:
+- generates synthetic data with train_model.generate_sample_data
+- trains an InsuranceRecommender and records the wall time of each stage
+- saves the model, then reports the artifact size and load_model time
+- times preprocess_data on single rows and in bulk
+- times single-row and batched predict latency percentiles and rows/s
+- load-tests POST /recommend in-process through the ASGI app
+- records peak RSS after data generation, training and serving
+
+Everything runs offline. Results are written as JSON; --compare checks
+them against an earlier run and exits with status 1 if a tracked metric
+got worse by more than --tolerance.
+
+Needs requirements-dev.txt (httpx, for the load test). Usage (from src/ml):
+    python -m benchmarks.suite [--sizes 1000 100000 1000000] [--timeout 3600] [--output bench.json] [--compare previous.json]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+from queue import Empty
+
+import numpy as np
+
+ML_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_SIZES = [1_000, 100_000, 1_000_000]
+BATCH_SIZES = [32, 512]
+
+# Metrics compared across runs and whether a higher value is better
+TRACKED_METRICS = {
+    'train_seconds': False,
+    'artifact_bytes': False,
+    'load_seconds': False,
+    'preprocess_single_p50_ms': False,
+    'preprocess_rows_per_second': True,
+    'predict_single_p50_ms': False,
+    'predict_single_p99_ms': False,
+    **{f'predict_batch_{size}_p50_ms': False for size in BATCH_SIZES},
+    'predict_rows_per_second': True,
+    'recommend_p50_ms': False,
+    'recommend_p99_ms': False,
+    'recommend_requests_per_second': True,
+    'peak_rss_mb': False
+}
+
+
+def _peak_rss_mb():
+    # ru_maxrss is in kB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _percentiles(seconds, prefix):
+    ms = np.asarray(seconds) * 1000
+    return {f'{prefix}_p{p}_ms': float(np.percentile(ms, p)) for p in (50, 95, 99)}
+
+
+def _timed(fn, args_list):
+    timings = []
+    for args in args_list:
+        start = time.perf_counter()
+        fn(args)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def _directory_bytes(path):
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path)
+        for name in names
+    )
+
+
+async def _load_test(app, profiles, requests, concurrency):
+    """Latencies and status codes of ``requests`` POST /recommend calls"""
+    import httpx
+
+    latencies, statuses = [], []
+    next_request = iter(range(requests))
+
+    async def client_loop(client):
+        for i in next_request:
+            start = time.perf_counter()
+            response = await client.post('/recommend', json=profiles[i % len(profiles)])
+            latencies.append(time.perf_counter() - start)
+            statuses.append(response.status_code)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://benchmark') as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(client_loop(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return latencies, statuses, elapsed
+
+
+def _benchmark_api(work_dir, recommender, profiles, requests, concurrency):
+    from model_registry import ModelRegistry
+
+    registry = ModelRegistry(os.path.join(work_dir, 'registry'))
+    registry.activate(registry.publish(recommender))
+    # api reads its configuration at import; every size runs in its own process
+    os.environ.update({
+        'ML_MODEL_DIR': registry.root,
+        'ML_PROFILE_STORE_PATH': os.path.join(work_dir, 'profiles.db'),
+        # Every request should reach the model, not the prediction cache
+        'ML_CACHE_SIZE': '0'
+    })
+    import api
+
+    async def run():
+        await api.startup_event()
+        while api.startup_state['model_loading']:
+            await asyncio.sleep(0.01)
+        try:
+            return await _load_test(api.app, profiles, requests, concurrency)
+        finally:
+            await api.shutdown_event()
+
+    latencies, statuses, elapsed = asyncio.run(run())
+    return {
+        **_percentiles(latencies, 'recommend'),
+        'recommend_requests_per_second': len(latencies) / elapsed,
+        'recommend_errors': sum(status != 200 for status in statuses),
+        'recommend_concurrency': concurrency
+    }
+
+
+def benchmark_size(n_rows, latency_rows=200, batch_repeats=20, scoring_rows=10_000, requests=1000, concurrency=16):
+    """Run every benchmark on a dataset of ``n_rows`` rows"""
+    import pandas as pd
+
+    from insurance_recommender import InsuranceRecommender
+    from train_model import generate_sample_data
+    from training_data import apply_schema, training_columns, LABEL_COLUMN
+
+    result = {'rows': n_rows}
+    with tempfile.TemporaryDirectory(prefix='benchmark-') as work_dir, contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        df = generate_sample_data(n_rows, output_path=os.path.join(work_dir, 'data.csv'))
+        recommender = InsuranceRecommender()
+        df = apply_schema(df[training_columns(recommender.features)])
+        X, y = df.drop(columns=[LABEL_COLUMN]), df[LABEL_COLUMN].astype(str)
+        result['generate_seconds'] = time.perf_counter() - start
+        result['peak_rss_generate_mb'] = _peak_rss_mb()
+
+        start = time.perf_counter()
+        recommender.train(X, y)
+        result['train_seconds'] = time.perf_counter() - start
+        result['train_stage_seconds'] = dict(recommender.training_timings)
+        result['n_features'] = len(recommender.features)
+        result['peak_rss_train_mb'] = _peak_rss_mb()
+
+        model_dir = os.path.join(work_dir, 'model')
+        recommender.save_model(model_dir)
+        result['artifact_bytes'] = _directory_bytes(model_dir)
+        start = time.perf_counter()
+        recommender = InsuranceRecommender()
+        recommender.load_model(model_dir)
+        result['load_seconds'] = time.perf_counter() - start
+
+        sample = X.head(scoring_rows)
+        # JSON round trip gives the plain Python values a request body carries
+        profiles = json.loads(sample.to_json(orient='records'))
+        single = profiles[:latency_rows]
+
+        result.update(_percentiles(
+            _timed(lambda p: recommender.preprocess_data(pd.DataFrame([p])), single), 'preprocess_single'
+        ))
+        start = time.perf_counter()
+        recommender.preprocess_data(sample)
+        result['preprocess_rows_per_second'] = len(sample) / (time.perf_counter() - start)
+
+        result.update(_percentiles(_timed(recommender.predict, single), 'predict_single'))
+        for size in BATCH_SIZES:
+            batches = [profiles[i * size % len(profiles):][:size] for i in range(batch_repeats)]
+            result.update(_percentiles(_timed(recommender.predict_batch, batches), f'predict_batch_{size}'))
+        start = time.perf_counter()
+        for i in range(0, len(profiles), BATCH_SIZES[-1]):
+            recommender.predict_batch(profiles[i:i + BATCH_SIZES[-1]])
+        result['predict_rows_per_second'] = len(profiles) / (time.perf_counter() - start)
+
+        result.update(_benchmark_api(work_dir, recommender, profiles, requests, concurrency))
+        result['peak_rss_mb'] = _peak_rss_mb()
+    return result
+
+
+def _run_in_process(queue, n_rows, options):
+    sys.path.insert(0, ML_DIR)
+    try:
+        queue.put(benchmark_size(n_rows, **options))
+    except Exception as e:
+        queue.put({'rows': n_rows, 'error': f"{type(e).__name__}: {e}"})
+
+
+def _wait_for_result(process, queue, n_rows, timeout=None):
+    """The result ``process`` puts on ``queue``, or an error result if it dies or times out"""
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        try:
+            return queue.get(timeout=1.0)
+        except Empty:
+            pass
+        if not process.is_alive():
+            # The process may have exited right after putting its result
+            try:
+                return queue.get(timeout=1.0)
+            except Empty:
+                return {'rows': n_rows, 'error': f"Benchmark process exited with code {process.exitcode}"}
+        if deadline is not None and time.monotonic() > deadline:
+            process.terminate()
+            return {'rows': n_rows, 'error': f"Benchmark did not finish within {timeout:g}s"}
+
+
+def run_isolated(n_rows, timeout=None, **options):
+    """
+    benchmark_size in a fresh process, so peak RSS belongs to this size alone
+
+    A process that crashes (e.g. killed for running out of memory) or runs
+    past ``timeout`` seconds gives a result with an 'error' instead.
+    """
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=_run_in_process, args=(queue, n_rows, options))
+    process.start()
+    result = _wait_for_result(process, queue, n_rows, timeout)
+    process.join()
+    return result
+
+
+def compare(current, previous, tolerance):
+    """Print the change of each tracked metric per size; True if any regressed beyond ``tolerance``"""
+    regressed = False
+    print(f"\n{'rows':>9}  {'metric':<32}{'previous':>12}{'current':>12}{'change':>9}")
+    for size, after_metrics in current['results'].items():
+        before_metrics = previous.get('results', {}).get(size)
+        if before_metrics is None:
+            continue
+        for metric, higher_is_better in TRACKED_METRICS.items():
+            before, after = before_metrics.get(metric), after_metrics.get(metric)
+            if before is None or after is None:
+                continue
+            change = (after - before) / before if before else 0.0
+            worse = -change if higher_is_better else change
+            flag = ''
+            if worse > tolerance:
+                flag = '  REGRESSED'
+                regressed = True
+            print(f"{size:>9}  {metric:<32}{before:>12.4g}{after:>12.4g}{change:>+9.1%}{flag}")
+    return regressed
+
+
+def _print_results(results):
+    columns = [
+        ('train s', 'train_seconds', '.2f'), ('MB', 'artifact_bytes', None), ('load s', 'load_seconds', '.2f'),
+        ('prep p50', 'preprocess_single_p50_ms', '.2f'), ('p50 ms', 'predict_single_p50_ms', '.2f'),
+        ('p99 ms', 'predict_single_p99_ms', '.2f'), ('rows/s', 'predict_rows_per_second', '.0f'),
+        ('api p50', 'recommend_p50_ms', '.1f'), ('api req/s', 'recommend_requests_per_second', '.0f'),
+        ('RSS MB', 'peak_rss_mb', '.0f')
+    ]
+    print(f"\n{'rows':>9}" + ''.join(f"{title:>11}" for title, _, _ in columns))
+    for size, result in results.items():
+        if 'error' in result:
+            print(f"{size:>9}  failed: {result['error']}")
+            continue
+        cells = []
+        for _, key, fmt in columns:
+            value = result[key] / 2**20 if key == 'artifact_bytes' else result[key]
+            cells.append(f"{value:>11{fmt or '.1f'}}")
+        print(f"{size:>9}" + ''.join(cells))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='dataset sizes in rows')
+    parser.add_argument('--latency-rows', type=int, default=200, help='profiles scored one at a time')
+    parser.add_argument('--requests', type=int, default=1000, help='POST /recommend calls in the load test')
+    parser.add_argument('--concurrency', type=int, default=16, help='concurrent clients in the load test')
+    parser.add_argument('--timeout', type=float, help='seconds after which a size is recorded as failed')
+    parser.add_argument('--output', help='write results as JSON to this path')
+    parser.add_argument('--compare', help='JSON results of an earlier run to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.1, help='relative change treated as a regression')
+    args = parser.parse_args()
+
+    results = {}
+    for n_rows in args.sizes:
+        print(f"Benchmarking {n_rows} rows...", flush=True)
+        results[str(n_rows)] = run_isolated(
+            n_rows, timeout=args.timeout,
+            latency_rows=args.latency_rows, requests=args.requests, concurrency=args.concurrency
+        )
+    report = {
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'created_at': time.time(),
+        'results': results
+    }
+    _print_results(results)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    failed = any('error' in result for result in results.values())
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+        failed = compare(report, previous, args.tolerance) or failed
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
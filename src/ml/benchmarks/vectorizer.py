@@ -0,0 +1,119 @@
+"""
+Check and time the pandas-free feature vectorizer against preprocess_data
+
+Vectorizes profiles from the training data with FeatureVectorizer and with
+the pandas FeaturePipeline path, then compares the two matrices column for
+column. Damaged copies of the profiles (missing values, unseen categories,
+out-of-range ages, zero income) are included so that imputation and
+fallbacks are compared too. Exits with status 1 if any column differs.
+
+Also reports the single-profile latency of both paths, for the features
+alone and for a full predict call.
+
+Usage (from src/ml after training):
+    python -m benchmarks.vectorizer [--models models] [--rows 2000] [--output vectorizer.json]
+"""
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from model_registry import ModelRegistry
+from training_data import read_training_data, LABEL_COLUMN
+
+
+def _damaged(profiles, categorical_features, rng):
+    """Copies of ``profiles`` with one field each set to an edge-case value"""
+    edge_values = [
+        ('age', None), ('age', 17), ('age', 130), ('income', None), ('income', 0),
+        ('family_size', 0), ('debt', None), ('bmi', float('inf')), ('premium_budget', None)
+    ]
+    edge_values += [(feature, None) for feature in categorical_features]
+    edge_values += [(feature, 'unseen-category') for feature in categorical_features]
+    damaged = []
+    for profile in profiles:
+        feature, value = edge_values[rng.integers(len(edge_values))]
+        damaged.append({**profile, feature: value})
+    return damaged
+
+
+def compare_columns(recommender, profiles):
+    """Per-column maximum absolute difference between the two paths"""
+    vectorizer = recommender.vectorizer
+    expected = recommender.preprocess_data(pd.DataFrame(profiles))[recommender.features].to_numpy()
+    expected = expected.astype(vectorizer.dtype)
+    actual = vectorizer.transform_batch(profiles)
+    return {
+        feature: float(np.max(np.abs(actual[:, j].astype(float) - expected[:, j].astype(float))))
+        for j, feature in enumerate(recommender.features)
+    }
+
+
+def _median_us(fn, profiles):
+    timings = []
+    for profile in profiles:
+        start = time.perf_counter()
+        fn(profile)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings) * 1e6)
+
+
+def time_single_profile(recommender, profiles):
+    vectorizer = recommender.vectorizer
+    features = recommender.features
+    return {
+        'pandas_features_us': _median_us(
+            lambda p: recommender.preprocess_data(pd.DataFrame([p]))[features].to_numpy(), profiles
+        ),
+        'vectorizer_features_us': _median_us(vectorizer.transform, profiles),
+        'pandas_predict_us': _median_us(lambda p: recommender.predict(pd.DataFrame([p])), profiles),
+        'vectorizer_predict_us': _median_us(recommender.predict, profiles)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data', default='insurance_training_data.csv')
+    parser.add_argument('--models', default='models', help='model registry directory')
+    parser.add_argument('--rows', type=int, default=2000, help='profiles compared between the two paths')
+    parser.add_argument('--timed-rows', type=int, default=300, help='profiles scored one at a time for latency')
+    parser.add_argument('--output', help='write results as JSON to this path')
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.models)
+    version = registry.current_version()
+    if version is None:
+        parser.error(f"No active model version in {args.models}; train a model first")
+    recommender = registry.load(version, verify=False)
+
+    df = read_training_data(args.data).head(args.rows).drop(columns=[LABEL_COLUMN])
+    profiles = df.astype(object).where(df.notna(), None).to_dict('records')
+    damaged = _damaged(profiles, recommender.categorical_features, np.random.default_rng(42))
+
+    differences = compare_columns(recommender, profiles + damaged)
+    mismatched = {feature: diff for feature, diff in differences.items() if diff > 0}
+    latency = time_single_profile(recommender, profiles[:args.timed_rows])
+
+    print(f"model {version}: {len(recommender.features)} features, dtype {np.dtype(recommender.vectorizer.dtype)}")
+    print(f"compared {len(profiles)} profiles and {len(damaged)} damaged copies column for column")
+    for feature, diff in mismatched.items():
+        print(f"  MISMATCH {feature}: max abs difference {diff:.3g}")
+    if not mismatched:
+        print("  all columns identical")
+    print(f"\n{'single profile':<16}{'pandas us':>11}{'vectorizer us':>15}{'speedup':>9}")
+    for stage in ('features', 'predict'):
+        before, after = latency[f'pandas_{stage}_us'], latency[f'vectorizer_{stage}_us']
+        print(f"{stage:<16}{before:>11.0f}{after:>15.0f}{before / after:>8.1f}x")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'model_version': version, 'mismatched_columns': mismatched, **latency}, f, indent=2)
+    if mismatched:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+Measure resident memory per serving worker with and without shared artifacts
+
+Starts several worker processes the way ``uvicorn --workers`` does (spawned,
+not forked). Each one loads the saved model and scores a few profiles.
+Memory is read from /proc once every worker is loaded. RSS counts shared
+pages in every process. PSS divides them among the processes that map
+them, and private memory is what each extra worker really costs.
+
+Usage (from src/ml after training):
+    python -m benchmarks.worker_memory [--models models] [--workers 4] [--output memory.json]
+"""
+import argparse
+import json
+import multiprocessing
+
+import pandas as pd
+
+from model_registry import ModelRegistry
+
+MODES = {'private': None, 'shared': 'r'}
+
+
+def _memory_kb():
+    """RSS, PSS and private memory of the current process in kB (Linux only)"""
+    fields = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1])
+    return {
+        'rss_kb': fields['Rss'],
+        'pss_kb': fields['Pss'],
+        'private_kb': fields['Private_Clean'] + fields['Private_Dirty']
+    }
+
+
+def _worker(registry_root, version, mmap_mode, profiles, loaded, results, done):
+    baseline = _memory_kb()
+    recommender = ModelRegistry(registry_root).load(version, mmap_mode=mmap_mode, verify=False)
+    for i in range(len(profiles)):
+        recommender.predict_batch(profiles.iloc[[i]])
+    # Measure only once every worker has mapped the artifacts
+    loaded.wait()
+    memory = _memory_kb()
+    memory['model_private_kb'] = memory['private_kb'] - baseline['private_kb']
+    results.put(memory)
+    done.wait()
+
+
+def measure(registry_root, version, mode, workers, profiles):
+    context = multiprocessing.get_context('spawn')
+    loaded = context.Barrier(workers)
+    done = context.Event()
+    results = context.Queue()
+    processes = [
+        context.Process(target=_worker, args=(registry_root, version, MODES[mode], profiles, loaded, results, done))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    samples = [results.get() for _ in range(workers)]
+    done.set()
+    for process in processes:
+        process.join()
+
+    summary = {'mode': mode, 'workers': workers}
+    for key in samples[0]:
+        summary[f'avg_{key}'] = sum(sample[key] for sample in samples) / workers
+    summary['total_pss_kb'] = sum(sample['pss_kb'] for sample in samples)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data', default='insurance_training_data.csv')
+    parser.add_argument('--models', default='models', help='model registry directory')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--profiles', type=int, default=20, help='profiles each worker scores after loading')
+    parser.add_argument('--output', help='write results as JSON to this path')
+    args = parser.parse_args()
+
+    version = ModelRegistry(args.models).current_version()
+    if version is None:
+        parser.error(f"No active model version in {args.models}; train a model first")
+    profiles = pd.read_csv(args.data, nrows=args.profiles)
+    results = [measure(args.models, version, mode, args.workers, profiles) for mode in MODES]
+
+    print(f"\n{'mode':<10}{'workers':>8}{'RSS MB':>9}{'PSS MB':>9}{'private MB':>12}{'model MB':>10}{'total PSS MB':>14}")
+    for r in results:
+        print(
+            f"{r['mode']:<10}{r['workers']:>8}{r['avg_rss_kb'] / 1024:>9.1f}{r['avg_pss_kb'] / 1024:>9.1f}"
+            f"{r['avg_private_kb'] / 1024:>12.1f}{r['avg_model_private_kb'] / 1024:>10.1f}"
+            f"{r['total_pss_kb'] / 1024:>14.1f}"
+        )
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
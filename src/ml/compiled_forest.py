@@ -0,0 +1,121 @@
+import os
+from typing import Optional
+
+import numpy as np
+
+# Arrays making up a compiled forest, one .npy file each
+ARRAY_NAMES = ('feature', 'threshold', 'children', 'value', 'roots', 'classes')
+
+
+class CompiledForest:
+    """
+    A fitted tree ensemble flattened into contiguous NumPy arrays
+
+    All trees share one node table: ``feature``/``threshold`` describe each
+    split, ``children`` holds the global (right, left) child indices and
+    ``value`` the normalised class distribution of every node. Leaves point
+    to themselves, so a batch is scored by advancing every (row, tree) pair
+    one level at a time for ``max_depth`` steps with no per-row Python work.
+
+    Saved arrays are plain uncompressed ``.npy`` files, so loading with
+    ``mmap_mode='r'`` lets several worker processes share one copy.
+    """
+
+    def __init__(self, feature, threshold, children, value, roots, classes):
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.value = value
+        self.roots = roots
+        # Object dtype like sklearn's classes_, so labels come out as plain str
+        self.classes_ = np.asarray(classes).astype(object)
+        self.max_depth = self._depth()
+
+    @classmethod
+    def from_model(cls, model) -> 'CompiledForest':
+        """
+        Compile a fitted forest (e.g. RandomForestClassifier)
+
+        Raises:
+            ValueError: If the model is not an ensemble of decision trees
+        """
+        if not hasattr(model, 'estimators_') or not hasattr(model.estimators_[0], 'tree_'):
+            raise ValueError(f"Cannot compile {type(model).__name__}: not a forest of decision trees")
+
+        features, thresholds, children, values, roots = [], [], [], [], []
+        offset = 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            nodes = np.arange(tree.node_count)
+            is_leaf = tree.children_left < 0
+
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(tree.threshold)
+            # Column 0 is taken when the split test fails, column 1 when it passes
+            children.append(np.column_stack([
+                np.where(is_leaf, nodes, tree.children_right),
+                np.where(is_leaf, nodes, tree.children_left)
+            ]) + offset)
+            value = tree.value[:, 0, :]
+            values.append(value / value.sum(axis=1, keepdims=True))
+            roots.append(offset)
+            offset += tree.node_count
+
+        return cls(
+            feature=np.concatenate(features).astype(np.int32),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            children=np.concatenate(children).astype(np.int32),
+            value=np.concatenate(values).astype(np.float64),
+            roots=np.asarray(roots, dtype=np.int32),
+            classes=np.asarray(model.classes_).astype(str)
+        )
+
+    def _depth(self) -> int:
+        # Walk every tree from its root until all paths reach a leaf
+        nodes = self.roots.copy()
+        depth = 0
+        while True:
+            advanced = self.children[nodes].ravel()
+            advanced = advanced[advanced != np.repeat(nodes, 2)]
+            if len(advanced) == 0:
+                return depth
+            nodes = np.unique(advanced)
+            depth += 1
+
+    def apply(self, X) -> np.ndarray:
+        """Global leaf index reached by every row in every tree, shape (n_samples, n_trees)"""
+        # sklearn compares float32 features against float64 thresholds
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        flat_X = X.ravel()
+        flat_children = self.children.reshape(-1)
+        row_offsets = (np.arange(len(X)) * X.shape[1])[:, None]
+        nodes = np.broadcast_to(self.roots, (len(X), len(self.roots))).copy()
+        for _ in range(self.max_depth):
+            go_left = flat_X.take(row_offsets + self.feature.take(nodes)) <= self.threshold.take(nodes)
+            nodes = flat_children.take(2 * nodes + go_left)
+        return nodes
+
+    def predict_proba(self, X, chunk_size: int = 4096) -> np.ndarray:
+        """Class probabilities averaged over all trees, like the source forest"""
+        X = np.asarray(X, dtype=np.float32)
+        proba = np.empty((len(X), len(self.classes_)))
+        for start in range(0, len(X), chunk_size):
+            leaves = self.apply(X[start:start + chunk_size])
+            proba[start:start + chunk_size] = self.value.take(leaves, axis=0).mean(axis=1)
+        return proba
+
+    def save(self, directory: str):
+        """Write each array as an uncompressed .npy file in ``directory``"""
+        os.makedirs(directory, exist_ok=True)
+        for name in ARRAY_NAMES:
+            array = self.classes_.astype(str) if name == 'classes' else getattr(self, name)
+            np.save(os.path.join(directory, f'{name}.npy'), np.ascontiguousarray(array))
+
+    @classmethod
+    def load(cls, directory: str, mmap_mode: Optional[str] = 'r') -> 'CompiledForest':
+        """Load a saved forest, memory-mapping the arrays by default"""
+        arrays = {
+            name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode=mmap_mode)
+            for name in ARRAY_NAMES
+        }
+        return cls(**arrays)
@@ -0,0 +1,66 @@
+import asyncio
+import threading
+from concurrent.futures import Executor
+from typing import Any, Callable
+
+
+class ExecutorBusyError(RuntimeError):
+    """Raised when a BoundedExecutor already has its maximum number of pending tasks"""
+
+
+class BoundedExecutor:
+    """
+    Run blocking work off the event loop with a cap on queued tasks
+
+    A task holds its slot until it has actually finished in the pool (not
+    merely until the awaiting coroutine gives up), so the limit reflects
+    the real amount of work queued behind the workers.
+    """
+
+    def __init__(self, executor: Executor, max_pending: int, name: str = 'executor'):
+        """
+        Args:
+            executor: Thread or process pool that runs the tasks
+            max_pending: Maximum number of running plus queued tasks
+            name: Name used in error messages
+        """
+        self.executor = executor
+        self.max_pending = max_pending
+        self.name = name
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        """Number of tasks currently running or queued"""
+        return self._pending
+
+    async def run(self, fn: Callable, *args: Any) -> Any:
+        """
+        Run ``fn(*args)`` in the pool and await its result
+
+        Raises:
+            ExecutorBusyError: If the pending task limit has been reached
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise ExecutorBusyError(
+                    f"{self.name} is at capacity ({self.max_pending} pending tasks)"
+                )
+            self._pending += 1
+
+        try:
+            future = self.executor.submit(fn, *args)
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self, wait: bool = True):
+        """Shut down the underlying pool"""
+        self.executor.shutdown(wait=wait)
+
+    def _release(self, _future=None):
+        with self._lock:
+            self._pending -= 1
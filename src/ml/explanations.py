@@ -0,0 +1,56 @@
+import numpy as np
+
+
+def forest_contributions(model, X):
+    """
+    Per-row, per-class feature contributions for a fitted tree ensemble
+
+    Walks each tree's decision path and attributes the change in class
+    probability at every split to the split feature, so that
+    ``bias + contributions.sum(axis=1)`` equals ``model.predict_proba(X)``.
+    Each tree is handled with a single sparse matrix product over the whole
+    batch rather than a Python loop over rows or classes.
+
+    Args:
+        model: Fitted forest exposing ``estimators_`` (e.g. RandomForestClassifier)
+        X (np.ndarray): Preprocessed feature matrix of shape (n_samples, n_features)
+
+    Returns:
+        tuple: ``(bias, contributions)`` with shapes (n_samples, n_classes) and
+            (n_samples, n_features, n_classes)
+    """
+    X = np.asarray(X, dtype=np.float32)
+    n_samples, n_features = X.shape
+    n_classes = len(model.classes_)
+
+    bias = np.zeros((n_samples, n_classes))
+    contributions = np.zeros((n_samples, n_features * n_classes))
+
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        values = tree.value[:, 0, :]
+        values = values / values.sum(axis=1, keepdims=True)
+
+        # Map every non-root node to its parent's split feature and the change
+        # in class distribution caused by that split
+        parents = np.full(tree.node_count, -1)
+        internal = np.flatnonzero(tree.children_left >= 0)
+        parents[tree.children_left[internal]] = internal
+        parents[tree.children_right[internal]] = internal
+        children = np.flatnonzero(parents >= 0)
+
+        weights = np.zeros((tree.node_count, n_features * n_classes))
+        split_features = tree.feature[parents[children]]
+        deltas = values[children] - values[parents[children]]
+        columns = split_features[:, None] * n_classes + np.arange(n_classes)
+        weights[children[:, None], columns] = deltas
+
+        paths = estimator.decision_path(X)
+        contributions += paths @ weights
+        bias += values[0]
+
+    n_estimators = len(model.estimators_)
+    return (
+        bias / n_estimators,
+        (contributions / n_estimators).reshape(n_samples, n_features, n_classes)
+    )
@@ -0,0 +1,14 @@
+# Constants of the engineered features, shared by FeaturePipeline and
+# FeatureVectorizer. Kept free of sklearn so serving can import them without
+# loading what only fitting the pipeline needs.
+
+# Lookup tables used by the engineered features. They operate on the raw
+# category strings, so they must be applied before label encoding. Inputs
+# may be object or pandas categorical columns.
+COVERAGE_PREFERENCE_MAP = {'basic': 0.02, 'standard': 0.04, 'premium': 0.06, 'comprehensive': 0.08}
+HEALTH_STATUS_MAP = {'excellent': 1.0, 'good': 0.75, 'fair': 0.5, 'poor': 0.25}
+LIFESTYLE_MAP = {'active': 1.0, 'moderate': 0.75, 'sedentary': 0.5}
+PROPERTY_MAP = {'owned': 1.0, 'mortgaged': 0.7, 'rented': 0.3, 'none': 0.0}
+VEHICLE_MAP = {'multiple': 1.0, 'single': 0.7, 'none': 0.0}
+
+AGE_BINS = [18, 30, 45, 60, 100]
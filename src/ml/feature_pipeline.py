@@ -0,0 +1,208 @@
+import pandas as pd
+import numpy as np
+from sklearn.preprocessing import StandardScaler, LabelEncoder
+from typing import Dict, List
+
+from feature_definitions import (
+    AGE_BINS,
+    COVERAGE_PREFERENCE_MAP,
+    HEALTH_STATUS_MAP,
+    LIFESTYLE_MAP,
+    PROPERTY_MAP,
+    VEHICLE_MAP
+)
+
+# Constant defaults for missing numerical inputs. 'age', 'income' and
+# 'premium_budget' are learned from the training data in fit().
+NUMERICAL_DEFAULTS = {
+    'family_size': 1,
+    'risk_tolerance': 0.5,
+    'existing_conditions': 0,
+    'bmi': 25,
+    'savings_rate': 0.1,
+    'debt': 0,
+    'investment_experience': 0.5
+}
+
+
+class FeaturePipeline:
+    """
+    Fitted feature transform shared by training and inference.
+
+    All statistics (category codes, imputation values, ``max_income`` and the
+    scaler) are learned once in ``fit`` and reused by ``transform``, so scoring
+    a request never refits anything and always matches the training transform.
+    """
+
+    def __init__(self, features: List[str], categorical_features: List[str]):
+        self.features = list(features)
+        self.categorical_features = list(categorical_features)
+        self.numerical_features = [f for f in self.features if f not in self.categorical_features]
+
+        self.label_encoders: Dict[str, LabelEncoder] = {}
+        self.category_codes: Dict[str, Dict[str, int]] = {}
+        self.category_modes: Dict[str, str] = {}
+        self.numerical_defaults: Dict[str, float] = {}
+        self.numerical_medians: Dict[str, float] = {}
+        self.max_income: float = 1.0
+        self.scaler = StandardScaler()
+        self.is_fitted = False
+
+    def fit(self, data: pd.DataFrame) -> 'FeaturePipeline':
+        """
+        Learn encoders, imputation values and scaling from training data
+
+        Args:
+            data: Raw training data
+
+        Returns:
+            The fitted pipeline
+        """
+        self.fit_transform(data)
+        return self
+
+    def fit_transform(self, data: pd.DataFrame) -> pd.DataFrame:
+        """Fit the pipeline on ``data`` and return its transformed copy"""
+        data = data.copy()
+
+        self.category_modes = {
+            feature: data[feature].mode()[0]
+            for feature in self.categorical_features
+            if feature in data.columns
+        }
+        income_median = float(data['income'].median())
+        self.numerical_defaults = {
+            'age': float(data['age'].median()),
+            'income': income_median,
+            **NUMERICAL_DEFAULTS,
+            'premium_budget': income_median * 0.05
+        }
+
+        data = self._impute(data)
+        max_income = float(data['income'].max())
+        self.max_income = max_income if max_income != 0 else 1.0
+        data = self._engineer(data)
+
+        for feature in self.categorical_features:
+            if feature in data.columns:
+                encoder = LabelEncoder()
+                data[feature] = encoder.fit_transform(data[feature].astype(str))
+                self.label_encoders[feature] = encoder
+                self.category_codes[feature] = {
+                    label: code for code, label in enumerate(encoder.classes_)
+                }
+
+        data = self._coerce_numerical(data)
+        self.numerical_medians = {
+            feature: float(data[feature].median())
+            for feature in self.numerical_features
+            if feature in data.columns
+        }
+        data = self._fill_numerical(data)
+
+        data[self.numerical_features] = self.scaler.fit_transform(data[self.numerical_features])
+        self.is_fitted = True
+        return self._finalize(data)
+
+    def transform(self, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Transform raw data using the fitted statistics
+
+        Args:
+            data: Raw user data with the same columns as the training data
+
+        Returns:
+            Transformed copy of ``data``
+        """
+        if not self.is_fitted:
+            raise RuntimeError("FeaturePipeline must be fitted before calling transform")
+
+        data = self._engineer(self._impute(data.copy()))
+
+        for feature, codes in self.category_codes.items():
+            if feature in data.columns:
+                # Unseen categories fall back to the training mode
+                fallback = codes.get(str(self.category_modes[feature]), 0)
+                data[feature] = data[feature].astype(str).map(codes).fillna(fallback).astype(int)
+
+        data = self._fill_numerical(self._coerce_numerical(data))
+        data[self.numerical_features] = self.scaler.transform(data[self.numerical_features])
+        return self._finalize(data)
+
+    def _impute(self, data: pd.DataFrame) -> pd.DataFrame:
+        for feature, mode in self.category_modes.items():
+            if feature in data.columns:
+                data[feature] = data[feature].fillna(mode)
+        for feature, default in self.numerical_defaults.items():
+            if feature in data.columns:
+                data[feature] = data[feature].fillna(default)
+        return data
+
+    def _engineer(self, data: pd.DataFrame) -> pd.DataFrame:
+        # Calculate premium based on income and coverage preference
+        coverage_rate = data['coverage_preference'].map(COVERAGE_PREFERENCE_MAP).astype(float)
+        data['premium'] = data['income'] * coverage_rate
+
+        # Financial ratios with zero division handling
+        income = data['income'].to_numpy(dtype=float)
+        has_income = income > 0
+        safe_income = np.where(has_income, income, 1.0)
+        data['premium_to_income_ratio'] = np.where(has_income, data['premium'] / safe_income, 0)
+        data['debt_to_income_ratio'] = np.where(has_income, data['debt'] / safe_income, 0)
+
+        # Age-related features
+        data['age_range'] = pd.cut(
+            data['age'],
+            bins=AGE_BINS,
+            labels=[0, 1, 2, 3],
+            include_lowest=True
+        ).astype(float)
+        data['years_to_retirement'] = np.maximum(65 - data['age'], 0)
+
+        # Family and income features with zero division handling
+        family_size = data['family_size'].to_numpy(dtype=float)
+        data['family_income_burden'] = np.where(has_income, family_size / (safe_income / 10000), 0)
+        data['per_capita_income'] = np.where(
+            family_size > 0,
+            income / np.where(family_size > 0, family_size, 1.0),
+            income
+        )
+
+        # Health and risk scores
+        health_score = data['health_status'].map(HEALTH_STATUS_MAP).astype(float)
+        data['risk_health_score'] = data['risk_tolerance'] * health_score
+        data['lifestyle_health_score'] = (
+            data['lifestyle'].map(LIFESTYLE_MAP).astype(float) * (1 - data['existing_conditions'] / 4)
+        )
+
+        # Financial stability score, normalised by the training max income
+        data['financial_stability_score'] = (
+            data['savings_rate'] * 0.3 +
+            (1 - np.minimum(data['debt_to_income_ratio'], 1)) * 0.3 +
+            data['investment_experience'] * 0.2 +
+            (data['income'] / self.max_income) * 0.2
+        )
+
+        # Property and vehicle ownership scores
+        data['property_score'] = data['property_ownership'].map(PROPERTY_MAP).astype(float)
+        data['vehicle_score'] = data['vehicle_ownership'].map(VEHICLE_MAP).astype(float)
+        return data
+
+    def _coerce_numerical(self, data: pd.DataFrame) -> pd.DataFrame:
+        # Ensure all numerical features are finite
+        for feature in self.numerical_features:
+            if feature in data.columns:
+                values = pd.to_numeric(data[feature], errors='coerce')
+                data[feature] = values.replace([np.inf, -np.inf], np.nan)
+        return data
+
+    def _fill_numerical(self, data: pd.DataFrame) -> pd.DataFrame:
+        return data.fillna({f: m for f, m in self.numerical_medians.items() if f in data.columns})
+
+    def _finalize(self, data: pd.DataFrame) -> pd.DataFrame:
+        # Final check for any remaining NaN values
+        if data[self.features].isna().any().any():
+            print("Warning: NaN values found after preprocessing. Filling with 0.")
+            data[self.features] = data[self.features].fillna(0)
+        return data
+
@@ -0,0 +1,187 @@
+import math
+from typing import TYPE_CHECKING, Any, Dict, Mapping, Optional, Sequence
+
+import numpy as np
+
+from feature_definitions import (
+    AGE_BINS,
+    COVERAGE_PREFERENCE_MAP,
+    HEALTH_STATUS_MAP,
+    LIFESTYLE_MAP,
+    PROPERTY_MAP,
+    VEHICLE_MAP
+)
+
+if TYPE_CHECKING:
+    # feature_pipeline imports sklearn, which serving must not load at startup
+    from feature_pipeline import FeaturePipeline
+
+NAN = float('nan')
+
+
+def _is_missing(value) -> bool:
+    return value is None or (isinstance(value, float) and value != value)
+
+
+def _number(value) -> float:
+    if value is None:
+        return NAN
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return NAN
+
+
+def _age_range(age: float) -> float:
+    # pd.cut(age, AGE_BINS, labels=[0, 1, 2, 3], include_lowest=True)
+    if not AGE_BINS[0] <= age <= AGE_BINS[-1]:
+        return NAN
+    for label, upper in enumerate(AGE_BINS[1:]):
+        if age <= upper:
+            return float(label)
+    return NAN
+
+
+def _minimum(value: float, bound: float) -> float:
+    # np.minimum propagates NaN; the min() builtin does not
+    return value if value != value or value < bound else bound
+
+
+class FeatureVectorizer:
+    """
+    Turns raw profile dicts into model feature rows without pandas
+
+    Reproduces FeaturePipeline.transform for a fitted pipeline: imputation,
+    the engineered features, category codes, median filling and scaling,
+    written straight into a NumPy row in the model's feature order. Every
+    per-column constant is looked up once here, so vectorizing a profile is
+    a short pass of plain float arithmetic.
+    """
+
+    def __init__(self, pipeline: 'FeaturePipeline', features: Sequence[str], dtype=np.float32):
+        """
+        Args:
+            pipeline: Fitted feature pipeline whose transform is reproduced
+            features: Output columns, in the order the model expects them
+            dtype: NumPy dtype of the produced rows
+        """
+        if not pipeline.is_fitted:
+            raise RuntimeError("FeatureVectorizer needs a fitted FeaturePipeline")
+        self.features = list(features)
+        self.dtype = dtype
+        self.max_income = pipeline.max_income
+        self.numerical_defaults = dict(pipeline.numerical_defaults)
+        self.category_modes = dict(pipeline.category_modes)
+
+        scaler = pipeline.scaler
+        scale_index = {feature: i for i, feature in enumerate(pipeline.numerical_features)}
+        # One (name, codes, fallback, median, mean, scale) entry per output column;
+        # codes is None for numerical columns
+        self._columns = []
+        for feature in self.features:
+            if feature in pipeline.category_codes:
+                codes = pipeline.category_codes[feature]
+                fallback = codes.get(str(self.category_modes[feature]), 0)
+                self._columns.append((feature, codes, fallback, None, 0.0, 1.0))
+            elif feature in scale_index:
+                i = scale_index[feature]
+                mean = float(scaler.mean_[i]) if scaler.with_mean else 0.0
+                scale = float(scaler.scale_[i]) if scaler.with_std else 1.0
+                median = pipeline.numerical_medians.get(feature, NAN)
+                self._columns.append((feature, None, None, median, mean, scale))
+            else:
+                # Not produced by the pipeline; predict_batch scores it as 0
+                self._columns.append((feature, None, None, 0.0, 0.0, 1.0))
+
+        self._categorical = list(pipeline.category_codes)
+
+    def _raw_values(self, profile: Mapping[str, Any]) -> Dict[str, Any]:
+        """Imputed raw inputs plus the engineered features of one profile"""
+        values = {}
+        for feature in self._categorical:
+            value = profile.get(feature)
+            values[feature] = self.category_modes[feature] if _is_missing(value) else value
+        for feature, default in self.numerical_defaults.items():
+            value = _number(profile.get(feature))
+            values[feature] = default if value != value else value
+        self._engineer(values)
+        return values
+
+    def _engineer(self, v: Dict[str, Any]):
+        # Mirrors FeaturePipeline._engineer, one operation at a time
+        income = v['income']
+        has_income = income > 0
+        v['premium'] = income * COVERAGE_PREFERENCE_MAP.get(v['coverage_preference'], NAN)
+        v['premium_to_income_ratio'] = v['premium'] / income if has_income else 0.0
+        v['debt_to_income_ratio'] = v['debt'] / income if has_income else 0.0
+
+        age = v['age']
+        v['age_range'] = _age_range(age)
+        v['years_to_retirement'] = NAN if age != age else max(65 - age, 0)
+
+        family_size = v['family_size']
+        v['family_income_burden'] = family_size / (income / 10000) if has_income else 0.0
+        v['per_capita_income'] = income / family_size if family_size > 0 else income
+
+        v['risk_health_score'] = v['risk_tolerance'] * HEALTH_STATUS_MAP.get(v['health_status'], NAN)
+        v['lifestyle_health_score'] = (
+            LIFESTYLE_MAP.get(v['lifestyle'], NAN) * (1 - v['existing_conditions'] / 4)
+        )
+        v['financial_stability_score'] = (
+            v['savings_rate'] * 0.3 +
+            (1 - _minimum(v['debt_to_income_ratio'], 1)) * 0.3 +
+            v['investment_experience'] * 0.2 +
+            (income / self.max_income) * 0.2
+        )
+        v['property_score'] = PROPERTY_MAP.get(v['property_ownership'], NAN)
+        v['vehicle_score'] = VEHICLE_MAP.get(v['vehicle_ownership'], NAN)
+
+    def _fill(self, profile: Mapping[str, Any], row: np.ndarray):
+        """Write the feature row of one profile into ``row``"""
+        if not isinstance(profile, Mapping):
+            # A validated pydantic model such as api.UserProfile
+            profile = vars(profile)
+        values = self._raw_values(profile)
+        for i, (feature, codes, fallback, median, mean, scale) in enumerate(self._columns):
+            if codes is not None:
+                row[i] = codes.get(str(values[feature]), fallback)
+                continue
+            value = _number(values.get(feature))
+            if not math.isfinite(value):
+                value = median
+            value = (value - mean) / scale
+            # FeaturePipeline._finalize fills what is still missing with 0
+            row[i] = 0.0 if value != value else value
+
+    def transform(self, profile: Mapping[str, Any]) -> np.ndarray:
+        """
+        Vectorize a single profile
+
+        Args:
+            profile: Raw profile dict (or validated UserProfile)
+
+        Returns:
+            Feature row of shape (n_features,)
+        """
+        row = np.empty(len(self.features), dtype=self.dtype)
+        self._fill(profile, row)
+        return row
+
+    def transform_batch(self, profiles: Sequence[Mapping[str, Any]], out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Vectorize several profiles into one matrix
+
+        Args:
+            profiles: Raw profile dicts (or validated UserProfiles)
+            out: Preallocated (n_profiles, n_features) array to fill
+
+        Returns:
+            The filled feature matrix
+        """
+        if out is None:
+            out = np.empty((len(profiles), len(self.features)), dtype=self.dtype)
+        elif out.shape != (len(profiles), len(self.features)):
+            raise ValueError(f"Expected an output array of shape {(len(profiles), len(self.features))}, got {out.shape}")
+        for i, profile in enumerate(profiles):
+            self._fill(profile, out[i])
+        return out
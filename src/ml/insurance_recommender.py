@@ -1,16 +1,149 @@
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.preprocessing import StandardScaler, LabelEncoder
-from sklearn.model_selection import train_test_split
 import joblib
 import os
+import shutil
+import threading
+import time
+
+# sklearn estimators and the feature pipeline are imported where they are
+# built. Serving only unpickles them, so the API can start answering before
+# sklearn has been imported.
+from explanations import forest_contributions
+from compiled_forest import CompiledForest
+from feature_vectorizer import FeatureVectorizer
+
+# Hyperparameters of the production forest
+RANDOM_FOREST_PARAMS = {
+    'n_estimators': 200,
+    'max_depth': 15,
+    'min_samples_split': 2,
+    'min_samples_leaf': 1,
+    'max_features': 'sqrt',  # Reduce overfitting
+    'class_weight': 'balanced',  # Handle class imbalance
+    'random_state': 42
+}
+
+# Hyperparameters of the gradient-boosted engine
+HIST_GRADIENT_BOOSTING_PARAMS = {
+    'max_iter': 200,
+    'learning_rate': 0.1,
+    'max_leaf_nodes': 31,
+    'early_stopping': 'auto',
+    'class_weight': 'balanced',
+    'random_state': 42
+}
+
+
+class RandomForestEngine:
+    """Bagged forest of deep trees; supports tree-path attributions"""
+    
+    name = 'random_forest'
+    model_type = 'RandomForestClassifier'
+    supports_attributions = True
+    compilable = True
+    incremental = True
+    # Trees compare float32 features, so rows can be built in float32
+    feature_dtype = np.float32
+    
+    def create(self, categorical_mask, n_jobs=-1):
+        from sklearn.ensemble import RandomForestClassifier
+        return RandomForestClassifier(**RANDOM_FOREST_PARAMS, n_jobs=n_jobs)
+    
+    def feature_importances(self, model, X, y, n_jobs=-1):
+        return model.feature_importances_
+
+
+class HistGradientBoostingEngine:
+    """
+    Histogram gradient boosting with native categorical splits
+    
+    Categorical features are passed as the pipeline's integer codes and
+    split on as categories rather than as ordered numbers.
+    """
+    
+    name = 'hist_gradient_boosting'
+    model_type = 'HistGradientBoostingClassifier'
+    supports_attributions = False
+    compilable = False
+    incremental = False
+    feature_dtype = np.float64
+    
+    def create(self, categorical_mask, n_jobs=-1):
+        from sklearn.ensemble import HistGradientBoostingClassifier
+        return HistGradientBoostingClassifier(
+            **HIST_GRADIENT_BOOSTING_PARAMS,
+            categorical_features=categorical_mask
+        )
+    
+    def feature_importances(self, model, X, y, n_jobs=-1, max_rows=1000):
+        # Boosted models have no impurity importances; use permutation
+        # importance on a sample, normalised to sum to 1 like the forest's.
+        # It costs n_features * n_repeats predictions over the sample, so
+        # the sample is kept small enough not to outlast the fit itself.
+        if len(X) > max_rows:
+            rows = np.random.default_rng(42).choice(len(X), max_rows, replace=False)
+            X, y = X.iloc[rows], y[rows]
+        from sklearn.inspection import permutation_importance
+        result = permutation_importance(model, X, y, n_repeats=3, random_state=42, n_jobs=n_jobs)
+        importances = np.clip(result.importances_mean, 0, None)
+        total = importances.sum()
+        return importances / total if total > 0 else importances
+
+
+ENGINES = {engine.name: engine for engine in (RandomForestEngine, HistGradientBoostingEngine)}
+
+
+def get_engine(name):
+    """Look up an engine by name"""
+    if name not in ENGINES:
+        raise ValueError(f"Unknown model engine '{name}'. Choose from: {', '.join(ENGINES)}")
+    return ENGINES[name]()
+
+
+def engine_for_model(model):
+    """Find the engine that produced a fitted model"""
+    for engine in ENGINES.values():
+        if type(model).__name__ == engine.model_type:
+            return engine()
+    raise ValueError(f"Unsupported model type: {type(model).__name__}")
+
+
+# Files making up a saved model, relative to its model directory
+MODEL_FILE = 'insurance_recommender.joblib'
+PIPELINE_FILE = 'feature_pipeline.joblib'
+LABEL_ENCODERS_FILE = 'label_encoders.joblib'
+SCALER_FILE = 'scaler.joblib'
+COMPILED_MODEL_DIR = 'compiled_forest'
+# Small summary of the fitted model needed to serve without unpickling it
+MODEL_METADATA_FILE = 'model_metadata.joblib'
+# Above this many rows sklearn's native tree traversal is faster than the
+# compiled forest's level-by-level NumPy walk
+COMPILED_MAX_BATCH_SIZE = 512
+
+CONFIDENCE_THRESHOLDS = np.array([0.2, 0.4, 0.6, 0.8])
+CONFIDENCE_LEVELS = np.array(['Very Low', 'Low', 'Medium', 'High', 'Very High'], dtype=object)
 
 class InsuranceRecommender:
-    def __init__(self):
-        self.model = None
-        self.scaler = StandardScaler()
-        self.label_encoders = {}
+    def __init__(self, engine='random_forest'):
+        self.engine = get_engine(engine)
+        self._model = None
+        self._model_path = None
+        self._model_mmap_mode = None
+        self._model_lock = threading.Lock()
+        self.compiled_model = None
+        self.feature_importances = None
+        self.pipeline = None
+        self._vectorizer = None
+        # Called with (stage, seconds) after each inference stage, e.g. to
+        # feed latency metrics; None disables the timing hooks
+        self.on_inference_stage = None
+        self.explanation_top_k = 3
+        self.top_features = None
+        self._explanation_template = None
+        self._top_feature_columns = None
+        self._top_feature_categorical = None
+        self.training_timings = {}
         self.features = [
             # Basic Demographic Information
             'age', 
@@ -74,211 +207,241 @@ class InsuranceRecommender:
             'vehicle_ownership'
         ]
         
-    def preprocess_data(self, data):
-        # Initialize label encoders for categorical features
-        for feature in self.categorical_features:
-            if feature not in self.label_encoders:
-                self.label_encoders[feature] = LabelEncoder()
-            
-            if feature in data.columns:
-                # Fill missing categorical values with most frequent value
-                data[feature] = data[feature].fillna(data[feature].mode()[0])
-                data[feature] = self.label_encoders[feature].fit_transform(data[feature])
-        
-        # Fill missing numerical values with appropriate defaults
-        numerical_defaults = {
-            'age': data['age'].median(),
-            'income': data['income'].median(),
-            'family_size': 1,
-            'risk_tolerance': 0.5,
-            'existing_conditions': 0,
-            'bmi': 25,
-            'savings_rate': 0.1,
-            'debt': 0,
-            'investment_experience': 0.5,
-            'premium_budget': data['income'].median() * 0.05
-        }
-        
-        for feature, default in numerical_defaults.items():
-            if feature in data.columns:
-                data[feature] = data[feature].fillna(default)
-        
-        # Add engineered features
-        # Calculate premium based on income and coverage preference
-        coverage_preference_map = {'basic': 0.02, 'standard': 0.04, 'premium': 0.06, 'comprehensive': 0.08}
-        data['premium'] = data['income'] * data['coverage_preference'].map(coverage_preference_map)
-        
-        # Financial ratios with zero division handling
-        data['premium_to_income_ratio'] = np.where(
-            data['income'] > 0,
-            data['premium'] / data['income'],
-            0
-        )
-        data['debt_to_income_ratio'] = np.where(
-            data['income'] > 0,
-            data['debt'] / data['income'],
-            0
-        )
-        
-        # Age-related features
-        data['age_range'] = pd.cut(
-            data['age'], 
-            bins=[18, 30, 45, 60, 100], 
-            labels=[0, 1, 2, 3],
-            include_lowest=True
-        )
-        data['years_to_retirement'] = np.maximum(65 - data['age'], 0)
-        
-        # Family and income features with zero division handling
-        data['family_income_burden'] = np.where(
-            data['income'] > 0,
-            data['family_size'] / (data['income'] / 10000),
-            0
-        )
-        data['per_capita_income'] = np.where(
-            data['family_size'] > 0,
-            data['income'] / data['family_size'],
-            data['income']
-        )
-        
-        # Health and risk scores
-        health_status_map = {'excellent': 1.0, 'good': 0.75, 'fair': 0.5, 'poor': 0.25}
-        data['risk_health_score'] = data['risk_tolerance'] * data['health_status'].map(health_status_map)
-        
-        lifestyle_map = {'active': 1.0, 'moderate': 0.75, 'sedentary': 0.5}
-        data['lifestyle_health_score'] = data['lifestyle'].map(lifestyle_map) * (1 - data['existing_conditions'] / 4)
-        
-        # Financial stability score with safe calculations
-        max_income = data['income'].max()
-        if max_income == 0:
-            max_income = 1
-        data['financial_stability_score'] = (
-            data['savings_rate'] * 0.3 +
-            (1 - np.minimum(data['debt_to_income_ratio'], 1)) * 0.3 +
-            data['investment_experience'] * 0.2 +
-            (data['income'] / max_income) * 0.2
-        )
-        
-        # Property and vehicle ownership scores
-        property_map = {'owned': 1.0, 'mortgaged': 0.7, 'rented': 0.3, 'none': 0.0}
-        vehicle_map = {'multiple': 1.0, 'single': 0.7, 'none': 0.0}
-        
-        data['property_score'] = data['property_ownership'].map(property_map)
-        data['vehicle_score'] = data['vehicle_ownership'].map(vehicle_map)
-        
-        # Ensure all numerical features are finite
-        numerical_features = [f for f in self.features if f not in self.categorical_features]
-        for feature in numerical_features:
-            if feature in data.columns:
-                # Convert to numeric type if not already
-                data[feature] = pd.to_numeric(data[feature], errors='coerce')
-                # Replace inf/-inf with NaN
-                data[feature] = data[feature].replace([np.inf, -np.inf], np.nan)
-                # Fill NaN with median
-                data[feature] = data[feature].fillna(data[feature].median())
-        
-        # Scale numerical features
-        data[numerical_features] = self.scaler.fit_transform(data[numerical_features])
-        
-        # Final check for any remaining NaN values
-        if data.isna().any().any():
-            print("Warning: NaN values found after preprocessing. Filling with 0.")
-            data = data.fillna(0)
-        
-        return data
+    def preprocess_data(self, data, fit=False):
+        """
+        Transform raw user data into model features
+
+        Args:
+            data (pd.DataFrame): Raw user data
+            fit (bool): Learn the feature pipeline from ``data`` first. Only
+                training should pass True; inference reuses the fitted state.
+
+        Returns:
+            pd.DataFrame: Encoded, imputed and scaled features
+        """
+        if fit:
+            from feature_pipeline import FeaturePipeline
+            self.pipeline = FeaturePipeline(self.features, self.categorical_features)
+            return self.pipeline.fit_transform(data)
+        return self.pipeline.transform(data)
     
-    def train(self, training_data, labels):
+    def train(
+        self,
+        training_data,
+        labels,
+        feature_selection='proxy',
+        importance_threshold=0.01,
+        selection_trees=50,
+        selection_sample=20000,
+        n_jobs=-1,
+        permutation_importances=False,
+        on_stage=None
+    ):
         """
-        Train the random forest model with feature importance analysis
+        Train the configured engine with feature importance analysis
         
         Args:
             training_data (pd.DataFrame): Training data with features
             labels (pd.Series): Target labels (policy types/recommendations)
+            feature_selection (str): How to find low-importance features to drop:
+                'proxy' fits a small forest on a row sample, 'full' fits the
+                full forest on all rows, 'none' keeps every feature
+            importance_threshold (float): Features at or below this importance are dropped
+            selection_trees (int): Number of trees in the proxy forest
+            selection_sample (int): Maximum rows used by the proxy forest
+            n_jobs (int): Cores used for fitting (-1 for all)
+            permutation_importances (bool): For engines without built-in
+                importances, score permutation importance on a row sample
+                instead of reusing the feature selection forest's importances
+                (always done when feature_selection is 'none')
+            on_stage (callable): Called with (stage, seconds) as each stage finishes
         """
-        processed_data = self.preprocess_data(training_data)
-        
-        # Initialize model with optimized parameters
-        self.model = RandomForestClassifier(
-            n_estimators=200,  # Increased from 100
-            max_depth=15,      # Increased from 10
-            min_samples_split=2,  # Decreased from 5
-            min_samples_leaf=1,   # Decreased from 2
-            max_features='sqrt',  # Added to reduce overfitting
-            class_weight='balanced',  # Added to handle class imbalance
-            random_state=42
-        )
-        
-        # Train model
-        self.model.fit(processed_data, labels)
-        
-        # Analyze feature importance
-        feature_importance = pd.DataFrame({
-            'feature': self.features,
-            'importance': self.model.feature_importances_
-        }).sort_values('importance', ascending=False)
+        timings = {}
+        
+        def record(stage, start):
+            timings[stage] = time.perf_counter() - start
+            if on_stage is not None:
+                on_stage(stage, timings[stage])
+        
+        start = time.perf_counter()
+        processed_data = self.preprocess_data(training_data, fit=True)
+        labels = np.asarray(labels)
+        candidate_features = list(self.pipeline.features)
+        record('preprocess', start)
+        
+        if feature_selection != 'none':
+            start = time.perf_counter()
+            selection_data, selection_labels = processed_data[candidate_features], labels
+            params = dict(RANDOM_FOREST_PARAMS, n_jobs=n_jobs)
+            if feature_selection == 'proxy':
+                params['n_estimators'] = selection_trees
+                if len(selection_data) > selection_sample:
+                    rows = np.random.default_rng(42).choice(len(selection_data), selection_sample, replace=False)
+                    selection_data, selection_labels = selection_data.iloc[rows], labels[rows]
+            elif feature_selection != 'full':
+                raise ValueError(f"Unknown feature_selection mode: {feature_selection}")
+            
+            from sklearn.ensemble import RandomForestClassifier
+            selector = RandomForestClassifier(**params).fit(selection_data, selection_labels)
+            
+            # Analyze feature importance
+            feature_importance = pd.DataFrame({
+                'feature': candidate_features,
+                'importance': selector.feature_importances_
+            }).sort_values('importance', ascending=False)
+            
+            print("\nFeature Importance Analysis:")
+            print(feature_importance)
+            
+            # Remove features with very low importance
+            important_features = set(
+                feature_importance[feature_importance['importance'] > importance_threshold]['feature']
+            )
+            self.features = [f for f in candidate_features if f in important_features]
+            selection_importances = feature_importance.set_index('feature')['importance']
+            record('feature_selection', start)
+        else:
+            self.features = candidate_features
+            selection_importances = None
+        
+        # Fit the final model on the selected features only
+        start = time.perf_counter()
+        final_data = processed_data[self.features]
+        categorical_mask = [f in self.categorical_features for f in self.features]
+        self.model = self.engine.create(categorical_mask, n_jobs=n_jobs)
+        self.model.fit(final_data, labels)
+        if self.model.get_params().get('class_weight') == 'balanced':
+            # Freeze the weights of the full training set, so trees added
+            # later by add_trees are not balanced on a small update alone
+            classes, counts = np.unique(labels, return_counts=True)
+            weights = len(labels) / (len(classes) * counts)
+            self.model.set_params(class_weight=dict(zip(classes.tolist(), weights.tolist())))
+        self.compiled_model = None
+        self._vectorizer = None
+        record('fit', start)
+        
+        # Every engine exposes feature_importances_ so metrics and
+        # explanations work the same way regardless of the model type
+        if not hasattr(self.model, 'feature_importances_'):
+            start = time.perf_counter()
+            if selection_importances is not None and not permutation_importances:
+                # Permutation importance costs more than the fit; the
+                # selection forest ranked these same features moments ago
+                importances = selection_importances[self.features].to_numpy()
+                self.model.feature_importances_ = importances / importances.sum()
+            else:
+                self.model.feature_importances_ = self.engine.feature_importances(
+                    self.model, final_data, labels, n_jobs=n_jobs
+                )
+            record('feature_importance', start)
+        self.feature_importances = self.model.feature_importances_
+        self._cache_explanations()
+        
+        self.training_timings = timings
+        print("\nTraining wall time per stage:")
+        for stage, seconds in timings.items():
+            print(f"- {stage}: {seconds:.2f}s")
+    
+    def add_trees(self, training_data, labels, n_trees=20, max_trees=300):
+        """
+        Grow the trained forest with trees fitted on new data only
         
-        print("\nFeature Importance Analysis:")
-        print(feature_importance)
+        The fitted feature pipeline and feature set are reused as-is, so the
+        cost depends on the size of ``training_data`` rather than on the
+        data the model was originally trained on. Once the forest exceeds
+        ``max_trees`` the oldest trees are dropped, so repeated updates
+        slide the ensemble towards recent data. New trees use the class
+        weights stored when the model was trained, whatever the class mix
+        of ``training_data``.
         
-        # Remove features with very low importance
-        important_features = feature_importance[feature_importance['importance'] > 0.01]['feature'].tolist()
-        self.features = [f for f in self.features if f in important_features]
+        Args:
+            training_data (pd.DataFrame): New raw rows
+            labels (pd.Series): Their target labels; must include every
+                class the model knows so the new trees share its class order
+            n_trees (int): Number of trees to add
+            max_trees (int): Maximum size of the forest after the update
+        """
+        if not self.engine.incremental:
+            raise ValueError(f"The {self.engine.name} engine does not support incremental training")
+        labels = np.asarray(labels)
+        model = self.model
+        if set(np.unique(labels)) != set(model.classes_):
+            raise ValueError("Incremental training data must contain exactly the model's classes")
+        if not self.has_class_weights:
+            raise ValueError("The model has no stored class weights; retrain it in full first")
         
-        # Retrain model with important features only
-        self.model.fit(processed_data[self.features], labels)
+        processed_data = self.preprocess_data(training_data)
+        model.set_params(warm_start=True, n_estimators=len(model.estimators_) + n_trees)
+        model.fit(processed_data[self.features], labels)
+        model.set_params(warm_start=False)
+        if len(model.estimators_) > max_trees:
+            model.estimators_ = model.estimators_[-max_trees:]
+            model.set_params(n_estimators=max_trees)
+        
+        self.compiled_model = None
+        self.feature_importances = model.feature_importances_
+        self._cache_explanations()
+    
+    @property
+    def model(self):
+        """The fitted estimator, unpickled on first use if loading was deferred"""
+        if self._model is None and self._model_path is not None:
+            with self._model_lock:
+                if self._model is None:
+                    self._model = joblib.load(self._model_path, mmap_mode=self._model_mmap_mode)
+        return self._model
+    
+    @model.setter
+    def model(self, model):
+        self._model = model
+        self._model_path = None
+    
+    @property
+    def classes(self):
+        """Policy types the model predicts"""
+        scorer = self.compiled_model if self.compiled_model is not None else self.model
+        return [str(c) for c in scorer.classes_]
+    
+    @property
+    def has_class_weights(self):
+        """Whether the model's class weights are fixed values rather than a per-fit preset"""
+        return not isinstance(self.model.get_params().get('class_weight'), str)
+    
+    @property
+    def vectorizer(self):
+        """FeatureVectorizer for the fitted pipeline and selected features, built on first use"""
+        if self._vectorizer is None:
+            self._vectorizer = FeatureVectorizer(self.pipeline, self.features, dtype=self.engine.feature_dtype)
+        return self._vectorizer
     
     def predict(self, user_data):
         """
         Predict policy recommendations for a user with detailed confidence scores
         
         Args:
-            user_data (dict or pd.DataFrame): User profile data or test data
+            user_data (dict, list of dicts or pd.DataFrame): User profile data or test data
             
         Returns:
             list: Ranked list of recommended policy types with scores and explanations
         """
-        # Handle both DataFrame and dict input
-        if isinstance(user_data, dict):
-            user_df = pd.DataFrame([user_data])
-        else:
-            user_df = user_data.copy()
-        
-        # Preprocess user data
-        processed_data = self.preprocess_data(user_df)
-        
-        # Ensure we have all required features
-        missing_features = set(self.features) - set(processed_data.columns)
-        if missing_features:
-            for feature in missing_features:
-                processed_data[feature] = 0
-        
-        # Get probability scores for each class
-        probabilities = self.model.predict_proba(processed_data[self.features])
-        
-        # Get class labels
-        classes = self.model.classes_
+        batch = self.predict_batch(user_data)
+        start = time.perf_counter()
         
         # Create recommendations with scores and explanations
         recommendations = []
-        for i in range(len(processed_data)):
-            sample_recommendations = []
-            for class_idx, prob in enumerate(probabilities[i]):
-                policy_type = classes[class_idx]
-                score = float(prob)
-                
-                # Generate explanation based on feature importance
-                explanation = self._generate_explanation(policy_type, processed_data.iloc[[i]])
-                
-                sample_recommendations.append({
+        for policy_types, scores, confidences, explanation in zip(
+            batch['policy_type'], batch['score'], batch['confidence'], batch['explanation']
+        ):
+            recommendations.append([
+                {
                     'policy_type': policy_type,
-                    'score': score,
-                    'confidence': self._get_confidence_level(score),
+                    'score': float(score),
+                    'confidence': confidence,
                     'explanation': explanation
-                })
-            
-            # Sort by probability score
-            sample_recommendations.sort(key=lambda x: x['score'], reverse=True)
-            recommendations.append(sample_recommendations)
+                }
+                for policy_type, score, confidence in zip(policy_types, scores, confidences)
+            ])
+        self._record_stage('format', start)
         
         # If input was a single dict, return single list of recommendations
         if isinstance(user_data, dict):
@@ -286,50 +449,227 @@ class InsuranceRecommender:
         
         return recommendations
     
-    def _get_confidence_level(self, score):
-        """Determine confidence level based on score"""
-        if score > 0.8:
-            return 'Very High'
-        elif score > 0.6:
-            return 'High'
-        elif score > 0.4:
-            return 'Medium'
-        elif score > 0.2:
-            return 'Low'
+    def predict_batch(self, user_data, attributions=False):
+        """
+        Score a batch of users in one pass over the ``predict_proba`` matrix
+        
+        Args:
+            user_data (dict, list of dicts or pd.DataFrame): User profile
+                data or test data. Dicts are vectorized directly with
+                ``vectorizer``; DataFrames go through ``preprocess_data``.
+            attributions (bool): Explain each row with its own tree-path
+                feature contributions instead of the global importances
+            
+        Returns:
+            dict: Parallel NumPy arrays ranked by score within each row:
+                'policy_type' (n, n_classes), 'score' (n, n_classes),
+                'confidence' (n, n_classes) and 'explanation' (n,). With
+                ``attributions`` also 'contributions' (n, n_features, n_classes)
+                in the model's class order.
+        """
+        start = time.perf_counter()
+        if isinstance(user_data, dict):
+            user_data = [user_data]
+        if isinstance(user_data, pd.DataFrame):
+            processed_data = self.preprocess_data(user_data)
+            
+            # Ensure we have all required features
+            missing_features = set(self.features) - set(processed_data.columns)
+            if missing_features:
+                for feature in missing_features:
+                    processed_data[feature] = 0
+            X = processed_data[self.features].to_numpy()
+            start = self._record_stage('preprocess', start)
         else:
-            return 'Very Low'
-    
-    def _generate_explanation(self, policy_type, processed_data):
-        """Generate explanation for the recommendation based on feature importance"""
-        # Get feature importance for this policy type
-        feature_importance = dict(zip(self.features, self.model.feature_importances_))
+            X = self.vectorizer.transform_batch(user_data)
+            start = self._record_stage('vectorize', start)
+        
+        # Get probability scores for each class
+        if self.compiled_model is not None and len(X) <= COMPILED_MAX_BATCH_SIZE:
+            scorer = self.compiled_model
+            probabilities = scorer.predict_proba(X)
+        else:
+            scorer = self.model
+            probabilities = scorer.predict_proba(pd.DataFrame(X, columns=self.features))
+        
+        # Rank classes by descending probability; stable to keep class order on ties
+        order = np.argsort(-probabilities, axis=1, kind='stable')
+        scores = np.take_along_axis(probabilities, order, axis=1)
         
-        # Get top 3 most important features
-        top_features = sorted(feature_importance.items(), key=lambda x: x[1], reverse=True)[:3]
+        result = {
+            'policy_type': scorer.classes_[order],
+            'score': scores,
+            'confidence': self._get_confidence_levels(scores)
+        }
+        start = self._record_stage('predict_proba', start)
+        
+        if attributions:
+            if not self.engine.supports_attributions:
+                raise ValueError(f"Tree-path attributions are not supported by the {self.engine.name} engine")
+            _, contributions = forest_contributions(self.model, X)
+            # Explain each row by the contributions towards its top-ranked class
+            top_contributions = contributions[np.arange(len(order)), :, order[:, 0]]
+            result['explanation'] = self._generate_attribution_explanations(X, top_contributions)
+            result['contributions'] = contributions
+        else:
+            result['explanation'] = self._generate_explanations(X)
+        self._record_stage('explain', start)
+        
+        return result
+    
+    def _record_stage(self, stage, start):
+        """Report the time since ``start`` to ``on_inference_stage``; returns the current time"""
+        now = time.perf_counter()
+        if self.on_inference_stage is not None:
+            self.on_inference_stage(stage, now - start)
+        return now
+    
+    def _get_confidence_levels(self, scores):
+        """Determine confidence levels for an array of scores"""
+        # A score must be strictly greater than a threshold to reach the next level
+        return CONFIDENCE_LEVELS[np.searchsorted(CONFIDENCE_THRESHOLDS, scores, side='left')]
+    
+    def _cache_explanations(self):
+        """Precompute the global top features and explanation template"""
+        feature_importance = dict(zip(self.features, self.feature_importances))
+        
+        # Get top k most important features
+        self.top_features = sorted(
+            feature_importance.items(), key=lambda x: x[1], reverse=True
+        )[:self.explanation_top_k]
+        self._top_feature_columns = [self.features.index(feature) for feature, _ in self.top_features]
+        self._top_feature_categorical = [feature in self.categorical_features for feature, _ in self.top_features]
+        self._explanation_template = "This recommendation is based on: " + "".join(
+            f"\n- {feature}: {{}} (importance: {importance:.2f})"
+            for feature, importance in self.top_features
+        )
+    
+    def _generate_explanations(self, X):
+        """Generate one explanation per row based on feature importance"""
+        if self.top_features is None:
+            self._cache_explanations()
+        
+        # Category codes are shown as integers even in float rows
+        columns = [
+            X[:, column].astype(np.int64) if categorical else X[:, column]
+            for column, categorical in zip(self._top_feature_columns, self._top_feature_categorical)
+        ]
+        template = self._explanation_template
         
-        explanation = f"This recommendation is based on: "
-        for feature, importance in top_features:
-            value = processed_data[feature].iloc[0]
-            explanation += f"\n- {feature}: {value} (importance: {importance:.2f})"
+        explanations = np.empty(len(X), dtype=object)
+        # str() gives the shortest repr for the row's own dtype (float32 or float64)
+        explanations[:] = [template.format(*map(str, row)) for row in zip(*columns)]
+        return explanations
+    
+    def _generate_attribution_explanations(self, X, contributions):
+        """Generate one explanation per row from its own feature contributions"""
+        k = self.explanation_top_k
+        top_idx = np.argsort(-np.abs(contributions), axis=1, kind='stable')[:, :k]
+        rows = np.arange(len(contributions))[:, None]
+        top_values = X[rows, top_idx]
+        top_contributions = contributions[rows, top_idx]
+        categorical = set(self.categorical_features)
+        
+        explanations = np.empty(len(contributions), dtype=object)
+        for i in range(len(contributions)):
+            explanation = "This recommendation is based on: "
+            for idx, value, contribution in zip(top_idx[i], top_values[i], top_contributions[i]):
+                feature = self.features[idx]
+                if feature in categorical:
+                    value = int(value)
+                explanation += f"\n- {feature}: {value!s} (contribution: {contribution:+.2f})"
+            explanations[i] = explanation
+        
+        return explanations
+    
+    def compile_model(self):
+        """
+        Flatten the trained forest into NumPy arrays used for scoring
         
-        return explanation
+        Returns:
+            CompiledForest: The compiled model, also kept on the recommender
+        """
+        if not self.engine.compilable:
+            raise ValueError(f"The {self.engine.name} engine cannot be compiled")
+        self.compiled_model = CompiledForest.from_model(self.model)
+        return self.compiled_model
     
-    def save_model(self, model_path: str = 'models/insurance_recommender.joblib'):
-        """Save the trained model and preprocessing objects"""
-        os.makedirs('models', exist_ok=True)
-        joblib.dump(self.model, model_path)
-        joblib.dump(self.label_encoders, 'models/label_encoders.joblib')
-        joblib.dump(self.scaler, 'models/scaler.joblib')
+    def save_model(self, model_dir: str = 'models'):
+        """Save the trained model and preprocessing objects into ``model_dir``"""
+        os.makedirs(model_dir, exist_ok=True)
+        joblib.dump(self.model, os.path.join(model_dir, MODEL_FILE))
+        compiled_dir = os.path.join(model_dir, COMPILED_MODEL_DIR)
+        if self.engine.compilable:
+            self.compile_model().save(compiled_dir)
+        elif os.path.exists(compiled_dir):
+            shutil.rmtree(compiled_dir)
+        joblib.dump(self.pipeline, os.path.join(model_dir, PIPELINE_FILE))
+        joblib.dump(self.pipeline.label_encoders, os.path.join(model_dir, LABEL_ENCODERS_FILE))
+        joblib.dump(self.pipeline.scaler, os.path.join(model_dir, SCALER_FILE))
+        joblib.dump({
+            'engine': self.engine.name,
+            'features': self.features,
+            'feature_importances': np.asarray(self.feature_importances)
+        }, os.path.join(model_dir, MODEL_METADATA_FILE))
 
-    def load_model(self, model_path: str = 'models/insurance_recommender.joblib'):
-        """Load the trained model and preprocessing objects"""
+    def load_model(self, model_dir: str = 'models', mmap_mode='r'):
+        """
+        Load the trained model and preprocessing objects from ``model_dir``
+        
+        Args:
+            model_dir: Directory written by save_model
+            mmap_mode: 'r' memory-maps the saved arrays so worker processes
+                share one copy of them through the page cache. When a compiled
+                forest is available the estimator itself is only unpickled on
+                first use (large batches, attributions). None loads everything
+                into private memory up front.
+        """
+        model_path = os.path.join(model_dir, MODEL_FILE)
+        pipeline_path = os.path.join(model_dir, PIPELINE_FILE)
+        metadata_path = os.path.join(model_dir, MODEL_METADATA_FILE)
+        compiled_dir = os.path.join(model_dir, COMPILED_MODEL_DIR)
         if not os.path.exists(model_path):
             raise FileNotFoundError(f"No pre-trained model found at {model_path}")
-        if not os.path.exists('models/label_encoders.joblib'):
-            raise FileNotFoundError("No label encoders found")
-        if not os.path.exists('models/scaler.joblib'):
-            raise FileNotFoundError("No scaler found")
-            
-        self.model = joblib.load(model_path)
-        self.label_encoders = joblib.load('models/label_encoders.joblib')
-        self.scaler = joblib.load('models/scaler.joblib') 
\ No newline at end of file
+        if not os.path.exists(pipeline_path):
+            raise FileNotFoundError("No feature pipeline found")
+        
+        defer = (
+            mmap_mode is not None
+            and os.path.exists(metadata_path)
+            and os.path.exists(compiled_dir)
+        )
+        if defer:
+            metadata = joblib.load(metadata_path)
+            self.model = None
+            self._model_path = model_path
+            self._model_mmap_mode = mmap_mode
+            self.engine = get_engine(metadata['engine'])
+            self.features = list(metadata['features'])
+            self.feature_importances = metadata['feature_importances']
+        else:
+            self.model = joblib.load(model_path, mmap_mode=mmap_mode)
+            self.engine = engine_for_model(self.model)
+            # The model may have been trained on a reduced feature set
+            if hasattr(self.model, 'feature_names_in_'):
+                self.features = list(self.model.feature_names_in_)
+            self.feature_importances = self.model.feature_importances_
+        self.pipeline = joblib.load(pipeline_path)
+        self._vectorizer = None
+        
+        # Score with the compiled forest when one was saved
+        self.compiled_model = None
+        if self.engine.compilable and os.path.exists(compiled_dir):
+            self.compiled_model = CompiledForest.load(compiled_dir, mmap_mode=mmap_mode)
+        self._cache_explanations()
+    
+    def typical_profile(self):
+        """A profile of training medians and most frequent categories"""
+        pipeline = self.pipeline
+        return {**pipeline.numerical_medians, **pipeline.numerical_defaults, **pipeline.category_modes}
+    
+    def warm_up(self):
+        """
+        Score one typical profile so the first real request does not pay for
+        lazy initialisation (page faults on mapped arrays, pandas caches)
+        """
+        self.predict_batch(pd.DataFrame([self.typical_profile()]))
@@ -1,41 +1,280 @@
-from insurance_recommender import InsuranceRecommender
+from insurance_recommender import InsuranceRecommender, MODEL_FILE
+from metrics import MetricsRegistry, BATCH_SIZE_BUCKETS, counter, gauge
+from model_registry import ModelRegistry
+from prediction_cache import PredictionCache, profile_cache_key
+from profile_store import ProfileStore
+from training_data import read_training_data, training_columns, apply_schema, LABEL_COLUMN
+import numpy as np
 import pandas as pd
 import os
+import threading
+import time
 from typing import Dict, List, Optional
 import logging
 
+# Incremental retraining: trees added per update, forest size cap (oldest
+# trees are dropped beyond it), updates allowed before a periodic full
+# refit, tolerated holdout accuracy loss before the drift guard forces a
+# full retrain, and the size of the holdout / replay samples kept with
+# every model bundle.
+INCREMENTAL_TRAINING_PARAMS = {
+    'n_trees': 20,
+    'max_trees': 300,
+    'full_retrain_every': 10,
+    'max_accuracy_drop': 0.02,
+    'min_drift_rows': 50,
+    'max_delta_fraction': 0.2,
+    'holdout_rows': 2000,
+    'replay_rows': 2000
+}
+
+
+def _stratified_sample(df: pd.DataFrame, n: int, seed: int = 42) -> pd.DataFrame:
+    """Up to ``n`` rows spread evenly over the label classes"""
+    per_class = max(n // max(df[LABEL_COLUMN].nunique(), 1), 1)
+    shuffled = df.sample(frac=1.0, random_state=seed)
+    return shuffled.groupby(LABEL_COLUMN, observed=True).head(per_class)
+
+
+def _holdout_sample(df: pd.DataFrame, n: int, max_fraction: float = 0.1, seed: int = 42) -> pd.DataFrame:
+    """About ``n`` rows, never more than ``max_fraction`` of any class, in class proportions"""
+    fraction = min(max_fraction, n / max(len(df), 1))
+    return df.groupby(LABEL_COLUMN, observed=True).sample(frac=fraction, random_state=seed)
+
+
+def _accuracy(recommender: InsuranceRecommender, df: pd.DataFrame) -> Optional[float]:
+    if len(df) == 0:
+        return None
+    predicted = recommender.predict_batch(df.drop(columns=[LABEL_COLUMN]))['policy_type'][:, 0]
+    return float((predicted == df[LABEL_COLUMN].astype(str).to_numpy()).mean())
+
+
 class InsuranceMLIntegration:
-    def __init__(self, model_path: str = 'models/insurance_recommender.joblib'):
+    def __init__(
+        self,
+        model_dir: str = 'models',
+        cache_size: int = 1024,
+        cache_ttl: float = 300.0,
+        profile_store_path: str = 'profiles.db',
+        engine: str = 'random_forest',
+        mmap_models: bool = True,
+        keep_versions: int = 5,
+        metrics: Optional[MetricsRegistry] = None
+    ):
         """
         Initialize the ML integration service
         
         Args:
-            model_path: Path to the saved model file
+            model_dir: Root of the versioned model registry
+            cache_size: Maximum number of cached predictions (0 disables the cache)
+            cache_ttl: Seconds a cached prediction stays valid
+            profile_store_path: Path to the SQLite user profile store
+            engine: Model engine used when training ('random_forest' or
+                'hist_gradient_boosting'); loaded models keep their own engine
+            mmap_models: Memory-map saved model arrays so that several worker
+                processes share them instead of each holding a private copy
+            keep_versions: Number of model bundles kept after each training run
+            metrics: Registry the inference metrics are recorded in (default: a new one)
         """
-        self.model_path = model_path
-        self.recommender = None
+        self.model_dir = model_dir
+        self.registry = ModelRegistry(model_dir)
+        self.keep_versions = keep_versions
+        # (version, recommender) is swapped as one tuple so a request never
+        # pairs a model with another version's preprocessing or cache keys
+        self._active = (None, None)
+        self._load_lock = threading.Lock()
+        # Reported by the readiness probe
+        self.model_loaded_at: Optional[float] = None
+        self.model_load_seconds: Optional[float] = None
+        self.last_inference_at: Optional[float] = None
+        self.cache = PredictionCache(max_size=cache_size, ttl_seconds=cache_ttl)
+        self.profile_store_path = profile_store_path
+        self.engine = engine
+        self.mmap_models = mmap_models
+        self._profile_store = None
         self.logger = logging.getLogger(__name__)
         
-    def initialize_model(self) -> bool:
+        self.metrics = metrics or MetricsRegistry()
+        self._stage_seconds = self.metrics.histogram(
+            'ml_inference_stage_seconds',
+            'Time spent in each stage of scoring a batch of profiles',
+            labelnames=('stage',)
+        )
+        self._batch_rows = self.metrics.histogram(
+            'ml_inference_batch_rows', 'Profiles scored per model call', buckets=BATCH_SIZE_BUCKETS
+        )
+        self._inference_errors = self.metrics.counter(
+            'ml_inference_errors', 'Recommendation calls that failed with an exception'
+        )
+        # stage -> histogram child, looked up once per stage
+        self._stage_histograms = {}
+        self.metrics.add_collector(self._collect_metrics)
+    
+    @property
+    def recommender(self) -> Optional[InsuranceRecommender]:
+        """The recommender currently serving requests"""
+        return self._active[1]
+    
+    @property
+    def model_version(self) -> Optional[str]:
+        """Registry version of the serving recommender"""
+        return self._active[0]
+    
+    def _serving(self):
+        """The active (version, recommender) pair, loading the current model if needed"""
+        if self._active[1] is None:
+            self.initialize_model()
+        return self._active
+    
+    @property
+    def profile_store(self) -> ProfileStore:
+        """User profile store, opened on first use"""
+        if self._profile_store is None:
+            self._profile_store = ProfileStore(self.profile_store_path)
+        return self._profile_store
+        
+    def initialize_model(self, version: Optional[str] = None) -> bool:
         """
-        Initialize the ML model
+        Load a model version and swap it in once it is ready
+        
+        The new version is loaded, verified and warmed up while the previous
+        one keeps serving; the swap itself is a single assignment.
+        
+        Args:
+            version: Registry version to serve (default: the registry's current one)
         
         Returns:
             bool: True if initialization successful, False otherwise
         """
         try:
-            self.recommender = InsuranceRecommender()
-            if os.path.exists(self.model_path):
-                self.recommender.load_model(self.model_path)
-                self.logger.info("Model loaded successfully")
+            with self._load_lock:
+                start = time.perf_counter()
+                mmap_mode = 'r' if self.mmap_models else None
+                version = version or self.registry.current_version()
+                if version is None:
+                    # Models saved before the registry existed sit directly in model_dir
+                    legacy_path = os.path.join(self.model_dir, MODEL_FILE)
+                    if not os.path.exists(legacy_path):
+                        self.logger.warning("Model file not found. Please train the model first.")
+                        return False
+                    stat = os.stat(legacy_path)
+                    version = f"legacy-{stat.st_mtime_ns:x}"
+                    recommender = InsuranceRecommender()
+                    recommender.load_model(self.model_dir, mmap_mode=mmap_mode)
+                elif version == self.model_version:
+                    return True
+                else:
+                    recommender = self.registry.load(version, mmap_mode=mmap_mode)
+                recommender.warm_up()
+                self._swap(version, recommender, load_seconds=time.perf_counter() - start)
+                self.logger.info(f"Model {version} loaded successfully")
                 return True
-            else:
-                self.logger.warning("Model file not found. Please train the model first.")
-                return False
         except Exception as e:
             self.logger.error(f"Error initializing model: {str(e)}")
             return False
     
+    def sync_with_registry(self) -> bool:
+        """
+        Serve the registry's current version if another process changed it
+        
+        Training jobs, activations and rollbacks handled by another worker
+        only update the registry's CURRENT file; each worker calls this
+        periodically to follow it.
+        
+        Returns:
+            bool: True if a different version was loaded
+        """
+        current = self.registry.current_version()
+        if current is None or current == self.model_version:
+            return False
+        self.logger.info(f"Registry switched to model {current}; loading it")
+        return self.initialize_model(current)
+    
+    def _swap(self, version: str, recommender: InsuranceRecommender, load_seconds: Optional[float] = None):
+        recommender.on_inference_stage = self._observe_stage
+        self._active = (version, recommender)
+        self.model_loaded_at = time.time()
+        self.model_load_seconds = load_seconds
+        # Entries are keyed by version, so old ones can no longer be hit
+        self.cache.clear()
+    
+    def _observe_stage(self, stage: str, seconds: float):
+        histogram = self._stage_histograms.get(stage)
+        if histogram is None:
+            histogram = self._stage_histograms[stage] = self._stage_seconds.labels(stage)
+        histogram.observe(seconds)
+    
+    def _collect_metrics(self):
+        """Scrape-time metrics: the serving model and prediction cache statistics"""
+        version, recommender = self._active
+        families = []
+        if recommender is not None:
+            families.append(gauge(
+                'ml_model_info', 'The serving model version and engine', 1,
+                {'version': version, 'engine': recommender.engine.name}
+            ))
+        for name, documentation, value in [
+            ('ml_model_loaded_timestamp_seconds', 'When the serving model was swapped in', self.model_loaded_at),
+            ('ml_model_load_seconds', 'Time taken to load and warm up the serving model', self.model_load_seconds),
+            ('ml_last_inference_timestamp_seconds', 'When the model last scored a profile', self.last_inference_at)
+        ]:
+            if value is not None:
+                families.append(gauge(name, documentation, value))
+        
+        stats = self.cache.stats()
+        for key in ('hits', 'misses', 'evictions', 'expirations', 'invalidations'):
+            families.append(counter(f'ml_prediction_cache_{key}_total', f'Prediction cache {key}', stats[key]))
+        families.append(gauge('ml_prediction_cache_entries', 'Entries in the prediction cache', stats['size']))
+        return families
+    
+    def activate_version(self, version: str) -> bool:
+        """
+        Make a published version the registry's current one and serve it
+        
+        Args:
+            version: Registry version to activate
+        
+        Returns:
+            bool: True if the version is now serving, False otherwise
+        """
+        try:
+            self.registry.activate(version)
+        except Exception as e:
+            self.logger.error(f"Error activating model {version}: {str(e)}")
+            return False
+        return self.initialize_model(version)
+    
+    def rollback(self) -> bool:
+        """
+        Serve the version published before the current one
+        
+        Returns:
+            bool: True if rolled back, False if there is no earlier version
+        """
+        previous = self.registry.previous_version(self.model_version)
+        if previous is None:
+            self.logger.error("No earlier model version to roll back to")
+            return False
+        return self.activate_version(previous)
+    
+    def list_model_versions(self) -> List[Dict]:
+        """
+        Summaries of all published model versions, oldest first
+        
+        Returns:
+            List of manifests without their file checksums, with an 'active' flag
+        """
+        try:
+            versions = []
+            for manifest in self.registry.list_versions():
+                summary = {k: v for k, v in manifest.items() if k not in ('files', 'features')}
+                summary['active'] = manifest['version'] == self.model_version
+                versions.append(summary)
+            return versions
+        except Exception as e:
+            self.logger.error(f"Error listing model versions: {str(e)}")
+            return []
+    
     def get_recommendations(self, user_profile: Dict) -> List[Dict]:
         """
         Get policy recommendations for a user profile
@@ -47,22 +286,99 @@ class InsuranceMLIntegration:
             List of recommended policies with scores and explanations
         """
         try:
-            if not self.recommender:
-                if not self.initialize_model():
-                    return []
+            version, recommender = self._serving()
+            if recommender is None:
+                return []
             
-            recommendations = self.recommender.predict(user_profile)
+            key = profile_cache_key(user_profile, version)
+            recommendations = self.cache.get(key)
+            if recommendations is None:
+                recommendations = recommender.predict(user_profile)
+                self._batch_rows.observe(1)
+                self.last_inference_at = time.time()
+                self.cache.put(key, recommendations)
             return recommendations
         except Exception as e:
+            self._inference_errors.inc()
             self.logger.error(f"Error getting recommendations: {str(e)}")
             return []
     
-    def train_model(self, data_path: str = 'insurance_training_data.csv') -> bool:
+    def get_batch_recommendations(self, user_profiles: List[Dict]) -> List[List[Dict]]:
+        """
+        Get policy recommendations for several user profiles in one model call
+        
+        Args:
+            user_profiles: List of dictionaries containing user profile data
+            
+        Returns:
+            One list of recommended policies per profile, in input order
+        """
+        try:
+            version, recommender = self._serving()
+            if recommender is None:
+                return [[] for _ in user_profiles]
+            
+            keys = [profile_cache_key(profile, version) for profile in user_profiles]
+            results = [self.cache.get(key) for key in keys]
+            
+            # Only score the profiles that missed the cache
+            misses = [i for i, result in enumerate(results) if result is None]
+            if misses:
+                scored = recommender.predict([user_profiles[i] for i in misses])
+                self._batch_rows.observe(len(misses))
+                self.last_inference_at = time.time()
+                for i, recommendations in zip(misses, scored):
+                    results[i] = recommendations
+                    self.cache.put(keys[i], recommendations)
+            return results
+        except Exception as e:
+            self._inference_errors.inc()
+            self.logger.error(f"Error getting batch recommendations: {str(e)}")
+            return [[] for _ in user_profiles]
+    
+    def self_test(self) -> Dict:
+        """
+        Score a typical profile end to end with the serving model
+        
+        Bypasses the prediction cache, so the preprocessing pipeline, the
+        model and the explanation formatting all run. Checks that the policy
+        scores are finite and sum to one.
+        
+        Returns:
+            Dictionary with 'passed', 'model_version', 'checked_at',
+            'duration_ms' and 'error' (None when the test passed)
+        """
+        version, recommender = self._active
+        result = {'passed': False, 'model_version': version, 'checked_at': time.time(), 'error': None}
+        start = time.perf_counter()
+        try:
+            if recommender is None:
+                raise RuntimeError("No model loaded")
+            profile = recommender.typical_profile()
+            if not profile:
+                raise ValueError("The model has no typical profile to score")
+            recommendations = recommender.predict(profile)
+            if not recommendations:
+                raise ValueError("No policy types were scored")
+            scores = np.array([r['score'] for r in recommendations])
+            if not np.all(np.isfinite(scores)) or not np.isclose(scores.sum(), 1.0):
+                raise ValueError("Policy scores are not a probability distribution")
+            result['passed'] = True
+        except Exception as e:
+            result['error'] = str(e)
+            self.logger.error(f"Model self-test failed: {str(e)}")
+        result['duration_ms'] = (time.perf_counter() - start) * 1000
+        return result
+    
+    def train_model(self, data_path: str = 'insurance_training_data.csv', mode: str = 'full') -> bool:
         """
         Train the model with new data
         
         Args:
-            data_path: Path to the training data file
+            data_path: Path to the training data file (CSV or Parquet)
+            mode: 'full' refits from scratch; 'incremental' adds trees fitted
+                on profiles changed since the serving version (see
+                publish_trained_model)
             
         Returns:
             bool: True if training successful, False otherwise
@@ -72,58 +388,229 @@ class InsuranceMLIntegration:
                 self.logger.error(f"Training data file not found: {data_path}")
                 return False
             
-            # Load and preprocess data
-            df = pd.read_csv(data_path)
-            X = df.drop(columns=['recommended_policy'])
-            y = df['recommended_policy']
-            
-            # Initialize and train model
-            self.recommender = InsuranceRecommender()
-            self.recommender.train(X, y)
-            
-            # Save model
-            self.recommender.save_model(self.model_path)
-            self.logger.info("Model trained and saved successfully")
+            version, recommender = self.publish_trained_model(data_path, mode=mode)
+            self.registry.activate(version)
+            self.registry.prune(self.keep_versions, in_use=[self.model_version])
+            self._swap(version, recommender)
+            self.logger.info(f"Model {version} trained and saved successfully")
             return True
         except Exception as e:
             self.logger.error(f"Error training model: {str(e)}")
             return False
     
+    def publish_trained_model(self, data_path: str, on_stage=None, mode: str = 'full'):
+        """
+        Train a new model and publish it to the registry without activating it
+        
+        The new model is built on the side; the serving one is untouched.
+        In 'incremental' mode only labelled profiles updated since the
+        current version was trained are read, and trees fitted on them are
+        added to that version's forest. A full retrain is done instead when
+        there is no suitable base version, the change is too large, too many
+        incremental updates were stacked, or the drift guard trips.
+        
+        Args:
+            data_path: Path to the training data file (CSV or Parquet)
+            on_stage: Called with (stage, seconds) as each stage finishes
+            mode: 'full' or 'incremental'
+            
+        Returns:
+            Tuple of the published version and the trained recommender
+        """
+        if mode not in ('full', 'incremental'):
+            raise ValueError(f"Unknown training mode: {mode}")
+        full_retrain_reason = None
+        if mode == 'incremental':
+            version, recommender, full_retrain_reason = self._publish_incremental(on_stage)
+            if version is not None:
+                return version, recommender
+            self.logger.info(f"Falling back to a full retrain: {full_retrain_reason}")
+        
+        start = time.perf_counter()
+        # Rows updated after this point are picked up by the next incremental run
+        profiles_updated_until = time.time()
+        # Load only the raw columns the model is trained on
+        recommender = InsuranceRecommender(engine=self.engine)
+        df = read_training_data(data_path, columns=training_columns(recommender.features))
+        
+        # Include labelled profiles collected through update_user_profile
+        if os.path.exists(self.profile_store_path):
+            profiles = self.profile_store.export_dataframe(labelled_only=True)
+            if len(profiles):
+                df = pd.concat([df, apply_schema(profiles[df.columns])], ignore_index=True)
+            self.profile_store.compact()
+        
+        # Keep a stratified holdout out of training for the drift guard
+        params = INCREMENTAL_TRAINING_PARAMS
+        holdout = _holdout_sample(df, params['holdout_rows'])
+        df = df.drop(index=holdout.index)
+        X = df.drop(columns=[LABEL_COLUMN])
+        y = df[LABEL_COLUMN].astype(str)
+        if on_stage is not None:
+            on_stage('load_data', time.perf_counter() - start)
+        
+        recommender.train(X, y, on_stage=on_stage)
+        
+        start = time.perf_counter()
+        version = self.registry.publish(
+            recommender,
+            metadata={
+                'training_mode': 'full',
+                'training_rows': len(df),
+                'holdout_accuracy': _accuracy(recommender, holdout),
+                'incremental_steps': 0,
+                'profiles_updated_until': profiles_updated_until,
+                'full_retrain_reason': full_retrain_reason
+            },
+            datasets={
+                'holdout': holdout.reset_index(drop=True),
+                'replay': _stratified_sample(df, params['replay_rows']).reset_index(drop=True)
+            }
+        )
+        if on_stage is not None:
+            on_stage('publish', time.perf_counter() - start)
+        return version, recommender
+    
+    def _publish_incremental(self, on_stage=None):
+        """
+        Publish the current version plus trees fitted on changed profiles
+        
+        Returns:
+            Tuple of (version, recommender, None) on success, or
+            (None, None, reason) when a full retrain is needed instead
+        """
+        params = INCREMENTAL_TRAINING_PARAMS
+        start = time.perf_counter()
+        base_version = self.registry.current_version()
+        if base_version is None:
+            return None, None, "no current model version"
+        base = self.registry.manifest(base_version)
+        holdout = self.registry.load_dataset(base_version, 'holdout')
+        replay = self.registry.load_dataset(base_version, 'replay')
+        if holdout is None or replay is None or base.get('profiles_updated_until') is None:
+            return None, None, f"version {base_version} has no incremental training state"
+        if base.get('incremental_steps', 0) >= params['full_retrain_every']:
+            return None, None, f"{base['incremental_steps']} incremental updates since the last full retrain"
+        
+        profiles_updated_until = time.time()
+        delta = pd.DataFrame(columns=replay.columns)
+        if os.path.exists(self.profile_store_path):
+            delta = self.profile_store.export_dataframe(
+                labelled_only=True, updated_since=base['profiles_updated_until']
+            )
+            delta = apply_schema(delta[replay.columns])
+        recommender = self.registry.load(base_version, mmap_mode=None)
+        if len(delta) == 0:
+            self.logger.info(f"No profile changes since {base_version}; nothing to train")
+            return base_version, recommender, None
+        if not recommender.engine.incremental:
+            return None, None, f"the {recommender.engine.name} engine does not support incremental training"
+        if len(delta) > params['max_delta_fraction'] * base['training_rows']:
+            return None, None, f"{len(delta)} changed rows is too large a change for an incremental update"
+        labels = set(delta[LABEL_COLUMN].astype(str))
+        if not labels <= set(recommender.model.classes_):
+            return None, None, f"new policy types {sorted(labels - set(recommender.model.classes_))}"
+        if not recommender.has_class_weights:
+            return None, None, f"version {base_version} has no stored class weights"
+        
+        # A fifth of the change is held out to check the model on new data
+        delta = delta.sample(frac=1.0, random_state=42)
+        n_holdout = len(delta) // 5
+        delta_holdout, delta_train = delta.iloc[:n_holdout], delta.iloc[n_holdout:]
+        if on_stage is not None:
+            on_stage('load_data', time.perf_counter() - start)
+        
+        # Replayed rows keep every class represented in the new trees
+        start = time.perf_counter()
+        evaluation = pd.concat([holdout, delta_holdout], ignore_index=True)
+        base_accuracy = _accuracy(recommender, evaluation)
+        base_new_data_accuracy = _accuracy(recommender, delta_holdout)
+        update = pd.concat([replay, delta_train], ignore_index=True)
+        recommender.add_trees(
+            update.drop(columns=[LABEL_COLUMN]), update[LABEL_COLUMN].astype(str),
+            n_trees=params['n_trees'], max_trees=params['max_trees']
+        )
+        if on_stage is not None:
+            on_stage('fit', time.perf_counter() - start)
+        
+        # Drift guard: fall back to a full retrain if the updated model is
+        # worse on the holdout, or the base model is clearly worse on new data
+        start = time.perf_counter()
+        accuracy = _accuracy(recommender, evaluation)
+        if on_stage is not None:
+            on_stage('drift_check', time.perf_counter() - start)
+        if accuracy < base_accuracy - params['max_accuracy_drop']:
+            return None, None, f"holdout accuracy would drop from {base_accuracy:.3f} to {accuracy:.3f}"
+        if (
+            len(delta_holdout) >= params['min_drift_rows']
+            and base_new_data_accuracy < base['holdout_accuracy'] - params['max_accuracy_drop']
+        ):
+            return None, None, (
+                f"accuracy on new profiles is {base_new_data_accuracy:.3f}, "
+                f"below the holdout accuracy of {base['holdout_accuracy']:.3f}"
+            )
+        
+        start = time.perf_counter()
+        version = self.registry.publish(
+            recommender,
+            metadata={
+                'training_mode': 'incremental',
+                'base_version': base_version,
+                'training_rows': base['training_rows'] + len(delta_train),
+                'delta_rows': len(delta),
+                'holdout_accuracy': accuracy,
+                'incremental_steps': base.get('incremental_steps', 0) + 1,
+                'profiles_updated_until': profiles_updated_until
+            },
+            datasets={
+                'holdout': evaluation,
+                'replay': _stratified_sample(update, params['replay_rows']).reset_index(drop=True)
+            }
+        )
+        if on_stage is not None:
+            on_stage('publish', time.perf_counter() - start)
+        return version, recommender, None
+    
     def update_user_profile(self, user_id: str, user_profile: Dict) -> bool:
         """
-        Update user profile in the training data
+        Insert or update a user profile in the profile store
         
         Args:
             user_id: Unique identifier for the user
-            user_profile: Updated user profile data
+            user_profile: Updated user profile data; may include a
+                'recommended_policy' label to use the row for training
             
         Returns:
             bool: True if update successful, False otherwise
+            
+        Raises:
+            ValueError: If the label is not a policy type the serving model knows
         """
+        label = user_profile.get('recommended_policy')
+        if label is not None:
+            policy_types = self.policy_types()
+            if policy_types and label not in policy_types:
+                raise ValueError(f"Unknown policy type '{label}'. Choose from: {', '.join(policy_types)}")
         try:
-            data_path = 'insurance_training_data.csv'
-            if not os.path.exists(data_path):
-                self.logger.error("Training data file not found")
-                return False
-            
-            # Load existing data
-            df = pd.read_csv(data_path)
-            
-            # Update or add user profile
-            if user_id in df['user_id'].values:
-                df.loc[df['user_id'] == user_id, user_profile.keys()] = user_profile.values()
-            else:
-                new_row = {'user_id': user_id, **user_profile}
-                df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
-            
-            # Save updated data
-            df.to_csv(data_path, index=False)
+            self.profile_store.upsert(user_id, user_profile)
             self.logger.info(f"User profile updated for user_id: {user_id}")
             return True
         except Exception as e:
             self.logger.error(f"Error updating user profile: {str(e)}")
             return False
     
+    def policy_types(self) -> List[str]:
+        """
+        Policy types the serving model recommends
+        
+        Returns:
+            List of class labels, or an empty list if no model is loaded
+        """
+        version, recommender = self._serving()
+        if recommender is None:
+            return []
+        return recommender.classes
+    
     def get_model_metrics(self) -> Dict:
         """
         Get model performance metrics
@@ -132,21 +619,47 @@ class InsuranceMLIntegration:
             Dictionary containing model metrics
         """
         try:
-            if not self.recommender:
-                if not self.initialize_model():
-                    return {}
+            version, recommender = self._serving()
+            if recommender is None:
+                return {}
             
             # Get feature importance
             feature_importance = pd.DataFrame({
-                'feature': self.recommender.features,
-                'importance': self.recommender.model.feature_importances_
+                'feature': recommender.features,
+                'importance': recommender.feature_importances
             }).sort_values('importance', ascending=False)
             
             return {
                 'feature_importance': feature_importance.to_dict('records'),
-                'model_type': type(self.recommender.model).__name__,
-                'n_features': len(self.recommender.features)
+                'model_type': recommender.engine.model_type,
+                'engine': recommender.engine.name,
+                'n_features': len(recommender.features),
+                'model_version': version,
+                'cache': self.cache.stats()
             }
         except Exception as e:
             self.logger.error(f"Error getting model metrics: {str(e)}")
-            return {} 
\ No newline at end of file
+            return {} 
+
+def run_training(
+    model_dir: str,
+    data_path: str,
+    profile_store_path: str = 'profiles.db',
+    engine: str = 'random_forest',
+    on_stage=None,
+    mode: str = 'full'
+) -> str:
+    """
+    Train and publish a model in a fresh integration instance
+
+    Module-level so it can run in a separate process. The new version is
+    published but not activated; the caller activates and loads it.
+
+    Returns:
+        The published version
+    """
+    integration = InsuranceMLIntegration(
+        model_dir=model_dir, profile_store_path=profile_store_path, engine=engine
+    )
+    version, _ = integration.publish_trained_model(data_path, on_stage=on_stage, mode=mode)
+    return version
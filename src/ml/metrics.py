@@ -0,0 +1,291 @@
+import math
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Default histogram buckets: latencies in seconds from 50us to 10s
+LATENCY_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+# Rows per model call
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 4096)
+
+# A collected sample: (sample name, labels, value)
+Sample = Tuple[str, Dict[str, str], float]
+# A collected metric family: (name, type, help, samples)
+Family = Tuple[str, str, str, List[Sample]]
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value))
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def gauge(name: str, documentation: str, value: float, labels: Optional[Dict[str, str]] = None) -> Family:
+    """A single-sample gauge family, for collectors"""
+    return (name, 'gauge', documentation, [(name, labels or {}, value)])
+
+
+def counter(name: str, documentation: str, value: float) -> Family:
+    """A single-sample counter family, for collectors; ``name`` should end in ``_total``"""
+    return (name, 'counter', documentation, [(name, {}, value)])
+
+
+class _ThreadShards:
+    """
+    One list of values per thread, summed when read
+
+    Each thread only ever writes its own list, so updates need no lock;
+    a lock would cost more than the update itself on the request path.
+    """
+
+    def __init__(self, size: int):
+        self._size = size
+        self._local = threading.local()
+        self._shards = []
+        self._lock = threading.Lock()
+
+    def mine(self) -> list:
+        try:
+            return self._local.values
+        except AttributeError:
+            values = self._local.values = [0] * self._size
+            with self._lock:
+                self._shards.append(values)
+            return values
+
+    def totals(self) -> list:
+        with self._lock:
+            shards = list(self._shards)
+        return [sum(column) for column in zip(*shards)] if shards else [0] * self._size
+
+
+class _CounterChild:
+    def __init__(self):
+        self._shards = _ThreadShards(1)
+
+    def inc(self, amount: float = 1):
+        self._shards.mine()[0] += amount
+
+    def samples(self, name, labels):
+        return [(name, labels, self._shards.totals()[0])]
+
+
+class _HistogramChild:
+    def __init__(self, upper_bounds):
+        self._upper_bounds = upper_bounds
+        # Per-bucket (not cumulative) counts, the +Inf bucket, then the sum
+        self._shards = _ThreadShards(len(upper_bounds) + 2)
+
+    def observe(self, value: float):
+        values = self._shards.mine()
+        values[bisect_left(self._upper_bounds, value)] += 1
+        values[-1] += value
+
+    def samples(self, name, labels):
+        totals = self._shards.totals()
+        samples, cumulative = [], 0
+        for bound, count in zip(self._upper_bounds + (math.inf,), totals[:-1]):
+            cumulative += count
+            samples.append((f'{name}_bucket', {**labels, 'le': _format_value(bound)}, cumulative))
+        samples.append((f'{name}_sum', labels, totals[-1]))
+        samples.append((f'{name}_count', labels, cumulative))
+        return samples
+
+
+class _Metric:
+    type_name = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._default = self.labels()
+
+    def labels(self, *values: str):
+        """
+        The child metric for one combination of label values
+
+        Look children up once and keep them on hot paths.
+        """
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def samples(self) -> List[Sample]:
+        samples = []
+        for values, child in list(self._children.items()):
+            samples.extend(child.samples(self.name, dict(zip(self.labelnames, values))))
+        return samples
+
+
+class Counter(_Metric):
+    """Monotonically increasing count; its name always ends in ``_total``"""
+
+    type_name = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name if name.endswith('_total') else f'{name}_total', documentation, labelnames)
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1):
+        self._default.inc(amount)
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in fixed cumulative buckets"""
+
+    type_name = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets=LATENCY_BUCKETS):
+        self.upper_bounds = tuple(sorted(float(b) for b in buckets if not math.isinf(b)))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.upper_bounds)
+
+    def observe(self, value: float):
+        self._default.observe(value)
+
+
+class MetricsRegistry:
+    """
+    Metrics of one process, rendered in the Prometheus text format
+
+    Counters and histograms are updated as events happen. Values that
+    already live elsewhere (cache statistics, queue lengths, the model
+    version) are read at scrape time by collectors instead, which costs
+    nothing per request.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], Iterable[Family]]] = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metric {metric.name} is already registered with another type or labels")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(
+        self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets=LATENCY_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collect: Callable[[], Iterable[Family]]):
+        """
+        Register a scrape-time collector
+
+        Args:
+            collect: Returns (name, type, help, samples) families; see gauge()
+                and counter() for single-value ones
+        """
+        self._collectors.append(collect)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format (version 0.0.4)"""
+        families = [
+            (metric.name, metric.type_name, metric.documentation, metric.samples())
+            for metric in list(self._metrics.values())
+        ]
+        for collect in self._collectors:
+            families.extend(collect())
+
+        lines = []
+        for name, type_name, documentation, samples in families:
+            lines.append(f'# HELP {name} {documentation}')
+            lines.append(f'# TYPE {name} {type_name}')
+            for sample_name, labels, value in samples:
+                lines.append(f'{sample_name}{_format_labels(labels)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+class RequestMetricsMiddleware:
+    """
+    ASGI middleware counting HTTP requests and timing them per route
+
+    Routes are labelled by their path template (``/train/jobs/{job_id}``),
+    so label cardinality stays bounded. Requests matching no route share
+    the label ``unmatched``.
+    """
+
+    def __init__(self, app, registry: MetricsRegistry):
+        self.app = app
+        self._requests = registry.counter(
+            'ml_http_requests', 'HTTP requests by method, route and status', ('method', 'route', 'status')
+        )
+        self._duration = registry.histogram(
+            'ml_http_request_duration_seconds',
+            'Time from receiving a request until its response completed, including validation and serialization',
+            ('method', 'route')
+        )
+        # Only touched on the event loop thread
+        self._in_flight = 0
+        # (method, route path, status) -> (duration histogram, request counter)
+        self._children = {}
+        registry.add_collector(lambda: [
+            gauge('ml_http_requests_in_flight', 'HTTP requests being handled', self._in_flight)
+        ])
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        start = time.perf_counter()
+        self._in_flight += 1
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self._in_flight -= 1
+            key = (scope['method'], getattr(scope.get('route'), 'path', 'unmatched'), status)
+            children = self._children.get(key)
+            if children is None:
+                children = self._children[key] = (
+                    self._duration.labels(key[0], key[1]),
+                    self._requests.labels(key[0], key[1], str(status))
+                )
+            children[0].observe(time.perf_counter() - start)
+            children[1].inc()
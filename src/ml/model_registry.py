@@ -0,0 +1,260 @@
+import hashlib
+import json
+import os
+import secrets
+import shutil
+import time
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from insurance_recommender import InsuranceRecommender
+from training_data import read_training_data, write_training_data
+
+MANIFEST_FILE = 'manifest.json'
+CURRENT_FILE = 'CURRENT'
+PREVIOUS_FILE = 'PREVIOUS'
+VERSIONS_DIR = 'versions'
+DATASETS_DIR = 'datasets'
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _bundle_files(bundle_dir: str) -> List[str]:
+    """Relative paths of every file in a bundle except its manifest"""
+    files = []
+    for root, _, names in os.walk(bundle_dir):
+        for name in names:
+            path = os.path.relpath(os.path.join(root, name), bundle_dir)
+            if path != MANIFEST_FILE:
+                files.append(path)
+    return sorted(files)
+
+
+class ModelRegistry:
+    """
+    Directory of immutable, versioned model bundles
+
+    Every published model lives in ``<root>/versions/<version>/`` with the
+    files written by InsuranceRecommender.save_model, optional small
+    datasets kept with the model (e.g. a holdout set) and a manifest listing
+    their SHA-256 checksums. Bundles are written under a temporary name and
+    renamed into place, so a reader never sees a partial bundle. The active
+    version is the single line in ``<root>/CURRENT``, which is replaced
+    atomically on activation; the version it replaced is kept in
+    ``<root>/PREVIOUS``.
+    """
+
+    def __init__(self, root: str = 'models'):
+        """
+        Args:
+            root: Registry directory, created if missing
+        """
+        self.root = root
+        self.versions_dir = os.path.join(root, VERSIONS_DIR)
+        os.makedirs(self.versions_dir, exist_ok=True)
+
+    def bundle_path(self, version: str) -> str:
+        return os.path.join(self.versions_dir, version)
+
+    def publish(
+        self,
+        recommender: InsuranceRecommender,
+        metadata: Optional[Dict] = None,
+        datasets: Optional[Dict[str, pd.DataFrame]] = None
+    ) -> str:
+        """
+        Save a trained recommender as a new bundle
+
+        Args:
+            recommender: Trained recommender to save
+            metadata: Extra fields recorded in the manifest (e.g. training rows)
+            datasets: Named DataFrames stored as Parquet in the bundle
+
+        Returns:
+            The new version id. The bundle is not activated.
+        """
+        version = time.strftime('%Y%m%dT%H%M%S', time.gmtime()) + '-' + secrets.token_hex(3)
+        staging_dir = os.path.join(self.versions_dir, f'.tmp-{version}')
+        try:
+            recommender.save_model(staging_dir)
+            if datasets:
+                os.makedirs(os.path.join(staging_dir, DATASETS_DIR))
+                for name, df in datasets.items():
+                    write_training_data(df, os.path.join(staging_dir, DATASETS_DIR, f'{name}.parquet'))
+            manifest = {
+                'version': version,
+                'created_at': time.time(),
+                'engine': recommender.engine.name,
+                'n_features': len(recommender.features),
+                'features': list(recommender.features),
+                **(metadata or {}),
+                'files': {
+                    path: {
+                        'sha256': _sha256(os.path.join(staging_dir, path)),
+                        'bytes': os.path.getsize(os.path.join(staging_dir, path))
+                    }
+                    for path in _bundle_files(staging_dir)
+                }
+            }
+            with open(os.path.join(staging_dir, MANIFEST_FILE), 'w') as f:
+                json.dump(manifest, f, indent=2)
+            os.rename(staging_dir, self.bundle_path(version))
+        except BaseException:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            raise
+        return version
+
+    def remove_staging(self, since: float = 0) -> List[str]:
+        """
+        Delete partial bundles left by publishes that never finished
+
+        A publish killed mid-way (e.g. a cancelled training job) cannot
+        clean up after itself.
+
+        Args:
+            since: Only remove staging directories modified at or after this time
+
+        Returns:
+            The removed directory names
+        """
+        removed = []
+        for name in os.listdir(self.versions_dir):
+            path = os.path.join(self.versions_dir, name)
+            if name.startswith('.tmp-') and os.path.getmtime(path) >= since:
+                shutil.rmtree(path, ignore_errors=True)
+                removed.append(name)
+        return removed
+
+    def manifest(self, version: str) -> Dict:
+        """
+        Raises:
+            FileNotFoundError: If no bundle exists for ``version``
+        """
+        with open(os.path.join(self.bundle_path(version), MANIFEST_FILE)) as f:
+            return json.load(f)
+
+    def load_dataset(self, version: str, name: str) -> Optional[pd.DataFrame]:
+        """A dataset stored with a bundle, or None if it has no such dataset"""
+        path = os.path.join(self.bundle_path(version), DATASETS_DIR, f'{name}.parquet')
+        return read_training_data(path) if os.path.exists(path) else None
+
+    def verify(self, version: str):
+        """
+        Check every file of a bundle against its manifest
+
+        Raises:
+            ValueError: If a file is missing, unexpected or has changed
+        """
+        bundle_dir = self.bundle_path(version)
+        expected = self.manifest(version)['files']
+        actual = _bundle_files(bundle_dir)
+        if sorted(expected) != actual:
+            raise ValueError(f"Model bundle {version} does not match its manifest file list")
+        for path, entry in expected.items():
+            if _sha256(os.path.join(bundle_dir, path)) != entry['sha256']:
+                raise ValueError(f"Checksum mismatch for {path} in model bundle {version}")
+
+    def list_versions(self) -> List[Dict]:
+        """Manifests of all published bundles, oldest first"""
+        manifests = []
+        for name in os.listdir(self.versions_dir):
+            if name.startswith('.') or not os.path.exists(os.path.join(self.bundle_path(name), MANIFEST_FILE)):
+                continue
+            manifests.append(self.manifest(name))
+        return sorted(manifests, key=lambda m: (m['created_at'], m['version']))
+
+    def _read_pointer(self, name: str) -> Optional[str]:
+        try:
+            with open(os.path.join(self.root, name)) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def _write_pointer(self, name: str, version: str):
+        staging_path = os.path.join(self.root, f'.{name}.{os.getpid()}')
+        with open(staging_path, 'w') as f:
+            f.write(version + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(staging_path, os.path.join(self.root, name))
+
+    def current_version(self) -> Optional[str]:
+        """The active version, or None before anything was activated"""
+        return self._read_pointer(CURRENT_FILE)
+
+    def last_active_version(self) -> Optional[str]:
+        """The version that was active before the current one"""
+        return self._read_pointer(PREVIOUS_FILE)
+
+    def activate(self, version: str):
+        """
+        Make ``version`` the active bundle
+
+        Raises:
+            FileNotFoundError: If no bundle exists for ``version``
+        """
+        if not os.path.exists(os.path.join(self.bundle_path(version), MANIFEST_FILE)):
+            raise FileNotFoundError(f"No model bundle for version {version}")
+        current = self.current_version()
+        if current is not None and current != version:
+            self._write_pointer(PREVIOUS_FILE, current)
+        self._write_pointer(CURRENT_FILE, version)
+
+    def previous_version(self, version: Optional[str] = None) -> Optional[str]:
+        """The bundle published just before ``version`` (default: the active one)"""
+        version = version or self.current_version()
+        versions = [m['version'] for m in self.list_versions()]
+        if version not in versions:
+            return None
+        index = versions.index(version)
+        return versions[index - 1] if index > 0 else None
+
+    def load(self, version: str, mmap_mode='r', verify: bool = True) -> InsuranceRecommender:
+        """
+        Load a bundle into a new recommender
+
+        Args:
+            version: Bundle to load
+            mmap_mode: Passed to InsuranceRecommender.load_model
+            verify: Check the bundle's checksums first
+
+        Returns:
+            The loaded recommender
+        """
+        if verify:
+            self.verify(version)
+        recommender = InsuranceRecommender()
+        recommender.load_model(self.bundle_path(version), mmap_mode=mmap_mode)
+        return recommender
+
+    def prune(self, keep: int, in_use: Iterable[str] = ()) -> List[str]:
+        """
+        Delete all but the ``keep`` newest bundles
+
+        Bundles that may still be serving are never deleted: the active one,
+        the one active before it (other workers may not have switched yet),
+        its rollback target and any listed in ``in_use``. A loaded
+        recommender reads its estimator from the bundle lazily, so deleting
+        a bundle that is being served breaks large batches and attributions.
+
+        Args:
+            keep: Number of newest bundles to keep
+            in_use: Further versions to keep, e.g. the caller's serving version
+
+        Returns:
+            The deleted versions
+        """
+        current = self.current_version()
+        protected = {current, self.last_active_version(), self.previous_version(current), *in_use}
+        versions = [m['version'] for m in self.list_versions()]
+        stale = [v for v in versions[:max(len(versions) - keep, 0)] if v not in protected]
+        for version in stale:
+            shutil.rmtree(self.bundle_path(version), ignore_errors=True)
+        return stale
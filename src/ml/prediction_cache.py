@@ -0,0 +1,82 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+def profile_cache_key(user_profile: Dict, model_version: Optional[str]) -> str:
+    """
+    Canonical cache key for a validated user profile and model version
+
+    Field order does not matter; values are serialised exactly as received.
+    """
+    canonical = json.dumps(user_profile, sort_keys=True, separators=(',', ':'), default=str)
+    digest = hashlib.blake2b(canonical.encode('utf-8'), digest_size=16).hexdigest()
+    return f"{model_version}:{digest}"
+
+
+class PredictionCache:
+    """
+    Thread-safe LRU cache with a per-entry time to live
+
+    A ``max_size`` of 0 disables caching.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: float = 300.0):
+        """
+        Args:
+            max_size: Maximum number of entries before the least recently used is evicted
+            ttl_seconds: Seconds an entry stays valid after it was stored
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0, 'invalidations': 0}
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for ``key``, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self._stats['expirations'] += 1
+                self._stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return value
+
+    def put(self, key: Hashable, value: Any):
+        """Store ``value`` under ``key``, evicting the least recently used entry if full"""
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def clear(self):
+        """Drop all entries, e.g. after the model has been replaced"""
+        with self._lock:
+            self._entries.clear()
+            self._stats['invalidations'] += 1
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters, current size and hit rate"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._entries)
+        lookups = stats['hits'] + stats['misses']
+        stats['max_size'] = self.max_size
+        stats['ttl_seconds'] = self.ttl_seconds
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
@@ -0,0 +1,147 @@
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+# Raw profile columns stored per user, matching the API's UserProfile
+PROFILE_SCHEMA = {
+    'age': 'INTEGER',
+    'income': 'REAL',
+    'occupation': 'TEXT',
+    'family_size': 'INTEGER',
+    'marital_status': 'TEXT',
+    'education_level': 'TEXT',
+    'risk_tolerance': 'REAL',
+    'health_status': 'TEXT',
+    'existing_conditions': 'INTEGER',
+    'lifestyle': 'TEXT',
+    'family_medical_history': 'TEXT',
+    'smoking_status': 'TEXT',
+    'bmi': 'REAL',
+    'savings_rate': 'REAL',
+    'debt': 'REAL',
+    'investment_experience': 'REAL',
+    'coverage_preference': 'TEXT',
+    'policy_duration_preference': 'TEXT',
+    'premium_budget': 'REAL',
+    'location_type': 'TEXT',
+    'property_ownership': 'TEXT',
+    'vehicle_ownership': 'TEXT',
+    'recommended_policy': 'TEXT'
+}
+PROFILE_COLUMNS = list(PROFILE_SCHEMA)
+
+
+class ProfileStore:
+    """
+    SQLite-backed user profile store indexed by user_id
+
+    Upserts touch a single row instead of rewriting the whole dataset. The
+    database runs in WAL mode so readers never block writers, and several
+    threads or processes can write safely (SQLite serialises the commits).
+    """
+
+    def __init__(self, db_path: str = 'profiles.db'):
+        """
+        Args:
+            db_path: Path to the SQLite database file, created if missing
+        """
+        self.db_path = db_path
+        self._local = threading.local()
+        columns = ', '.join(f'{name} {sql_type}' for name, sql_type in PROFILE_SCHEMA.items())
+        with self._connection() as conn:
+            conn.execute(
+                f'CREATE TABLE IF NOT EXISTS profiles '
+                f'(user_id TEXT PRIMARY KEY, {columns}, updated_at REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS profiles_updated_at ON profiles (updated_at)')
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections are not shareable across threads; keep one per thread
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def upsert(self, user_id: str, user_profile: Dict):
+        """
+        Insert or replace the stored profile for ``user_id``
+
+        Keys outside PROFILE_SCHEMA are ignored. A 'recommended_policy'
+        entry, when present, labels the row for training.
+        """
+        self.upsert_many([(user_id, user_profile)])
+
+    def upsert_many(self, profiles: List[tuple]):
+        """Upsert several ``(user_id, user_profile)`` pairs in one transaction"""
+        placeholders = ', '.join('?' for _ in range(len(PROFILE_COLUMNS) + 2))
+        updates = ', '.join(f'{name} = excluded.{name}' for name in PROFILE_COLUMNS + ['updated_at'])
+        now = time.time()
+        rows = [
+            (user_id, *(profile.get(name) for name in PROFILE_COLUMNS), now)
+            for user_id, profile in profiles
+        ]
+        with self._connection() as conn:
+            conn.executemany(
+                f'INSERT INTO profiles (user_id, {", ".join(PROFILE_COLUMNS)}, updated_at) '
+                f'VALUES ({placeholders}) ON CONFLICT(user_id) DO UPDATE SET {updates}',
+                rows
+            )
+
+    def get(self, user_id: str) -> Optional[Dict]:
+        """Return the stored profile for ``user_id``, or None"""
+        cursor = self._connection().execute(
+            f'SELECT {", ".join(PROFILE_COLUMNS)} FROM profiles WHERE user_id = ?', (user_id,)
+        )
+        row = cursor.fetchone()
+        return dict(zip(PROFILE_COLUMNS, row)) if row else None
+
+    def count(self, labelled_only: bool = False) -> int:
+        """Number of stored profiles"""
+        query = 'SELECT COUNT(*) FROM profiles'
+        if labelled_only:
+            query += ' WHERE recommended_policy IS NOT NULL'
+        return self._connection().execute(query).fetchone()[0]
+
+    def export_dataframe(
+        self,
+        labelled_only: bool = True,
+        updated_since: Optional[float] = None
+    ) -> pd.DataFrame:
+        """
+        Bulk export stored profiles in the training data layout
+
+        Args:
+            labelled_only: Only return rows that have a recommended_policy
+            updated_since: Only return rows updated after this UNIX timestamp
+
+        Returns:
+            DataFrame with a user_id column followed by PROFILE_COLUMNS
+        """
+        query = f'SELECT user_id, {", ".join(PROFILE_COLUMNS)} FROM profiles'
+        conditions, params = [], []
+        if labelled_only:
+            conditions.append('recommended_policy IS NOT NULL')
+        if updated_since is not None:
+            conditions.append('updated_at > ?')
+            params.append(updated_since)
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        return pd.read_sql_query(query, self._connection(), params=params)
+
+    def compact(self):
+        """Fold the write-ahead log back into the main database file"""
+        conn = self._connection()
+        conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+
+    def close(self):
+        """Close this thread's connection"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
@@ -0,0 +1,216 @@
+import os
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Dict, Optional
+
+# Innermost frames of a thread that is waiting rather than working: the
+# event loop in select(), pool workers waiting for a task, condition waits
+IDLE_FRAMES = {
+    ('selectors.py', 'select'),
+    ('threading.py', 'wait'),
+    ('threading.py', '_wait_for_tstate_lock'),
+    ('queue.py', 'get'),
+    ('thread.py', '_worker'),
+    ('connection.py', '_poll'),
+    ('popen_fork.py', 'poll')
+}
+
+# Directories frames are shown relative to, longest first
+_ROOTS = sorted({os.path.abspath(p) for p in sys.path if p and os.path.isdir(p)}, key=len, reverse=True)
+
+
+class ProfilerBusyError(RuntimeError):
+    """Raised when a profile is requested while another one is being captured"""
+
+
+def _short_path(filename: str) -> str:
+    for root in _ROOTS:
+        if filename.startswith(root + os.sep):
+            return filename[len(root) + 1:]
+    return filename
+
+
+def _thread_group(name: str) -> str:
+    # Workers of one pool (inference_0, inference_1, ...) share a root frame
+    return re.sub(r'[_-]\d+$', '', name)
+
+
+def collapsed(stacks: Dict[str, int]) -> str:
+    """
+    Render stacks in the collapsed format read by flamegraph.pl and speedscope
+
+    Args:
+        stacks: Semicolon-joined frames, outermost first, mapped to their weight
+
+    Returns:
+        One ``frame;frame;frame weight`` line per stack, heaviest first
+    """
+    lines = [f'{stack} {weight}' for stack, weight in sorted(stacks.items(), key=lambda item: -item[1])]
+    return '\n'.join(lines) + '\n' if lines else ''
+
+
+class Profiler:
+    """
+    On-demand profiles of the running process
+
+    ``sample_stacks`` records where every thread (the event loop and the
+    worker pools) is, at a fixed interval, from a separate thread: the
+    profiled code runs unmodified and the cost is one stack walk per thread
+    per sample. The sampler needs the GIL like any other thread and the
+    interpreter's switch interval is left alone, so a sample can be taken
+    a few milliseconds late while a thread runs pure Python.
+
+    ``trace_allocations`` turns tracemalloc on for the window. Every
+    allocation in the process is traced while it runs, which cuts the
+    throughput of allocation-heavy code such as request handling several
+    times over, so it has its own, shorter ``max_allocation_seconds`` cap.
+
+    Only one profile is captured at a time, and never for longer than
+    ``max_seconds``.
+    """
+
+    def __init__(self, max_seconds: float = 60, max_allocation_seconds: float = 10, min_interval: float = 0.001):
+        """
+        Args:
+            max_seconds: Longest CPU profile that can be requested
+            max_allocation_seconds: Longest allocation trace that can be requested
+            min_interval: Shortest allowed sampling interval in seconds
+        """
+        self.max_seconds = max_seconds
+        self.max_allocation_seconds = max_allocation_seconds
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        # code object -> frame label; code objects live as long as their function
+        self._labels = {}
+
+    def _acquire(self, seconds: float, max_seconds: float):
+        if not 0 < seconds <= max_seconds:
+            raise ValueError(f"Profile duration must be between 0 and {max_seconds:g} seconds")
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusyError("A profile is already being captured")
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = f'{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})'
+        return label
+
+    def sample_stacks(self, seconds: float, interval: float = 0.01, include_idle: bool = False) -> Dict:
+        """
+        Sample the stacks of all threads for ``seconds`` (blocking)
+
+        Args:
+            seconds: How long to sample
+            interval: Time between samples in seconds
+            include_idle: Also count threads that are only waiting
+
+        Returns:
+            Dict with the sampled ``stacks`` (collapsed stack -> samples),
+            the number of ``samples`` taken, the window's ``duration_seconds``
+            and ``overhead_ratio``, the share of it spent walking stacks
+
+        Raises:
+            ValueError: If ``seconds`` exceeds ``max_seconds``
+            ProfilerBusyError: If another profile is being captured
+        """
+        interval = max(interval, self.min_interval)
+        self._acquire(seconds, self.max_seconds)
+        try:
+            own_thread = threading.get_ident()
+            stacks = Counter()
+            samples, sampling_seconds = 0, 0.0
+            start = next_sample = time.perf_counter()
+            deadline = start + seconds
+            while True:
+                sample_start = time.perf_counter()
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+                for ident, frame in sys._current_frames().items():
+                    if ident == own_thread:
+                        continue
+                    code = frame.f_code
+                    if not include_idle and (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+                        continue
+                    frames = []
+                    while frame is not None:
+                        frames.append(self._label(frame.f_code))
+                        frame = frame.f_back
+                    frames.append(_thread_group(names.get(ident, str(ident))))
+                    stacks[';'.join(reversed(frames))] += 1
+                del frame
+                samples += 1
+                now = time.perf_counter()
+                sampling_seconds += now - sample_start
+                if now >= deadline:
+                    break
+                # A late sample is not made up for; the next one is an interval away
+                next_sample = max(next_sample + interval, now)
+                time.sleep(min(next_sample, deadline) - now)
+            duration = time.perf_counter() - start
+            return {
+                'stacks': dict(stacks),
+                'samples': samples,
+                'duration_seconds': duration,
+                'overhead_ratio': sampling_seconds / duration
+            }
+        finally:
+            self._lock.release()
+
+    def trace_allocations(self, seconds: float, frames: int = 10, focus: Optional[str] = None) -> Dict:
+        """
+        Trace memory allocations for ``seconds`` (blocking)
+
+        The result covers memory allocated during the window and still held
+        at its end: the working memory of requests in flight at that moment,
+        caches and anything that keeps growing. Objects allocated and freed
+        within the window only count towards ``peak_bytes``.
+
+        Args:
+            seconds: How long to trace
+            frames: Frames kept per allocation traceback; every extra frame
+                makes each allocation slower to trace
+            focus: Only keep allocations with this file (a glob such as
+                ``feature_pipeline.py``) anywhere in their traceback
+
+        Returns:
+            Dict with ``stacks`` (collapsed traceback -> bytes),
+            ``traced_bytes``, ``peak_bytes`` and ``duration_seconds``
+
+        Raises:
+            ValueError: If ``seconds`` exceeds ``max_allocation_seconds``
+            ProfilerBusyError: If another profile is being captured or
+                tracemalloc is already in use
+        """
+        self._acquire(seconds, self.max_allocation_seconds)
+        try:
+            if tracemalloc.is_tracing():
+                raise ProfilerBusyError("tracemalloc is already tracing in this process")
+            start = time.perf_counter()
+            tracemalloc.start(frames)
+            try:
+                time.sleep(seconds)
+                snapshot = tracemalloc.take_snapshot()
+                traced_bytes, peak_bytes = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            duration = time.perf_counter() - start
+
+            filters = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+            if focus:
+                filters.append(tracemalloc.Filter(True, f'*{focus}', all_frames=True))
+            stacks = Counter()
+            for statistic in snapshot.filter_traces(filters).statistics('traceback'):
+                # tracemalloc keeps line numbers but not function names
+                stack = ';'.join(f'{_short_path(frame.filename)}:{frame.lineno}' for frame in statistic.traceback)
+                stacks[stack] += statistic.size
+            return {
+                'stacks': dict(stacks),
+                'traced_bytes': traced_bytes,
+                'peak_bytes': peak_bytes,
+                'duration_seconds': duration
+            }
+        finally:
+            self._lock.release()
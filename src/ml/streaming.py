@@ -0,0 +1,170 @@
+import json
+import re
+from typing import Any, AsyncIterator, List
+
+from starlette.responses import StreamingResponse
+
+# Largest single profile (JSON element or NDJSON line) we are willing to buffer
+MAX_ITEM_BYTES = 1024 * 1024
+
+_decoder = json.JSONDecoder()
+
+# Tails of an element that more input could still complete
+_LITERALS = ('true', 'false', 'null', 'NaN', 'Infinity', '-Infinity')
+_NUMBER_TAIL = re.compile(r'[-+.eE0-9]*')
+
+
+class MalformedItem:
+    """Stands in for an input item that could not be decoded, so the stream can go on"""
+
+    def __init__(self, error: str):
+        self.error = error
+
+
+def _is_incomplete(buffer: str, error: json.JSONDecodeError) -> bool:
+    """Whether ``error`` only means the element in ``buffer`` has not fully arrived"""
+    rest = buffer[error.pos:]
+    if not rest or error.msg.startswith('Unterminated string'):
+        return True
+    if error.msg.startswith('Invalid \\uXXXX escape'):
+        return len(rest) < 6
+    return any(literal.startswith(rest) for literal in _LITERALS) or _NUMBER_TAIL.fullmatch(rest) is not None
+
+
+class NDJSONStreamingResponse(StreamingResponse):
+    """
+    Streaming NDJSON response whose body generator may still be reading the request
+
+    Starlette's StreamingResponse listens on ``receive`` for client
+    disconnects while streaming, which would swallow request body chunks
+    that the generator has not read yet. Here the generator owns
+    ``receive``; a disconnect surfaces as ``ClientDisconnect`` from
+    ``request.stream()`` instead.
+    """
+
+    media_type = 'application/x-ndjson'
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+async def iter_ndjson(chunks: AsyncIterator[bytes]) -> AsyncIterator[Any]:
+    """
+    Decode newline-delimited JSON from a byte stream, one value per line
+
+    A line that is not valid JSON is yielded as a MalformedItem and
+    decoding continues with the next line.
+
+    Raises:
+        ValueError: If a line exceeds MAX_ITEM_BYTES
+    """
+    buffer = b''
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b'\n')
+        for line in lines:
+            if line.strip():
+                yield _decode_line(line)
+        if len(buffer) > MAX_ITEM_BYTES:
+            raise ValueError(f"NDJSON line exceeds {MAX_ITEM_BYTES} bytes")
+    if buffer.strip():
+        yield _decode_line(buffer)
+
+
+def _decode_line(line: bytes) -> Any:
+    try:
+        return json.loads(line)
+    except ValueError as e:
+        # JSONDecodeError and UnicodeDecodeError
+        return MalformedItem(f"Invalid JSON: {e}")
+
+
+async def iter_json_array(chunks: AsyncIterator[bytes]) -> AsyncIterator[Any]:
+    """
+    Decode the elements of a top-level JSON array as they arrive
+
+    Only the element currently being received is buffered, so memory use
+    does not grow with the length of the array.
+
+    Raises:
+        ValueError: If the body is not a JSON array, an element is malformed
+            or exceeds MAX_ITEM_BYTES, or the array ends early
+    """
+    buffer = ''
+    pending = b''
+    started = False
+    finished = False
+    count = 0
+
+    async for chunk in chunks:
+        # Keep incomplete UTF-8 sequences until the rest of the bytes arrive
+        pending += chunk
+        try:
+            buffer += pending.decode('utf-8')
+            pending = b''
+        except UnicodeDecodeError as e:
+            if e.start < len(pending) - 3:
+                raise ValueError("Request body is not valid UTF-8")
+            buffer += pending[:e.start].decode('utf-8')
+            pending = pending[e.start:]
+
+        pos = 0
+        while True:
+            while pos < len(buffer) and (buffer[pos].isspace() or (started and buffer[pos] == ',')):
+                pos += 1
+            if pos == len(buffer) or finished:
+                break
+            if not started:
+                if buffer[pos] != '[':
+                    raise ValueError("Request body must be a JSON array")
+                started = True
+                pos += 1
+                continue
+            if buffer[pos] == ']':
+                finished = True
+                pos += 1
+                break
+            try:
+                value, pos = _decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError as e:
+                if _is_incomplete(buffer, e):
+                    # Wait for the rest of the element
+                    break
+                # Without a valid element there is no telling where the next one starts
+                raise ValueError(f"Malformed JSON array element {count}: {e}")
+            count += 1
+            yield value
+
+        buffer = buffer[pos:]
+        if len(buffer) > MAX_ITEM_BYTES:
+            raise ValueError(f"JSON array element exceeds {MAX_ITEM_BYTES} bytes")
+
+    if finished and buffer.strip():
+        raise ValueError("Unexpected data after JSON array")
+    if not finished:
+        # Whatever is left was judged incomplete above, so the input ended early
+        raise ValueError("Truncated JSON array")
+
+
+async def iter_batches(items: AsyncIterator[Any], size: int) -> AsyncIterator[List[Any]]:
+    """
+    Group an async iterator into lists of at most ``size`` items
+
+    If ``items`` raises ValueError, the items read before it are still
+    yielded as a last batch before the error propagates.
+    """
+    batch = []
+    try:
+        async for item in items:
+            batch.append(item)
+            if len(batch) >= size:
+                yield batch
+                batch = []
+    except ValueError:
+        if batch:
+            yield batch
+        raise
+    if batch:
+        yield batch
@@ -0,0 +1,81 @@
+import contextlib
+import io
+import os
+import sys
+import time
+
+import pytest
+
+ML_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ML_DIR not in sys.path:
+    sys.path.insert(0, ML_DIR)
+
+# Rows of synthetic data the shared test model is trained on
+TRAINING_ROWS = 600
+
+
+@pytest.fixture(scope='session')
+def training_csv(tmp_path_factory):
+    """Path of a synthetic training data CSV"""
+    from train_model import generate_sample_data
+
+    path = tmp_path_factory.mktemp('data') / 'training.csv'
+    with contextlib.redirect_stdout(io.StringIO()):
+        generate_sample_data(TRAINING_ROWS, output_path=str(path))
+    return str(path)
+
+
+@pytest.fixture(scope='session')
+def training_frame(training_csv):
+    """Synthetic training data: (features, labels)"""
+    from training_data import apply_schema, read_training_data, training_columns, LABEL_COLUMN
+    from insurance_recommender import InsuranceRecommender
+
+    df = read_training_data(training_csv)
+    df = apply_schema(df[training_columns(InsuranceRecommender().features)])
+    return df.drop(columns=[LABEL_COLUMN]), df[LABEL_COLUMN].astype(str)
+
+
+@pytest.fixture(scope='session')
+def trained_recommender(training_frame):
+    """A small random forest recommender, trained once per session"""
+    from insurance_recommender import InsuranceRecommender
+
+    X, y = training_frame
+    recommender = InsuranceRecommender()
+    with contextlib.redirect_stdout(io.StringIO()):
+        recommender.train(X, y)
+    return recommender
+
+
+@pytest.fixture
+def profiles(training_frame):
+    """Raw request profiles as a client would send them"""
+    X, _ = training_frame
+    head = X.head(20)
+    return head.astype(object).where(head.notna(), None).to_dict('records')
+
+
+@pytest.fixture(scope='session')
+def api_client(tmp_path_factory, trained_recommender):
+    """TestClient of api.app serving the session model from a fresh registry"""
+    from fastapi.testclient import TestClient
+    from model_registry import ModelRegistry
+
+    root = tmp_path_factory.mktemp('api')
+    registry = ModelRegistry(str(root / 'models'))
+    registry.activate(registry.publish(trained_recommender))
+    # api reads its configuration at import
+    os.environ.update({
+        'ML_MODEL_DIR': registry.root,
+        'ML_PROFILE_STORE_PATH': str(root / 'profiles.db'),
+        'ML_CACHE_SIZE': '0',
+        'ML_BULK_CHUNK_SIZE': '4'
+    })
+    import api
+
+    with TestClient(api.app) as client:
+        deadline = time.monotonic() + 60
+        while api.ml_integration.recommender is None and time.monotonic() < deadline:
+            time.sleep(0.05)
+        yield client
@@ -0,0 +1,63 @@
+def test_put_profile_stores_a_labelled_row(api_client, profiles, trained_recommender):
+    label = trained_recommender.classes[0]
+    response = api_client.put('/profiles/labelled-user', json=dict(profiles[0], recommended_policy=label))
+
+    assert response.status_code == 200, response.text
+    # Imported by api_client once the environment is configured
+    import api
+    stored = api.ml_integration.profile_store.export_dataframe(labelled_only=True)
+    assert label in set(stored['recommended_policy'])
+
+
+def test_put_profile_rejects_an_unknown_label(api_client, profiles):
+    response = api_client.put('/profiles/unknown-label', json=dict(profiles[0], recommended_policy='Pet Insurance'))
+
+    assert response.status_code == 422
+    assert 'Unknown policy type' in response.json()['detail']
+
+
+def test_profile_label_is_optional(api_client, profiles):
+    assert api_client.put('/profiles/unlabelled', json=profiles[0]).status_code == 200
+
+
+def test_profile_endpoint_caps_allocation_traces_and_rejects_concurrent_profiles(api_client, monkeypatch):
+    import api
+
+    monkeypatch.setattr(api, 'ADMIN_TOKEN', 'secret')
+    headers = {'X-Admin-Token': 'secret'}
+    too_long = api.profiler.max_allocation_seconds + 1
+    response = api_client.get(f'/admin/profile?mode=allocations&seconds={too_long}', headers=headers)
+    assert response.status_code == 422
+
+    # As if another request were capturing a profile
+    with api.profiler._lock:
+        response = api_client.get('/admin/profile?seconds=0.1', headers=headers)
+    assert response.status_code == 409
+    assert api_client.get('/admin/profile?seconds=0.1', headers=headers).status_code == 200
+
+
+def test_deep_health_refresh_requires_the_admin_token(api_client, monkeypatch):
+    import api
+
+    calls = []
+    self_test = api.ml_integration.self_test
+    monkeypatch.setattr(api.ml_integration, 'self_test', lambda: calls.append(1) or self_test())
+    monkeypatch.setattr(api, 'ADMIN_TOKEN', 'secret')
+
+    assert api_client.get('/health/deep').status_code == 200
+    runs = len(calls)
+    assert api_client.get('/health/deep?refresh=true').status_code == 403
+    assert api_client.get('/health/deep?refresh=true', headers={'X-Admin-Token': 'wrong'}).status_code == 403
+    # The cached result is served without running the self-test again
+    assert api_client.get('/health/deep').status_code == 200
+    assert len(calls) == runs
+
+    assert api_client.get('/health/deep?refresh=true', headers={'X-Admin-Token': 'secret'}).status_code == 200
+    assert len(calls) == runs + 1
+
+
+def test_deep_health_refresh_is_unavailable_without_an_admin_token(api_client, monkeypatch):
+    import api
+
+    monkeypatch.setattr(api, 'ADMIN_TOKEN', '')
+    assert api_client.get('/health/deep?refresh=true').status_code == 404
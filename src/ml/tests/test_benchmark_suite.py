@@ -0,0 +1,46 @@
+import multiprocessing
+import os
+import time
+
+from benchmarks.suite import _wait_for_result
+
+
+def _crash(queue):
+    os._exit(3)
+
+
+def _hang(queue):
+    time.sleep(60)
+
+
+def _report(queue):
+    queue.put({'rows': 10, 'train_seconds': 0.1})
+
+
+def _start(target):
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=target, args=(queue,))
+    process.start()
+    return process, queue
+
+
+def test_result_of_a_finished_benchmark_is_returned():
+    process, queue = _start(_report)
+    assert _wait_for_result(process, queue, 10, timeout=60) == {'rows': 10, 'train_seconds': 0.1}
+    process.join()
+
+
+def test_crashed_benchmark_is_recorded_as_failed():
+    process, queue = _start(_crash)
+    result = _wait_for_result(process, queue, 10, timeout=60)
+    process.join()
+    assert result == {'rows': 10, 'error': 'Benchmark process exited with code 3'}
+
+
+def test_benchmark_past_its_timeout_is_stopped():
+    process, queue = _start(_hang)
+    result = _wait_for_result(process, queue, 10, timeout=1)
+    process.join(timeout=10)
+    assert result == {'rows': 10, 'error': 'Benchmark did not finish within 1s'}
+    assert not process.is_alive()
@@ -0,0 +1,61 @@
+import contextlib
+import copy
+import io
+import re
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from feature_vectorizer import FeatureVectorizer
+
+
+def _odd_profiles(profiles):
+    """Profiles with missing values, unseen categories and numbers sent as strings"""
+    missing = dict(profiles[0], income=None, occupation=None, bmi=float('nan'))
+    unseen = dict(profiles[1], occupation='Astronaut', lifestyle='Unknown')
+    strings = dict(profiles[2], age=str(profiles[2]['age']), debt='not a number')
+    return [missing, unseen, strings]
+
+
+@pytest.mark.parametrize('dtype', [np.float32, np.float64])
+def test_vectorizer_matches_pipeline_transform(trained_recommender, profiles, dtype):
+    batch = profiles + _odd_profiles(profiles)
+    vectorizer = FeatureVectorizer(trained_recommender.pipeline, trained_recommender.features, dtype=dtype)
+    frame = pd.DataFrame(batch)
+    for column in ('age', 'debt'):
+        frame[column] = pd.to_numeric(frame[column], errors='coerce')
+    with contextlib.redirect_stdout(io.StringIO()):
+        expected = trained_recommender.pipeline.transform(frame)[trained_recommender.features].to_numpy(dtype)
+
+    out = np.full((len(batch), len(vectorizer.features)), -1.0, dtype=dtype)
+    assert vectorizer.transform_batch(batch, out=out) is out
+    np.testing.assert_allclose(out, expected, rtol=1e-6)
+    for profile, row in zip(batch, expected):
+        single = vectorizer.transform(profile)
+        assert single.dtype == dtype
+        np.testing.assert_allclose(single, row, rtol=1e-6)
+
+
+def test_transform_batch_checks_the_output_shape(trained_recommender, profiles):
+    vectorizer = trained_recommender.vectorizer
+    with pytest.raises(ValueError, match='shape'):
+        vectorizer.transform_batch(profiles, out=np.empty((1, len(vectorizer.features))))
+
+
+def test_explanations_show_category_codes_as_integers(trained_recommender, profiles):
+    recommender = copy.copy(trained_recommender)
+    # Make a categorical feature the most important one
+    importances = np.zeros(len(recommender.features))
+    importances[recommender.features.index('occupation')] = 1.0
+    recommender.feature_importances = importances
+    recommender._cache_explanations()
+
+    explanations = recommender.predict_batch(profiles)['explanation']
+    assert all(re.search(r'- occupation: \d+ \(', explanation) for explanation in explanations)
+
+    attributed = recommender.predict_batch(profiles, attributions=True)['explanation']
+    categorical = '|'.join(recommender.categorical_features)
+    for explanation in attributed:
+        for value in re.findall(rf'- (?:{categorical}): (\S+) \(', explanation):
+            assert re.fullmatch(r'\d+', value), explanation
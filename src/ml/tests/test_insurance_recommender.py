@@ -0,0 +1,125 @@
+import contextlib
+import copy
+import io
+import warnings
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+import sklearn.inspection
+
+from compiled_forest import CompiledForest
+from insurance_recommender import HistGradientBoostingEngine, InsuranceRecommender
+
+
+def _record_permutation_calls(monkeypatch):
+    calls = []
+
+    def permutation_importance(model, X, y, **kwargs):
+        calls.append({'rows': len(X), **kwargs})
+        return SimpleNamespace(importances_mean=np.ones(X.shape[1]))
+
+    monkeypatch.setattr(sklearn.inspection, 'permutation_importance', permutation_importance)
+    return calls
+
+
+def test_permutation_importance_is_scored_on_a_capped_sample(monkeypatch):
+    calls = _record_permutation_calls(monkeypatch)
+    X = pd.DataFrame(np.random.default_rng(0).normal(size=(5000, 4)), columns=list('abcd'))
+    y = np.arange(5000) % 3
+
+    importances = HistGradientBoostingEngine().feature_importances(None, X, y, n_jobs=-1)
+
+    assert calls == [{'rows': 1000, 'n_repeats': 3, 'random_state': 42, 'n_jobs': -1}]
+    assert importances.sum() == pytest.approx(1)
+
+
+def test_boosted_engine_reuses_selection_importances_by_default(monkeypatch, training_frame):
+    calls = _record_permutation_calls(monkeypatch)
+    X, y = training_frame
+    recommender = InsuranceRecommender(engine='hist_gradient_boosting')
+    with contextlib.redirect_stdout(io.StringIO()):
+        recommender.train(X, y)
+
+    assert calls == []
+    assert len(recommender.feature_importances) == len(recommender.features)
+    assert recommender.feature_importances.sum() == pytest.approx(1)
+    assert recommender.training_timings['feature_importance'] < recommender.training_timings['fit']
+
+
+def test_boosted_engine_permutation_importances_are_opt_in(monkeypatch, training_frame):
+    calls = _record_permutation_calls(monkeypatch)
+    X, y = training_frame
+    recommender = InsuranceRecommender(engine='hist_gradient_boosting')
+    with contextlib.redirect_stdout(io.StringIO()):
+        recommender.train(X, y, permutation_importances=True)
+
+    assert len(calls) == 1
+    assert recommender.feature_importances.sum() == pytest.approx(1)
+
+
+def test_added_trees_keep_the_full_training_class_weights(training_frame):
+    X, y = training_frame
+    recommender = InsuranceRecommender()
+    with contextlib.redirect_stdout(io.StringIO()):
+        recommender.train(X, y)
+    counts = y.value_counts()
+    expected = {label: len(y) / (len(counts) * count) for label, count in counts.items()}
+    assert recommender.model.class_weight == pytest.approx(expected)
+
+    # A skewed update: one row of every class plus many of a single class
+    rows = pd.concat([y.groupby(y).head(1), y[y == y.iloc[0]]]).index
+    with warnings.catch_warnings():
+        warnings.filterwarnings('error', message='.*class_weight.*')
+        recommender.add_trees(X.loc[rows], y.loc[rows], n_trees=5)
+
+    assert len(recommender.model.estimators_) == 205
+    assert recommender.model.class_weight == pytest.approx(expected)
+
+
+def test_add_trees_rejects_models_with_a_class_weight_preset(training_frame):
+    X, y = training_frame
+    recommender = InsuranceRecommender()
+    recommender.model = SimpleNamespace(
+        classes_=np.unique(y), get_params=lambda: {'class_weight': 'balanced'}
+    )
+
+    with pytest.raises(ValueError, match='class weights'):
+        recommender.add_trees(X, y)
+
+
+def test_compiled_forest_matches_predict_proba(tmp_path, trained_recommender, profiles):
+    X = trained_recommender.vectorizer.transform_batch(profiles * 10)
+    frame = pd.DataFrame(X, columns=trained_recommender.features)
+    expected = trained_recommender.model.predict_proba(frame)
+
+    compiled = CompiledForest.from_model(trained_recommender.model)
+    assert np.allclose(compiled.predict_proba(X), expected)
+
+    # Memory-mapped, as workers load it from a saved bundle
+    copy.copy(trained_recommender).save_model(str(tmp_path))
+    loaded = InsuranceRecommender()
+    loaded.load_model(str(tmp_path), mmap_mode='r')
+    assert isinstance(loaded.compiled_model.value, np.memmap)
+    assert np.allclose(loaded.compiled_model.predict_proba(X), expected)
+
+    # predict_batch scores batches of up to COMPILED_MAX_BATCH_SIZE rows with it
+    scores = loaded.predict_batch(profiles)['score']
+    assert np.allclose(scores, -np.sort(-expected[:len(profiles)], axis=1))
+
+
+def test_compiled_forest_matches_a_small_random_forest():
+    from sklearn.ensemble import RandomForestClassifier
+
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(300, 5)).astype(np.float32)
+    # Coarse values put many rows exactly on split thresholds
+    X[:, 0] = np.round(X[:, 0], 1)
+    y = np.where(X[:, 0] + X[:, 1] > 0, 'a', np.where(X[:, 2] > 0.5, 'b', 'c'))
+    model = RandomForestClassifier(n_estimators=25, max_depth=6, random_state=0).fit(X, y)
+
+    compiled = CompiledForest.from_model(model)
+
+    assert np.allclose(compiled.predict_proba(X), model.predict_proba(X))
+    assert list(compiled.classes_) == list(model.classes_)
@@ -0,0 +1,73 @@
+import contextlib
+import io
+import warnings
+from types import SimpleNamespace
+
+import pytest
+
+import integration as integration_module
+from integration import InsuranceMLIntegration
+from model_registry import ModelRegistry
+
+
+@pytest.fixture
+def integration(tmp_path, training_csv):
+    """An integration serving a fully trained model, with an empty profile store"""
+    integration = InsuranceMLIntegration(
+        model_dir=str(tmp_path / 'models'), profile_store_path=str(tmp_path / 'profiles.db'), cache_size=0
+    )
+    with contextlib.redirect_stdout(io.StringIO()):
+        version, _ = integration.publish_trained_model(training_csv)
+    ModelRegistry(integration.model_dir).activate(version)
+    assert integration.initialize_model(version)
+    return integration
+
+
+def test_labelled_profiles_are_trained_on_incrementally(integration, training_csv, training_frame, monkeypatch):
+    # The drift guard is too noisy to test on a holdout of a few dozen rows
+    monkeypatch.setitem(integration_module.INCREMENTAL_TRAINING_PARAMS, 'max_accuracy_drop', 1.0)
+    X, y = training_frame
+    rows = X.head(40).astype(object).where(X.head(40).notna(), None).to_dict('records')
+    for user_id, (profile, label) in enumerate(zip(rows, y.head(40))):
+        assert integration.update_user_profile(str(user_id), dict(profile, recommended_policy=label))
+    assert len(integration.profile_store.export_dataframe(labelled_only=True)) == 40
+
+    stages = []
+    with warnings.catch_warnings(), contextlib.redirect_stdout(io.StringIO()):
+        warnings.filterwarnings('error', message='.*class_weight.*')
+        version, recommender = integration.publish_trained_model(
+            training_csv, on_stage=lambda stage, seconds: stages.append(stage), mode='incremental'
+        )
+
+    # No fallback to a full retrain: the base forest gained the new trees
+    assert stages == ['load_data', 'fit', 'drift_check', 'publish']
+    assert version != integration.model_version
+    assert len(recommender.model.estimators_) == 220
+
+
+def test_unknown_policy_labels_are_rejected(integration, profiles):
+    with pytest.raises(ValueError, match='Unknown policy type'):
+        integration.update_user_profile('1', dict(profiles[0], recommended_policy='Pet Insurance'))
+    assert integration.update_user_profile('1', dict(profiles[0], recommended_policy=None))
+    assert len(integration.profile_store.export_dataframe(labelled_only=True)) == 0
+
+
+def test_self_test_passes_on_the_serving_model(integration):
+    result = integration.self_test()
+    assert result['passed'], result['error']
+    assert result['model_version'] == integration.model_version
+
+
+@pytest.mark.parametrize('profile, recommendations, error', [
+    ({}, [{'score': 1.0}], 'no typical profile'),
+    ({'age': 40}, [], 'No policy types were scored'),
+])
+def test_self_test_fails_on_empty_input_or_output(tmp_path, profile, recommendations, error):
+    integration = InsuranceMLIntegration(model_dir=str(tmp_path / 'models'), cache_size=0)
+    recommender = SimpleNamespace(typical_profile=lambda: profile, predict=lambda p: recommendations)
+    integration._active = ('v1', recommender)
+
+    result = integration.self_test()
+
+    assert not result['passed']
+    assert error in result['error']
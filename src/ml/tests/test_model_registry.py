@@ -0,0 +1,65 @@
+import os
+
+import pytest
+
+from insurance_recommender import COMPILED_MAX_BATCH_SIZE
+from model_registry import ModelRegistry
+
+
+def _publish(registry, recommender, count):
+    return [registry.publish(recommender) for _ in range(count)]
+
+
+@pytest.fixture
+def registry(tmp_path):
+    return ModelRegistry(str(tmp_path / 'models'))
+
+
+def test_activate_records_the_previously_active_version(registry, trained_recommender):
+    first, second = _publish(registry, trained_recommender, 2)
+    registry.activate(first)
+    assert registry.last_active_version() is None
+    registry.activate(second)
+    assert registry.current_version() == second
+    assert registry.last_active_version() == first
+
+
+def test_prune_keeps_newest_and_rollback_target(registry, trained_recommender):
+    versions = _publish(registry, trained_recommender, 4)
+    registry.activate(versions[-1])
+
+    deleted = registry.prune(keep=1)
+
+    # versions[-2] is the rollback target of the active version
+    assert deleted == versions[:2]
+    assert [m['version'] for m in registry.list_versions()] == versions[2:]
+    assert registry.previous_version() == versions[-2]
+
+
+def test_prune_keeps_last_active_and_in_use_versions(registry, trained_recommender):
+    versions = _publish(registry, trained_recommender, 5)
+    registry.activate(versions[0])
+    registry.activate(versions[-1])
+
+    deleted = registry.prune(keep=1, in_use=[versions[1]])
+
+    assert deleted == [versions[2]]
+    assert not os.path.exists(registry.bundle_path(versions[2]))
+
+
+def test_pruning_does_not_break_a_loaded_older_bundle(registry, trained_recommender, profiles):
+    old = registry.publish(trained_recommender)
+    registry.activate(old)
+    # Memory-mapped load: the estimator itself is only read from the bundle on first use
+    serving = registry.load(old, mmap_mode='r')
+    assert serving._model is None
+
+    newer = _publish(registry, trained_recommender, 3)
+    registry.activate(newer[-1])
+    registry.prune(keep=1)
+
+    assert os.path.isdir(registry.bundle_path(old))
+    # Larger than the compiled forest handles, so the lazily loaded estimator is needed
+    batch = (profiles * (COMPILED_MAX_BATCH_SIZE // len(profiles) + 1))[:COMPILED_MAX_BATCH_SIZE + 1]
+    assert len(serving.predict_batch(batch)['policy_type']) == len(batch)
+    assert len(serving.predict_batch(profiles[:2], attributions=True)['explanation']) == 2
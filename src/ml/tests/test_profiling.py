@@ -0,0 +1,64 @@
+import sys
+import threading
+import time
+
+import pytest
+
+from profiling import Profiler, ProfilerBusyError, collapsed
+
+
+def _spin(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+@pytest.fixture
+def busy_thread():
+    stop = threading.Event()
+    thread = threading.Thread(target=_spin, args=(stop,), name='spinner-1')
+    thread.start()
+    yield thread
+    stop.set()
+    thread.join()
+
+
+def test_sampling_leaves_the_switch_interval_alone(busy_thread, monkeypatch):
+    calls = []
+    monkeypatch.setattr(sys, 'setswitchinterval', calls.append)
+    switch_interval = sys.getswitchinterval()
+
+    profile = Profiler().sample_stacks(0.3, interval=0.01)
+
+    assert calls == []
+    assert sys.getswitchinterval() == switch_interval
+    assert profile['samples'] > 0
+    spinner = [stack for stack in profile['stacks'] if stack.startswith('spinner;')]
+    assert spinner and all('_spin' in stack for stack in spinner)
+    assert collapsed(profile['stacks']).endswith('\n')
+
+
+def test_one_profile_at_a_time(busy_thread):
+    profiler = Profiler()
+    running = threading.Thread(target=profiler.sample_stacks, args=(0.5,))
+    running.start()
+    time.sleep(0.1)
+    try:
+        with pytest.raises(ProfilerBusyError):
+            profiler.sample_stacks(0.1)
+        with pytest.raises(ProfilerBusyError):
+            profiler.trace_allocations(0.1)
+    finally:
+        running.join()
+    assert profiler.sample_stacks(0.05)['samples'] > 0
+
+
+def test_allocation_traces_have_their_own_cap():
+    profiler = Profiler(max_seconds=60, max_allocation_seconds=0.5)
+
+    with pytest.raises(ValueError, match='0.5 seconds'):
+        profiler.trace_allocations(1)
+    with pytest.raises(ValueError, match='60 seconds'):
+        profiler.sample_stacks(61)
+    profile = profiler.trace_allocations(0.2)
+    assert profile['duration_seconds'] < 0.5
+    assert profile['peak_bytes'] >= profile['traced_bytes']
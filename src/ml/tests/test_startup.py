@@ -0,0 +1,18 @@
+import json
+import subprocess
+import sys
+
+from benchmarks.startup import TRAINING_ONLY_MODULES, _environment
+
+
+def test_importing_the_api_does_not_load_training_modules(tmp_path):
+    env = dict(_environment(), ML_MODEL_DIR=str(tmp_path / 'models'))
+    script = (
+        'import json, sys, api; '
+        f'print(json.dumps([m for m in {TRAINING_ONLY_MODULES!r} if m in sys.modules]))'
+    )
+    result = subprocess.run(
+        [sys.executable, '-c', script], capture_output=True, text=True, env=env, cwd=str(tmp_path), check=True
+    )
+
+    assert json.loads(result.stdout.splitlines()[-1]) == []
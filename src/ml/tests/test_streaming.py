@@ -0,0 +1,91 @@
+import asyncio
+import json
+
+import pytest
+
+from streaming import MalformedItem, iter_batches, iter_json_array, iter_ndjson
+
+
+async def _chunks(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+def _collect(iterator):
+    async def collect():
+        items = []
+        try:
+            async for item in iterator:
+                items.append(item)
+        except ValueError as e:
+            return items, str(e)
+        return items, None
+    return asyncio.run(collect())
+
+
+def test_ndjson_reports_malformed_line_and_continues():
+    items, error = _collect(iter_ndjson(_chunks(b'{"a": 1}\n{"a": \n', b'{"a": 2}\n')))
+    assert error is None
+    assert items[0] == {'a': 1}
+    assert isinstance(items[1], MalformedItem)
+    assert items[2] == {'a': 2}
+
+
+def test_json_array_across_chunk_boundaries():
+    body = json.dumps([{'a': i, 's': 'x' * i, 'f': True} for i in range(10)]).encode()
+    chunks = [body[i:i + 7] for i in range(0, len(body), 7)]
+    items, error = _collect(iter_json_array(_chunks(*chunks)))
+    assert error is None
+    assert [item['a'] for item in items] == list(range(10))
+
+
+@pytest.mark.parametrize('tail', [b'{"a": 1', b'{"a": tru', b'{"a": "ab', b'{"a": 1e', b''])
+def test_json_array_ending_early_is_truncated(tail):
+    items, error = _collect(iter_json_array(_chunks(b'[{"a": 0}, ', tail)))
+    assert items == [{'a': 0}]
+    assert error == "Truncated JSON array"
+
+
+@pytest.mark.parametrize('element', [b'{"a" 1}', b'{"a": x}', b'{"a": 1,}', b'bad'])
+def test_json_array_malformed_element_is_not_truncation(element):
+    items, error = _collect(iter_json_array(_chunks(b'[{"a": 0}, ', element + b', {"a": 2}]')))
+    assert items == [{'a': 0}]
+    assert error.startswith("Malformed JSON array element 1")
+
+
+def test_iter_batches_flushes_partial_batch_before_error():
+    async def items():
+        yield 1
+        yield 2
+        yield 3
+        raise ValueError("boom")
+
+    batches, error = _collect(iter_batches(items(), 2))
+    assert batches == [[1, 2], [3]]
+    assert error == "boom"
+
+
+def _bulk_lines(response):
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_bulk_ndjson_keeps_profiles_around_a_malformed_line(api_client, profiles):
+    body = '\n'.join([json.dumps(profiles[0]), '{"age": ', json.dumps(profiles[1])]) + '\n'
+    response = api_client.post(
+        '/recommend/batch', content=body, headers={'content-type': 'application/x-ndjson'}
+    )
+    lines = _bulk_lines(response)
+    assert [line['index'] for line in lines] == [0, 1, 2]
+    assert 'recommendations' in lines[0]
+    assert lines[1]['error'].startswith('Invalid JSON')
+    assert 'recommendations' in lines[2]
+
+
+def test_bulk_json_array_flushes_profiles_before_a_malformed_element(api_client, profiles):
+    body = '[' + json.dumps(profiles[0]) + ', {"age": x}, ' + json.dumps(profiles[1]) + ']'
+    response = api_client.post('/recommend/batch', content=body, headers={'content-type': 'application/json'})
+    lines = _bulk_lines(response)
+    assert lines[0]['index'] == 0 and 'recommendations' in lines[0]
+    assert lines[-1] == {'error': lines[-1]['error']}
+    assert lines[-1]['error'].startswith('Malformed JSON array element 1')
+    assert len(lines) == 2
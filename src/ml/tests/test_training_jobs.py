@@ -0,0 +1,127 @@
+import json
+import os
+import time
+
+import pytest
+
+from integration import InsuranceMLIntegration
+from model_registry import ModelRegistry
+from training_jobs import TrainingJobConflictError, TrainingJobManager
+
+
+def _wait_until_finished(manager, job_id, timeout=180):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = manager.get(job_id)
+        if job['status'] != 'running':
+            return job
+        time.sleep(0.2)
+    raise AssertionError(f"Training job {job_id} did not finish in {timeout}s")
+
+
+def _wait_for_stage(manager, job_id, stage, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = manager.get(job_id)
+        if stage in job['stages'] or job['status'] != 'running':
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"Training job {job_id} never reached {stage}")
+
+
+@pytest.fixture
+def model_dir(tmp_path):
+    return str(tmp_path / 'models')
+
+
+def _worker(model_dir, tmp_path, activated):
+    """A TrainingJobManager as one API worker process would create it"""
+    def activate(version):
+        ModelRegistry(model_dir).activate(version)
+        activated.append(version)
+        return True
+
+    return TrainingJobManager(
+        model_dir=model_dir,
+        profile_store_path=str(tmp_path / 'profiles.db'),
+        engine='random_forest',
+        activate=activate,
+        niceness=0
+    )
+
+
+def test_jobs_are_exclusive_and_visible_across_workers(model_dir, tmp_path, training_csv):
+    activated = []
+    first, second = _worker(model_dir, tmp_path, activated), _worker(model_dir, tmp_path, activated)
+
+    job = first.start(training_csv)
+    with pytest.raises(TrainingJobConflictError, match=job['job_id']):
+        second.start(training_csv)
+    assert second.get(job['job_id'])['status'] == 'running'
+
+    finished = _wait_until_finished(second, job['job_id'])
+    assert finished['status'] == 'succeeded', finished['error']
+    assert finished['progress'] == 1.0
+    assert activated == [finished['model_version']]
+    assert [j['job_id'] for j in second.list()] == [job['job_id']]
+
+    # The lock is released once the job has finished
+    again = second.start(training_csv)
+    assert _wait_until_finished(first, again['job_id'])['status'] == 'succeeded'
+
+
+def test_cancel_from_another_worker_removes_unfinished_bundles(model_dir, tmp_path, training_csv):
+    activated = []
+    first, second = _worker(model_dir, tmp_path, activated), _worker(model_dir, tmp_path, activated)
+    registry = ModelRegistry(model_dir)
+
+    job = first.start(training_csv)
+    _wait_for_stage(second, job['job_id'], 'load_data')
+    # What a publish killed half-way leaves behind
+    staging_dir = os.path.join(registry.versions_dir, '.tmp-20990101T000000-abcdef')
+    os.makedirs(staging_dir)
+
+    assert second.cancel(job['job_id'])['status'] == 'cancelled'
+    finished = _wait_until_finished(first, job['job_id'])
+    # The monitor removes the staging directory once the process has exited
+    deadline = time.monotonic() + 10
+    while os.path.exists(staging_dir) and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+    assert finished['status'] == 'cancelled'
+    assert not os.path.exists(staging_dir)
+    assert activated == []
+    assert registry.current_version() is None
+
+
+def test_job_of_a_dead_worker_is_reported_as_failed(model_dir, tmp_path):
+    manager = _worker(model_dir, tmp_path, [])
+    job = {
+        'job_id': 'orphan', 'status': 'running', 'mode': 'full', 'data_path': 'x.csv',
+        'created_at': time.time(), 'finished_at': None, 'stage': 'fit', 'stages': {},
+        'expected_stages': [], 'progress': 0.5, 'model_version': None, 'error': None, 'pid': None
+    }
+    with open(os.path.join(manager.jobs_dir, 'orphan.json'), 'w') as f:
+        json.dump(job, f)
+
+    status = manager.get('orphan')
+
+    assert status['status'] == 'failed'
+    assert 'interrupted' in status['error']
+    assert 'pid' not in status
+
+
+def test_workers_follow_the_registry_current_version(model_dir, trained_recommender):
+    registry = ModelRegistry(model_dir)
+    first_version = registry.publish(trained_recommender)
+    registry.activate(first_version)
+    worker = InsuranceMLIntegration(model_dir=model_dir, cache_size=0)
+    assert worker.initialize_model()
+    assert worker.sync_with_registry() is False
+
+    # Another worker activates a new version
+    second_version = registry.publish(trained_recommender)
+    registry.activate(second_version)
+
+    assert worker.sync_with_registry() is True
+    assert worker.model_version == second_version
@@ -1,19 +1,31 @@
 import pandas as pd
 import numpy as np
 from insurance_recommender import InsuranceRecommender
+from model_registry import ModelRegistry
+from training_data import read_training_data, training_columns, write_training_chunks, LABEL_COLUMN
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, f1_score
 import os
+import sys
 import logging
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def generate_sample_data(n_samples=5000):
-    """Generate synthetic insurance data for training with realistic distributions and correlations"""
-    np.random.seed(42)
-    
+POLICY_TYPES = [
+    'Critical Illness Cover',
+    'Health Insurance - Premium',
+    'Term Life Insurance',
+    'Whole Life Insurance',
+    'Property Insurance',
+    'Vehicle Insurance',
+    'Travel Insurance',
+    'Disability Insurance'
+]
+
+def _sample_profiles(rng, n_samples):
+    """Draw synthetic user profiles with realistic distributions and correlations"""
     # Define possible values for categorical features with realistic distributions
     occupations = {
         'professional': 0.3,
@@ -97,11 +109,11 @@ def generate_sample_data(n_samples=5000):
     }
     
     # Generate correlated features
-    age = np.random.normal(40, 15, n_samples)
+    age = rng.normal(40, 15, n_samples)
     age = np.clip(age, 18, 75).astype(int)
     
     # Income correlated with age and education
-    base_income = np.random.normal(60000, 20000, n_samples)
+    base_income = rng.normal(60000, 20000, n_samples)
     age_factor = (age - 18) / (75 - 18)  # Normalize age to 0-1
     income = base_income * (1 + age_factor * 0.5)  # Income increases with age
     
@@ -110,153 +122,173 @@ def generate_sample_data(n_samples=5000):
         # Basic Demographic Information
         'age': age,
         'income': income,
-        'occupation': np.random.choice(list(occupations.keys()), n_samples, p=list(occupations.values())),
-        'family_size': np.random.poisson(2, n_samples) + 1,  # Poisson distribution for family size
-        'marital_status': np.random.choice(list(marital_statuses.keys()), n_samples, p=list(marital_statuses.values())),
-        'education_level': np.random.choice(list(education_levels.keys()), n_samples, p=list(education_levels.values())),
+        'occupation': rng.choice(list(occupations.keys()), n_samples, p=list(occupations.values())),
+        'family_size': rng.poisson(2, n_samples) + 1,  # Poisson distribution for family size
+        'marital_status': rng.choice(list(marital_statuses.keys()), n_samples, p=list(marital_statuses.values())),
+        'education_level': rng.choice(list(education_levels.keys()), n_samples, p=list(education_levels.values())),
         
         # Risk and Health Assessment
-        'risk_tolerance': np.random.beta(2, 2, n_samples),  # Beta distribution for risk tolerance
-        'health_status': np.random.choice(list(health_statuses.keys()), n_samples, p=list(health_statuses.values())),
-        'existing_conditions': np.random.poisson(0.5, n_samples),  # Poisson distribution for conditions
-        'lifestyle': np.random.choice(list(lifestyles.keys()), n_samples, p=list(lifestyles.values())),
-        'family_medical_history': np.random.choice(list(family_medical_histories.keys()), n_samples, p=list(family_medical_histories.values())),
-        'smoking_status': np.random.choice(list(smoking_statuses.keys()), n_samples, p=list(smoking_statuses.values())),
-        'bmi': np.random.normal(25, 4, n_samples),  # Normal distribution for BMI
+        'risk_tolerance': rng.beta(2, 2, n_samples),  # Beta distribution for risk tolerance
+        'health_status': rng.choice(list(health_statuses.keys()), n_samples, p=list(health_statuses.values())),
+        'existing_conditions': rng.poisson(0.5, n_samples),  # Poisson distribution for conditions
+        'lifestyle': rng.choice(list(lifestyles.keys()), n_samples, p=list(lifestyles.values())),
+        'family_medical_history': rng.choice(list(family_medical_histories.keys()), n_samples, p=list(family_medical_histories.values())),
+        'smoking_status': rng.choice(list(smoking_statuses.keys()), n_samples, p=list(smoking_statuses.values())),
+        'bmi': rng.normal(25, 4, n_samples),  # Normal distribution for BMI
         
         # Financial Information
-        'savings_rate': np.random.beta(2, 5, n_samples),  # Beta distribution for savings rate
-        'debt': np.random.normal(20000, 10000, n_samples),
-        'investment_experience': np.random.beta(2, 3, n_samples),  # Beta distribution for investment experience
+        'savings_rate': rng.beta(2, 5, n_samples),  # Beta distribution for savings rate
+        'debt': rng.normal(20000, 10000, n_samples),
+        'investment_experience': rng.beta(2, 3, n_samples),  # Beta distribution for investment experience
         
         # Insurance Preferences
-        'coverage_preference': np.random.choice(list(coverage_preferences.keys()), n_samples, p=list(coverage_preferences.values())),
-        'policy_duration_preference': np.random.choice(list(policy_duration_preferences.keys()), n_samples, p=list(policy_duration_preferences.values())),
-        'premium_budget': np.random.normal(500, 200, n_samples),
+        'coverage_preference': rng.choice(list(coverage_preferences.keys()), n_samples, p=list(coverage_preferences.values())),
+        'policy_duration_preference': rng.choice(list(policy_duration_preferences.keys()), n_samples, p=list(policy_duration_preferences.values())),
+        'premium_budget': rng.normal(500, 200, n_samples),
         
         # Location and Assets
-        'location_type': np.random.choice(list(location_types.keys()), n_samples, p=list(location_types.values())),
-        'property_ownership': np.random.choice(list(property_ownerships.keys()), n_samples, p=list(property_ownerships.values())),
-        'vehicle_ownership': np.random.choice(list(vehicle_ownerships.keys()), n_samples, p=list(vehicle_ownerships.values()))
+        'location_type': rng.choice(list(location_types.keys()), n_samples, p=list(location_types.values())),
+        'property_ownership': rng.choice(list(property_ownerships.keys()), n_samples, p=list(property_ownerships.values())),
+        'vehicle_ownership': rng.choice(list(vehicle_ownerships.keys()), n_samples, p=list(vehicle_ownerships.values()))
     }
     
     # Create DataFrame
     df = pd.DataFrame(data)
     
-    # Generate policy recommendations based on sophisticated rules
-    recommendations = []
-    for _, row in df.iterrows():
-        scores = {}
-        
-        # Critical Illness Cover
-        if (30 <= row['age'] <= 50 and 
-            row['income'] >= 50000 and 
-            row['coverage_preference'] in ['premium', 'comprehensive'] and
-            row['family_medical_history'] != 'none'):
-            base_score = 0.7
-            # Adjust score based on additional factors
-            if row['smoking_status'] == 'current':
-                base_score -= 0.1
-            if row['health_status'] in ['fair', 'poor']:
-                base_score += 0.1
-            scores['Critical Illness Cover'] = np.random.uniform(base_score, base_score + 0.2)
-        
-        # Health Insurance - Premium
-        if (row['health_status'] in ['fair', 'poor'] or 
-            row['existing_conditions'] > 0 or 
-            row['smoking_status'] == 'current' or
-            (row['family_size'] >= 3 and row['income'] >= 60000)):
-            base_score = 0.7
-            # Adjust score based on additional factors
-            if row['bmi'] > 30:
-                base_score += 0.1
-            if row['lifestyle'] == 'sedentary':
-                base_score += 0.05
-            scores['Health Insurance - Premium'] = np.random.uniform(base_score, base_score + 0.25)
-        
-        # Term Life Insurance
-        if (row['family_size'] > 1 and 
-            row['income'] >= 40000 and
-            row['age'] <= 60):
-            base_score = 0.6
-            # Adjust score based on additional factors
-            if row['marital_status'] == 'married':
-                base_score += 0.1
-            if row['education_level'] in ['masters', 'phd']:
-                base_score += 0.05
-            scores['Term Life Insurance'] = np.random.uniform(base_score, base_score + 0.25)
-        
-        # Whole Life Insurance
-        if (row['income'] >= 80000 and 
-            row['coverage_preference'] in ['premium', 'comprehensive'] and 
-            row['risk_tolerance'] < 0.4 and
-            row['investment_experience'] > 0.5):
-            base_score = 0.75
-            # Adjust score based on additional factors
-            if row['savings_rate'] > 0.2:
-                base_score += 0.1
-            if row['debt'] < 10000:
-                base_score += 0.05
-            scores['Whole Life Insurance'] = np.random.uniform(base_score, base_score + 0.15)
-        
-        # Property Insurance
-        if (row['property_ownership'] in ['owned', 'mortgaged'] or 
-            row['income'] >= 70000):
-            base_score = 0.6
-            # Adjust score based on additional factors
-            if row['location_type'] == 'urban':
-                base_score += 0.1
-            if row['property_ownership'] == 'owned':
-                base_score += 0.05
-            scores['Property Insurance'] = np.random.uniform(base_score, base_score + 0.2)
-        
-        # Vehicle Insurance
-        if (row['vehicle_ownership'] != 'none' and
-            25 <= row['age'] <= 60 and 
-            row['income'] >= 40000):
-            base_score = 0.5
-            # Adjust score based on additional factors
-            if row['vehicle_ownership'] == 'multiple':
-                base_score += 0.1
-            if row['location_type'] == 'urban':
-                base_score += 0.05
-            scores['Vehicle Insurance'] = np.random.uniform(base_score, base_score + 0.2)
-        
-        # Add some randomness for other policies with lower scores
-        all_policies = [
-            'Critical Illness Cover',
-            'Health Insurance - Premium',
-            'Term Life Insurance',
-            'Whole Life Insurance',
-            'Property Insurance',
-            'Vehicle Insurance',
-            'Travel Insurance',
-            'Disability Insurance'
-        ]
-        
-        for policy in all_policies:
-            if policy not in scores:
-                base_score = 0.1
-                # Add small variations based on user profile
-                if row['coverage_preference'] in ['premium', 'comprehensive']:
-                    base_score += 0.1
-                if row['income'] > 100000:
-                    base_score += 0.05
-                scores[policy] = np.random.uniform(base_score, base_score + 0.3)
-        
-        # Sort by score and select the highest
-        best_policy = max(scores.items(), key=lambda x: x[1])[0]
-        recommendations.append(best_policy)
+    return df
 
+def assign_recommendations(df, rng):
+    """
+    Label each profile with its best-scoring policy
+    
+    Each policy whose eligibility rule matches gets a score drawn uniformly
+    from [base, base + width], with the base adjusted by profile factors;
+    every other policy gets a low fallback score. The highest score wins.
+    All rules are evaluated as boolean masks over the whole frame.
+    
+    Args:
+        df (pd.DataFrame): Profiles as produced by ``_sample_profiles``
+        rng (np.random.Generator): Random source for the score draws
         
+    Returns:
+        np.ndarray: Recommended policy type per row
+    """
+    age = df['age'].to_numpy()
+    income = df['income'].to_numpy()
+    family_size = df['family_size'].to_numpy()
+    
+    def is_(column, *values):
+        return df[column].isin(values).to_numpy()
     
-    df['recommended_policy'] = recommendations
+    premium_coverage = is_('coverage_preference', 'premium', 'comprehensive')
     
-    df.to_csv('insurance_training_data.csv', index=False)
-    print("Dataset exported to 'insurance_training_data.csv'")
+    # Fallback score range for policies whose rule does not match
+    fallback_base = 0.1 + 0.1 * premium_coverage + 0.05 * (income > 100000)
+    low = np.repeat(fallback_base[:, None], len(POLICY_TYPES), axis=1)
+    width = np.full(low.shape, 0.3)
     
+    def apply_rule(policy, eligible, base, rule_width):
+        column = POLICY_TYPES.index(policy)
+        low[eligible, column] = base[eligible]
+        width[eligible, column] = rule_width
+    
+    # Critical Illness Cover
+    apply_rule(
+        'Critical Illness Cover',
+        (30 <= age) & (age <= 50) & (income >= 50000) & premium_coverage
+        & ~is_('family_medical_history', 'none'),
+        0.7 - 0.1 * is_('smoking_status', 'current') + 0.1 * is_('health_status', 'fair', 'poor'),
+        0.2
+    )
+    
+    # Health Insurance - Premium
+    apply_rule(
+        'Health Insurance - Premium',
+        is_('health_status', 'fair', 'poor') | (df['existing_conditions'].to_numpy() > 0)
+        | is_('smoking_status', 'current') | ((family_size >= 3) & (income >= 60000)),
+        0.7 + 0.1 * (df['bmi'].to_numpy() > 30) + 0.05 * is_('lifestyle', 'sedentary'),
+        0.25
+    )
+    
+    # Term Life Insurance
+    apply_rule(
+        'Term Life Insurance',
+        (family_size > 1) & (income >= 40000) & (age <= 60),
+        0.6 + 0.1 * is_('marital_status', 'married') + 0.05 * is_('education_level', 'masters', 'phd'),
+        0.25
+    )
+    
+    # Whole Life Insurance
+    apply_rule(
+        'Whole Life Insurance',
+        (income >= 80000) & premium_coverage & (df['risk_tolerance'].to_numpy() < 0.4)
+        & (df['investment_experience'].to_numpy() > 0.5),
+        0.75 + 0.1 * (df['savings_rate'].to_numpy() > 0.2) + 0.05 * (df['debt'].to_numpy() < 10000),
+        0.15
+    )
+    
+    # Property Insurance
+    apply_rule(
+        'Property Insurance',
+        is_('property_ownership', 'owned', 'mortgaged') | (income >= 70000),
+        0.6 + 0.1 * is_('location_type', 'urban') + 0.05 * is_('property_ownership', 'owned'),
+        0.2
+    )
+    
+    # Vehicle Insurance
+    apply_rule(
+        'Vehicle Insurance',
+        ~is_('vehicle_ownership', 'none') & (25 <= age) & (age <= 60) & (income >= 40000),
+        0.5 + 0.1 * is_('vehicle_ownership', 'multiple') + 0.05 * is_('location_type', 'urban'),
+        0.2
+    )
+    
+    scores = low + width * rng.random(low.shape)
+    return np.asarray(POLICY_TYPES, dtype=object)[scores.argmax(axis=1)]
+
+def generate_sample_chunk(n_samples, rng):
+    """Generate one labelled chunk of synthetic training data"""
+    df = _sample_profiles(rng, n_samples)
+    df['recommended_policy'] = assign_recommendations(df, rng)
     return df
 
+def generate_sample_data(n_samples=5000, seed=42, output_path='insurance_training_data.csv'):
+    """Generate synthetic insurance data for training with realistic distributions and correlations"""
+    df = generate_sample_chunk(n_samples, np.random.default_rng(seed))
+    
+    df.to_csv(output_path, index=False)
+    print(f"Dataset exported to '{output_path}'")
+    
+    return df
+
+def generate_sample_data_chunked(n_samples, output_path, chunk_size=500_000, seed=42):
+    """
+    Generate a large synthetic dataset straight to disk, one chunk at a time
+    
+    Each chunk draws from its own stream spawned from ``seed``, so the output
+    is reproducible and memory stays bounded by ``chunk_size``.
+    
+    Args:
+        n_samples (int): Total number of rows
+        output_path (str): Destination .csv or .parquet file
+        chunk_size (int): Rows generated and written per chunk
+        seed (int): Seed for the root SeedSequence
+        
+    Returns:
+        int: Number of rows written
+    """
+    n_chunks = -(-n_samples // chunk_size)
+    streams = np.random.SeedSequence(seed).spawn(n_chunks)
+    chunks = (
+        generate_sample_chunk(
+            min(chunk_size, n_samples - i * chunk_size), np.random.default_rng(stream)
+        )
+        for i, stream in enumerate(streams)
+    )
+    rows = write_training_chunks(chunks, output_path)
+    print(f"Dataset exported to '{output_path}' ({rows} rows)")
+    return rows
+
 def save_sample_data(df, filename='insurance_training_data.csv'):
     """Save the generated data to a CSV file"""
     try:
@@ -280,11 +312,12 @@ def save_sample_data(df, filename='insurance_training_data.csv'):
     except Exception as e:
         print(f"Error saving sample data: {str(e)}")
 
-def main():
+def main(data_path='insurance_training_data.csv', engine='random_forest'):
     try:
-        # Load the training data
+        # Load the training data (CSV or Parquet), reading only the model's raw columns
         logger.info("Loading training data...")
-        df = pd.read_csv('insurance_training_data.csv')
+        recommender = InsuranceRecommender(engine=engine)
+        df = read_training_data(data_path, columns=training_columns(recommender.features))
         
         # Verify all required columns are present
         required_columns = [
@@ -302,21 +335,20 @@ def main():
         
         # Split the data
         logger.info("Splitting data into training and testing sets...")
-        X = df.drop(columns=['recommended_policy'])
-        y = df['recommended_policy']
+        X = df.drop(columns=[LABEL_COLUMN])
+        y = df[LABEL_COLUMN].astype(str)
         X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
         
-        # Initialize and train the model
-        logger.info("Initializing and training the model...")
-        recommender = InsuranceRecommender()
+        # Train the model
+        logger.info("Training the model...")
         recommender.train(X_train, y_train)
         
         # Evaluate the model
         logger.info("Evaluating model performance...")
-        y_pred = recommender.predict(X_test)
+        y_pred = recommender.predict_batch(X_test)
         
         # Extract top policy type from each prediction
-        y_pred_top = [pred[0]['policy_type'] for pred in y_pred]
+        y_pred_top = y_pred['policy_type'][:, 0]
         
         # Calculate metrics
         accuracy = accuracy_score(y_test, y_pred_top)
@@ -334,9 +366,12 @@ def main():
         }).sort_values('importance', ascending=False)
         logger.info(feature_importance)
         
-        # Save the trained model
+        # Publish the trained model as the registry's current version
         logger.info("Saving the trained model...")
-        recommender.save_model()
+        registry = ModelRegistry('models')
+        version = registry.publish(recommender, metadata={'training_rows': len(X_train)})
+        registry.activate(version)
+        logger.info(f"Model version {version} is now active")
         
         # Test with a sample user
         logger.info("\nTesting with sample user...")
@@ -378,4 +413,4 @@ def main():
         raise
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main(*sys.argv[1:3])
\ No newline at end of file
@@ -0,0 +1,161 @@
+import os
+import sys
+from typing import Iterable, List, Optional
+
+import pandas as pd
+
+# Explicit storage types for the training data. Categoricals are stored
+# dictionary-encoded; numerics use the narrowest type that holds them.
+TRAINING_SCHEMA = {
+    'age': 'int16',
+    'income': 'float32',
+    'occupation': 'category',
+    'family_size': 'int16',
+    'marital_status': 'category',
+    'education_level': 'category',
+    'risk_tolerance': 'float32',
+    'health_status': 'category',
+    'existing_conditions': 'int16',
+    'lifestyle': 'category',
+    'family_medical_history': 'category',
+    'smoking_status': 'category',
+    'bmi': 'float32',
+    'savings_rate': 'float32',
+    'debt': 'float32',
+    'investment_experience': 'float32',
+    'coverage_preference': 'category',
+    'policy_duration_preference': 'category',
+    'premium_budget': 'float32',
+    'location_type': 'category',
+    'property_ownership': 'category',
+    'vehicle_ownership': 'category',
+    'recommended_policy': 'category'
+}
+LABEL_COLUMN = 'recommended_policy'
+
+PARQUET_EXTENSIONS = ('.parquet', '.pq')
+
+
+def training_columns(features: List[str]) -> List[str]:
+    """
+    Raw columns needed to train on ``features``, plus the label
+
+    Engineered features are derived during preprocessing, so only the raw
+    inputs they are built from have to be read.
+    """
+    return [column for column in TRAINING_SCHEMA if column in features or column == LABEL_COLUMN]
+
+
+def apply_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """Cast known columns to TRAINING_SCHEMA, leaving any others untouched"""
+    dtypes = {column: dtype for column, dtype in TRAINING_SCHEMA.items() if column in df.columns}
+    # Integer columns cannot hold missing values; keep those as float32
+    for column, dtype in dtypes.items():
+        if dtype.startswith('int') and df[column].isna().any():
+            dtypes[column] = 'float32'
+    return df.astype(dtypes)
+
+
+def is_parquet(path: str) -> bool:
+    return path.lower().endswith(PARQUET_EXTENSIONS)
+
+
+def read_training_data(path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Read training data from CSV or Parquet with the typed schema applied
+
+    Args:
+        path: Path to a .csv or .parquet file
+        columns: Only read these columns (projection pushdown for Parquet)
+
+    Returns:
+        DataFrame typed according to TRAINING_SCHEMA
+    """
+    if is_parquet(path):
+        return apply_schema(pd.read_parquet(path, columns=columns))
+
+    dtypes = {
+        column: ('float32' if dtype.startswith('int') else dtype)
+        for column, dtype in TRAINING_SCHEMA.items()
+        if columns is None or column in columns
+    }
+    return apply_schema(pd.read_csv(path, usecols=columns, dtype=dtypes))
+
+
+def write_training_data(df: pd.DataFrame, path: str):
+    """Write training data as CSV or Parquet depending on the file extension"""
+    if is_parquet(path):
+        apply_schema(df).to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+
+
+def write_training_chunks(chunks: Iterable[pd.DataFrame], path: str) -> int:
+    """
+    Stream DataFrame chunks to a single CSV or Parquet file
+
+    Only one chunk is held in memory at a time. For Parquet each chunk
+    becomes a row group, and categoricals share one dictionary type so all
+    row groups have the same schema.
+
+    Args:
+        chunks: Iterable of DataFrames with identical columns
+        path: Destination .csv or .parquet file
+
+    Returns:
+        Number of rows written
+    """
+    rows = 0
+    if not is_parquet(path):
+        for i, chunk in enumerate(chunks):
+            chunk.to_csv(path, index=False, mode='w' if i == 0 else 'a', header=i == 0)
+            rows += len(chunk)
+        return rows
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    schema = None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(apply_schema(chunk), preserve_index=False)
+            if schema is None:
+                schema = pa.schema([
+                    field.with_type(pa.dictionary(pa.int32(), pa.string()))
+                    if pa.types.is_dictionary(field.type) else field
+                    for field in table.schema
+                ]).remove_metadata()
+                writer = pq.ParquetWriter(path, schema)
+            writer.write_table(table.cast(schema))
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def convert_csv_to_parquet(csv_path: str, parquet_path: Optional[str] = None, chunksize: int = 500_000) -> str:
+    """
+    Convert a training CSV to typed Parquet, streaming it in chunks
+
+    Args:
+        csv_path: Source CSV file
+        parquet_path: Destination file, defaults to ``csv_path`` with a .parquet extension
+        chunksize: Rows per chunk (and per Parquet row group)
+
+    Returns:
+        Path of the written Parquet file
+    """
+    if parquet_path is None:
+        parquet_path = os.path.splitext(csv_path)[0] + '.parquet'
+    write_training_chunks(pd.read_csv(csv_path, chunksize=chunksize), parquet_path)
+    return parquet_path
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (2, 3):
+        print("Usage: python training_data.py <input.csv> [output.parquet]")
+        sys.exit(1)
+    output_path = convert_csv_to_parquet(*sys.argv[1:])
+    print(f"Training data converted to {output_path}")
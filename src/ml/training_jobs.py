@@ -0,0 +1,373 @@
+import contextlib
+import fcntl
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+import uuid
+from typing import Callable, Dict, List, Optional
+
+from integration import run_training
+from model_registry import ModelRegistry
+
+# Stages reported by a training run, in order. 'feature_importance' only
+# runs for engines without native importances and is not counted.
+TRAINING_STAGES = ['load_data', 'preprocess', 'feature_selection', 'fit', 'publish', 'activate']
+INCREMENTAL_TRAINING_STAGES = ['load_data', 'fit', 'drift_check', 'publish', 'activate']
+
+# Job state lives in <model_dir>/jobs so every worker process sees it
+JOBS_DIR = 'jobs'
+# Held for the whole life of a job by the worker running it
+RUN_LOCK_FILE = '.run.lock'
+# Held briefly around every read-modify-write of a job file
+STATE_LOCK_FILE = '.state.lock'
+
+
+class TrainingJobConflictError(RuntimeError):
+    """Raised when a training job is started while another one is active"""
+
+
+def _run_job(updates, model_dir, data_path, profile_store_path, engine, mode, niceness):
+    """Entry point of the training process; reports back through ``updates``"""
+    if niceness:
+        # Yield the CPU to the serving process while both compete for it
+        os.nice(niceness)
+    try:
+        version = run_training(
+            model_dir, data_path, profile_store_path, engine,
+            on_stage=lambda stage, seconds: updates.put(('stage', stage, seconds)),
+            mode=mode
+        )
+        updates.put(('published', version))
+    except Exception as e:
+        updates.put(('error', f"{type(e).__name__}: {e}"))
+
+
+class TrainingJobManager:
+    """
+    Runs model training as background jobs, one at a time across all workers
+
+    Each job trains in its own process, so the serving process keeps its
+    CPU time and GIL. The worker that starts a job holds an exclusive lock
+    file in the model directory until the job has finished, so a second
+    worker cannot start another one. Job status is kept as JSON files next
+    to it, so any worker can report on or cancel any job.
+
+    A monitor thread in the starting worker collects stage timings from the
+    job, then activates the published version through ``activate`` before
+    marking the job as succeeded. The other workers pick the new version
+    up from the registry's CURRENT file. Cancelling terminates the training
+    process; a cancelled job never changes the served model, and staging
+    directories of a publish it interrupted are removed.
+    """
+
+    def __init__(
+        self,
+        model_dir: str,
+        profile_store_path: str,
+        engine: str,
+        activate: Callable[[str], bool],
+        niceness: int = 10,
+        history_size: int = 20
+    ):
+        """
+        Args:
+            model_dir: Model registry root the job publishes into
+            profile_store_path: Profile store whose labelled rows are trained on
+            engine: Model engine to train
+            activate: Called with the published version; returns True once it serves
+            niceness: Scheduling niceness added to the training process
+            history_size: Number of finished jobs kept for status queries
+        """
+        self.model_dir = model_dir
+        self.profile_store_path = profile_store_path
+        self.engine = engine
+        self.activate = activate
+        self.niceness = niceness
+        self.history_size = history_size
+        self.jobs_dir = os.path.join(model_dir, JOBS_DIR)
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        self._run_lock_path = os.path.join(self.jobs_dir, RUN_LOCK_FILE)
+        self._state_lock_path = os.path.join(self.jobs_dir, STATE_LOCK_FILE)
+        # Training processes started by this worker
+        self._processes: Dict[str, multiprocessing.Process] = {}
+        self._lock = threading.Lock()
+        self._context = multiprocessing.get_context('spawn')
+        self.logger = logging.getLogger(__name__)
+
+    def _job_path(self, job_id: str) -> str:
+        return os.path.join(self.jobs_dir, f'{job_id}.json')
+
+    def _read(self, job_id: str) -> Optional[Dict]:
+        try:
+            with open(self._job_path(job_id)) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _write(self, job: Dict):
+        # Replaced atomically, so readers never see a partial file
+        staging_path = os.path.join(self.jobs_dir, f".{job['job_id']}.{os.getpid()}.{threading.get_ident()}")
+        with open(staging_path, 'w') as f:
+            json.dump(job, f)
+        os.replace(staging_path, self._job_path(job['job_id']))
+
+    @contextlib.contextmanager
+    def _state_lock(self):
+        with open(self._state_lock_path, 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _update(self, job_id: str, change: Callable[[Dict], None]) -> Optional[Dict]:
+        """Apply ``change`` to a job file under the state lock; returns the updated job"""
+        with self._state_lock():
+            job = self._read(job_id)
+            if job is not None:
+                change(job)
+                self._write(job)
+            return job
+
+    def _run_lock_held(self) -> bool:
+        """Whether some worker (this one included) is running a job"""
+        with open(self._run_lock_path, 'a') as f:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return True
+            fcntl.flock(f, fcntl.LOCK_UN)
+            return False
+
+    def _job_ids(self) -> List[str]:
+        """Ids of all stored jobs, oldest first"""
+        jobs = [job for job in map(self._read, self._stored_ids()) if job is not None]
+        return [job['job_id'] for job in sorted(jobs, key=lambda job: job['created_at'])]
+
+    def _stored_ids(self) -> List[str]:
+        return [name[:-len('.json')] for name in os.listdir(self.jobs_dir) if name.endswith('.json')]
+
+    def start(self, data_path: str, mode: str = 'full') -> Dict:
+        """
+        Start a training job
+
+        Args:
+            data_path: Path to the training data file (CSV or Parquet)
+            mode: 'full' or 'incremental' (see InsuranceMLIntegration.publish_trained_model)
+
+        Returns:
+            The new job's status
+
+        Raises:
+            TrainingJobConflictError: If another job is still running in any worker
+        """
+        # The lock is released when this file is closed, or by the OS if the
+        # worker dies, so a crashed worker never blocks training for good
+        run_lock = open(self._run_lock_path, 'a')
+        try:
+            fcntl.flock(run_lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            run_lock.close()
+            running = [job['job_id'] for job in self.list() if job['status'] == 'running']
+            if running:
+                raise TrainingJobConflictError(f"Training job {running[0]} is already running")
+            raise TrainingJobConflictError("A training job is already running")
+
+        try:
+            job_id = uuid.uuid4().hex
+            updates = self._context.Queue()
+            process = self._context.Process(
+                target=_run_job,
+                args=(updates, self.model_dir, data_path, self.profile_store_path, self.engine, mode, self.niceness),
+                name=f'training-{job_id[:8]}',
+                daemon=True
+            )
+            created_at = time.time()
+            process.start()
+            self._write({
+                'job_id': job_id,
+                'status': 'running',
+                'mode': mode,
+                'data_path': data_path,
+                'created_at': created_at,
+                'finished_at': None,
+                'stage': 'load_data',
+                'stages': {},
+                'expected_stages': INCREMENTAL_TRAINING_STAGES if mode == 'incremental' else TRAINING_STAGES,
+                'progress': 0.0,
+                'model_version': None,
+                'error': None,
+                'pid': process.pid
+            })
+        except BaseException:
+            run_lock.close()
+            raise
+        with self._lock:
+            self._processes[job_id] = process
+        self._trim_history()
+
+        threading.Thread(
+            target=self._monitor, args=(job_id, process, updates, run_lock),
+            name=f'training-monitor-{job_id[:8]}', daemon=True
+        ).start()
+        self.logger.info(f"Training job {job_id} started")
+        return self.get(job_id)
+
+    def _monitor(self, job_id: str, process, updates, run_lock):
+        try:
+            self._follow(job_id, process, updates)
+        finally:
+            with self._lock:
+                self._processes.pop(job_id, None)
+            run_lock.close()
+
+    def _follow(self, job_id: str, process, updates):
+        version, error = None, None
+        while True:
+            try:
+                message = updates.get(timeout=0.5)
+            except queue.Empty:
+                if not process.is_alive():
+                    # The process may have exited right after its last message
+                    try:
+                        message = updates.get_nowait()
+                    except queue.Empty:
+                        break
+                else:
+                    continue
+            if message[0] == 'stage':
+                self._record_stage(job_id, message[1], message[2])
+            elif message[0] == 'published':
+                version = message[1]
+                break
+            else:
+                error = message[1]
+                break
+        process.join()
+
+        def finish_without_model(job):
+            if job['status'] != 'cancelled':
+                job['status'] = 'failed'
+                job['error'] = error or f"Training process exited with code {process.exitcode}"
+            self._finish(job)
+
+        def start_activation(job):
+            if job['status'] == 'running':
+                job['model_version'] = version
+                job['stage'] = 'activate'
+
+        job = self._read(job_id)
+        if version is not None and job['status'] == 'running':
+            job = self._update(job_id, start_activation)
+        if version is None or job['status'] != 'running':
+            # A publish cut short leaves its staging directory behind
+            removed = ModelRegistry(self.model_dir).remove_staging(since=job['created_at'])
+            if removed:
+                self.logger.info(f"Removed unfinished model bundles of job {job_id}: {', '.join(removed)}")
+            job = self._update(job_id, finish_without_model)
+            self.logger.info(f"Training job {job_id} {job['status']}")
+            return
+
+        # From here on the job can no longer be cancelled
+        start = time.perf_counter()
+        activated = self.activate(version)
+        self._record_stage(job_id, 'activate', time.perf_counter() - start)
+
+        def finish(job):
+            job['status'] = 'succeeded' if activated else 'failed'
+            if not activated:
+                job['error'] = f"Model {version} was published but could not be activated"
+            self._finish(job)
+
+        job = self._update(job_id, finish)
+        self.logger.info(f"Training job {job_id} {job['status']}")
+
+    def _record_stage(self, job_id: str, stage: str, seconds: float):
+        def record(job):
+            job['stages'][stage] = seconds
+            if stage not in job['expected_stages']:
+                # An incremental run fell back to a full retrain
+                job['expected_stages'] = TRAINING_STAGES
+            expected = job['expected_stages']
+            job['progress'] = sum(s in job['stages'] for s in expected) / len(expected)
+            remaining = [s for s in expected if s not in job['stages']]
+            job['stage'] = remaining[0] if remaining else None
+
+        self._update(job_id, record)
+
+    @staticmethod
+    def _finish(job: Dict):
+        job['finished_at'] = time.time()
+        job['stage'] = None
+        if job['status'] == 'succeeded':
+            job['progress'] = 1.0
+
+    def _trim_history(self):
+        # Running jobs are always kept
+        job_ids = self._job_ids()
+        for job_id in job_ids[:max(len(job_ids) - self.history_size, 0)]:
+            job = self._read(job_id)
+            if job is not None and job['status'] != 'running':
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(self._job_path(job_id))
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Status of a job, or None if it is unknown"""
+        job = self._read(job_id)
+        if job is None:
+            return None
+        if job['status'] == 'running' and not self._run_lock_held():
+            # Nobody holds the run lock: the worker running the job exited
+            def interrupt(job):
+                if job['status'] == 'running':
+                    job['status'] = 'failed'
+                    job['error'] = "Training was interrupted: the worker running it exited"
+                    self._finish(job)
+
+            job = self._update(job_id, interrupt)
+        status = dict(job)
+        del status['expected_stages'], status['pid']
+        end = status['finished_at'] or time.time()
+        status['elapsed_seconds'] = end - status['created_at']
+        return status
+
+    def list(self) -> List[Dict]:
+        """Status of recent jobs, newest first"""
+        return [status for status in map(self.get, reversed(self._job_ids())) if status is not None]
+
+    def cancel(self, job_id: str) -> Optional[Dict]:
+        """
+        Cancel a running job by terminating its process
+
+        Works from any worker: the training process is signalled directly.
+
+        Returns:
+            The job's status (unchanged if it had already finished or is
+            activating its model), or None if the job is unknown
+        """
+        cancelled = []
+
+        def mark_cancelled(job):
+            if job['status'] == 'running' and job['model_version'] is None:
+                job['status'] = 'cancelled'
+                cancelled.append(job['pid'])
+
+        if self._update(job_id, mark_cancelled) is None:
+            return None
+        if cancelled:
+            with contextlib.suppress(ProcessLookupError):
+                os.kill(cancelled[0], signal.SIGTERM)
+            self.logger.info(f"Training job {job_id} cancelled")
+        return self.get(job_id)
+
+    def shutdown(self):
+        """Cancel the jobs started by this worker"""
+        with self._lock:
+            job_ids = list(self._processes)
+        for job_id in job_ids:
+            self.cancel(job_id)